@@ -0,0 +1,68 @@
+"""Benchmark of the default HTTP/1.1 transport against the shared HTTP/2 transport.
+
+Runs login, fetch, order and logout for many accounts concurrently against
+one local MockStravaServer (served by hypercorn, which speaks both protocols)
+and reports wall time and the number of TCP connections the server saw.
+
+Requires: pip install strava-cz[http2] hypercorn
+
+Usage: python benchmarks/bench_http2.py [accounts] [concurrency] [latency]
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from strava_cz import MealType, StravaCZ
+from strava_cz.mock_server import MockStravaServer
+from strava_cz.transport import HTTP2Transport
+
+
+def run(server: MockStravaServer, accounts: int, concurrency: int, transport=None) -> float:
+    """Run one session per account and return elapsed seconds."""
+
+    def session(i: int) -> None:
+        client = StravaCZ(f"user{i}", "heslo", "1234", base_url=server.url, transport=transport)
+        client.menu.fetch()
+        meal = client.menu.get_meals(meal_types=[MealType.MAIN], ordered=False)[0]
+        client.menu.order_meals(meal["id"])
+        client.logout()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(session, range(accounts)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+
+    server = MockStravaServer(latency=latency).start_http2()
+    try:
+        for i in range(accounts):
+            server.add_account(f"user{i}", "heslo", balance=1000)
+        server.generate_menu("1234", days=5)
+
+        print(f"accounts: {accounts}, concurrency: {concurrency}, latency: {latency * 1000:.0f} ms")
+        elapsed = run(server, accounts, concurrency)
+        print(
+            f"HTTP/1.1 requests.Session: {elapsed:.2f} s, "
+            f"{accounts / elapsed:.1f} sessions/s, connections: {server.connections}"
+        )
+
+        server.connections = 0
+        server._http2_clients.clear()
+        with HTTP2Transport(http1=False, max_connections=4) as transport:
+            elapsed = run(server, accounts, concurrency, transport)
+        print(
+            f"HTTP/2 shared transport:   {elapsed:.2f} s, "
+            f"{accounts / elapsed:.1f} sessions/s, connections: {server.connections}"
+        )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
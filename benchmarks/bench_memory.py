@@ -0,0 +1,104 @@
+"""Memory benchmark of parsed menus of many accounts of one canteen.
+
+Compares a baseline where every account keeps its own copies, the parser
+with string interning and shared allergen lists, and menus sharing parsed
+meals through a canteen MealCatalog (parse time is reported as well).
+
+Usage: python benchmarks/bench_memory.py [accounts] [days]
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import strava_cz.main as strava_main
+from strava_cz import Menu
+from strava_cz.catalog import MealCatalog
+
+NAMES = ["Rizek s bramborem", "Svickova na smetane", "Cocka na kyselo", "Kureci maso s ryzi",
+         "Testoviny s rajcatovou omackou", "Ryba s bramborovou kasi"]
+ALLERGENS = [["01", "Obiloviny obsahující lepek"], ["03", "Vejce"], ["04", "Ryby"],
+             ["07", "Mléko"], ["09", "Celer"]]
+
+
+def build_response(days: int, rng: random.Random) -> bytes:
+    """Build a canteen menu response with a soup and three main dishes per day."""
+    tables = {}
+    for day in range(days):
+        datum = f"{1 + day % 28:02d}.{1 + day // 28:02d}.2025"
+        meals = [("Polévka", f"Polevka {day}")] + [
+            (f"Oběd {n}", name) for n, name in enumerate(rng.sample(NAMES, 3), start=1)
+        ]
+        tables[f"table{day}"] = [
+            {
+                "datum": datum,
+                "druh_popis": kind,
+                "delsiPopis": name,
+                "nazev": name,
+                "zakazaneAlergeny": None,
+                "alergeny": rng.sample(ALLERGENS, 2),
+                "omezeniObj": {"den": ""},
+                "pocet": 0,
+                "veta": str(day * 4 + n),
+                "cena": "42.00",
+                "casKonec": f"2025-{1 + day // 28:02d}-{1 + day % 28:02d}T14:00:00",
+            }
+            for n, (kind, name) in enumerate(meals)
+        ]
+    return json.dumps(tables, ensure_ascii=False).encode("utf-8")
+
+
+def measure(response: bytes, accounts: int, shared: bool = False) -> int:
+    """Return bytes held by the parsed menus of all accounts."""
+    catalog = MealCatalog() if shared else None
+    menus = []
+    tracemalloc.start()
+    for _ in range(accounts):
+        menu = Menu(None, catalog=catalog)  # type: ignore[arg-type]
+        menu.raw_data = json.loads(response)  # Every account gets its own response objects
+        menu._parse_menu_data()
+        menu.raw_data = {}  # Measure the parsed data only
+        menus.append(menu)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def parse_time(response: bytes, accounts: int, shared: bool) -> float:
+    """Return seconds spent parsing the menus of all accounts (without JSON decoding)."""
+    catalog = MealCatalog() if shared else None
+    responses = [json.loads(response) for _ in range(accounts)]
+    started = time.perf_counter()
+    for raw in responses:
+        Menu(None, catalog=catalog)._parse_menu_data(raw)  # type: ignore[arg-type]
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    response = build_response(days, random.Random(42))
+
+    interned = measure(response, accounts)
+    shared = measure(response, accounts, shared=True)
+
+    intern, shared_allergens = strava_main._intern, strava_main._shared_allergens
+    strava_main._intern = strava_main._shared_allergens = lambda value: value
+    try:
+        baseline = measure(response, accounts)
+    finally:
+        strava_main._intern, strava_main._shared_allergens = intern, shared_allergens
+
+    print(f"accounts: {accounts}, days/account: {days}")
+    print(f"baseline: {baseline / 2**20:.1f} MiB ({baseline / accounts / 1024:.1f} KiB/account)")
+    print(f"interned: {interned / 2**20:.1f} MiB ({interned / accounts / 1024:.1f} KiB/account)")
+    print(f"catalog:  {shared / 2**20:.1f} MiB ({shared / accounts / 1024:.1f} KiB/account)")
+    print(f"saved:    {1 - interned / baseline:.0%} interned, {1 - shared / baseline:.0%} catalog")
+    private, catalog = parse_time(response, accounts, False), parse_time(response, accounts, True)
+    print(f"parse:    {private:.2f} s private, {catalog:.2f} s catalog")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Throughput benchmark of RuleEngine planning over many accounts.
+
+Usage: python benchmarks/bench_rules.py [accounts] [days]
+"""
+
+import random
+import sys
+import time
+
+from strava_cz import Menu, OrderPolicy, RuleEngine
+from strava_cz.catalog import MealCatalog
+
+NAMES = ["Rizek s bramborem", "Svickova na smetane", "Cocka na kyselo", "Kureci maso s ryzi",
+         "Testoviny s rajcatovou omackou", "Ryba s bramborovou kasi"]
+ALLERGENS = [["01", "Obiloviny obsahující lepek"], ["03", "Vejce"], ["04", "Ryby"],
+             ["07", "Mléko"], ["09", "Celer"]]
+
+
+def build_menu(days: int, rng: random.Random, catalog: MealCatalog) -> Menu:
+    """Build a menu with three main dishes per day, parsed through the catalog."""
+    tables = {}
+    for day in range(days):
+        datum = f"{1 + day % 28:02d}.{1 + day // 28:02d}.2025"
+        tables[f"table{day}"] = [
+            {
+                "datum": datum,
+                "druh_popis": f"Oběd {n}",
+                "delsiPopis": name,
+                "nazev": name,
+                "zakazaneAlergeny": None,
+                "alergeny": rng.sample(ALLERGENS, 2),
+                "omezeniObj": {"den": ""},
+                "pocet": int(rng.random() < 0.2 and n == 1),
+                "veta": str(day * 3 + n),
+                "cena": f"{rng.choice([38, 42, 55])}.00",
+            }
+            for n, name in enumerate(rng.sample(NAMES, 3), start=1)
+        ]
+    menu = Menu(None, catalog=catalog)  # type: ignore[arg-type]
+    menu.raw_data = tables
+    menu._parse_menu_data()
+    return menu
+
+
+def main() -> None:
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = random.Random(42)
+
+    catalog = MealCatalog()
+    menus = [build_menu(days, rng, catalog) for _ in range(min(accounts, 200))]
+    policies = [
+        OrderPolicy(preferred_names=["rizek"], max_price=50),
+        OrderPolicy(forbidden_allergens=["04", "07"], skip_days=[4], cancel_unwanted=True),
+        OrderPolicy(preferred_names=["svickova", "kureci"], fallback=False),
+    ]
+    workload = [
+        (account, menus[account % len(menus)], policies[account % len(policies)])
+        for account in range(accounts)
+    ]
+
+    engine = RuleEngine()
+    start = time.perf_counter()
+    plans = engine.plan_many(workload)
+    elapsed = time.perf_counter() - start
+
+    changes = sum(len(plan.order) + len(plan.cancel) for plan in plans.values())
+    print(f"accounts: {accounts}, days/account: {days}, planned changes: {changes}")
+    print(f"elapsed: {elapsed:.3f} s, {accounts / elapsed:,.0f} accounts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,20 @@ from .main import (
     InsufficientBalanceError,
     DuplicateMealError,
     InvalidMealTypeError,
+    SessionExpiredError,
+    CircuitOpenError,
+    DeadlineExceededError,
+    SaveTimeoutError,
     User,
     MealType,
     OrderType,
     Menu,
+    OrderPlan,
 )
+from .rules import OrderPolicy, RuleEngine
+from .snapshot import MenuSnapshot, write_snapshot
+from .scheduler import OrderScheduler
+from .watch import MenuWatcher
 
 __version__ = "0.2.0"
 __author__ = "Vojtěch Nerad"
@@ -26,8 +35,19 @@ __all__ = [
     "InsufficientBalanceError",
     "DuplicateMealError",
     "InvalidMealTypeError",
+    "SessionExpiredError",
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "SaveTimeoutError",
     "User",
     "MealType",
     "OrderType",
     "Menu",
+    "OrderPolicy",
+    "OrderPlan",
+    "RuleEngine",
+    "MenuSnapshot",
+    "write_snapshot",
+    "MenuWatcher",
+    "OrderScheduler",
 ]
@@ -0,0 +1,286 @@
+"""Batch runner sharding large account sets across worker processes
+
+Usage example:
+
+    def task(account):
+        client = pooled_client(account)  # Logged in once per worker process
+        client.menu.fetch()
+        return {"ok": True, "meals": len(client.menu)}
+
+    report = run_batch(accounts, task, processes=8, threads=16, checkpoint="run.ndjson")
+
+Accounts are grouped by canteen and split into shards of chunk_size
+accounts. Every shard is processed by a thread pool in one of the worker
+processes, so JSON decoding and parsing run in parallel on all CPU cores.
+Every worker process keeps a pool of logged in clients (a SessionStore
+created when the process starts) shared by all tasks it runs: a client
+returned by pooled_client() keeps its login session, HTTP connections,
+meal catalog and circuit breakers for the following tasks of the account
+and is logged out when the worker exits. With sessions the login sessions
+are kept in an SQLite file instead, shared by the workers and reused by
+the next run. Records of completed shards are appended to the checkpoint
+file; accounts found there are skipped when the run is started again
+(failed ones only without retry_failed).
+
+The task must be picklable (a module level function or functools.partial
+of one) and returns a JSON serializable record with an "ok" key.
+Exceptions raised by the task are reported as failed records.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .main import StravaCZ
+from .sessions import SessionStore, SQLiteSessionBackend, account_key
+
+Task = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# Clients of the current process, see pooled_client()
+_client_pool: Optional[SessionStore] = None
+_client_pool_lock = threading.Lock()
+
+
+def _open_pool(
+    max_clients: int = 1000,
+    sessions: Optional[str] = None,
+    client_kwargs: Optional[Dict[str, Any]] = None,
+) -> SessionStore:
+    """Create a client pool closed when the process exits.
+
+    Without a sessions file the clients are logged out on exit, otherwise
+    their sessions are saved for the next run.
+    """
+    backend = SQLiteSessionBackend(sessions) if sessions else None
+    pool = SessionStore(max_clients=max_clients, backend=backend, **(client_kwargs or {}))
+    Finalize(pool, pool.close, kwargs={"logout": not sessions}, exitpriority=10)
+    return pool
+
+
+def _init_worker(pool_options: Dict[str, Any]) -> None:
+    """Create the client pool of a worker process."""
+    global _client_pool
+    _client_pool = _open_pool(**pool_options)
+
+
+def pooled_client(account: Dict[str, Any]) -> StravaCZ:
+    """Return a logged in client of an account from the pool of this process.
+
+    Tasks run by run_batch() get their clients here, so the clients (login
+    sessions and HTTP connections) are reused by all tasks of the worker
+    process. The task must not log the client out. Outside of worker
+    processes a pool with default settings is created on first use.
+
+    Args:
+        account: Dictionary with username, password and canteen_number
+
+    Returns:
+        Logged in StravaCZ client shared with other tasks of the account
+
+    Raises:
+        AuthenticationError: If the login fails
+        StravaAPIError: If the login request fails
+    """
+    global _client_pool
+    with _client_pool_lock:
+        if _client_pool is None:
+            _client_pool = _open_pool()
+        pool = _client_pool
+    return pool.client(account["username"], account["password"], account["canteen_number"])
+
+
+def _run_task(task: Task, account: Dict[str, Any]) -> Dict[str, Any]:
+    """Run task for one account, turning exceptions into a failed record."""
+    try:
+        record = dict(task(account))
+    except Exception as e:
+        record = {"ok": False, "error": str(e), "error_type": type(e).__name__}
+    record.setdefault("account", account.get("username"))
+    record.setdefault("ok", False)
+    return record
+
+
+def _run_shard(task: Task, shard: List[Dict[str, Any]], threads: int) -> Dict[str, Any]:
+    """Process one shard in a worker process.
+
+    Returns:
+        {"pid", "records": [(key, record), ...], "duration", "cpu"}
+    """
+    started, cpu_started = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(shard)))) as executor:
+        records = list(executor.map(lambda account: _run_task(task, account), shard))
+    return {
+        "pid": os.getpid(),
+        "records": [(account_key(account), record) for account, record in zip(shard, records)],
+        "duration": time.perf_counter() - started,
+        "cpu": time.process_time() - cpu_started,
+    }
+
+
+def read_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read records of completed accounts from a checkpoint file.
+
+    A truncated last line (run killed while writing) and lines that are not
+    records of an account are ignored.
+
+    Returns:
+        Records by account key (see account_key())
+    """
+    completed: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            key, record = entry.get("key"), entry.get("record")
+            if isinstance(key, str) and isinstance(record, dict) and "ok" in record:
+                completed[key] = record
+    return completed
+
+
+def _open_checkpoint(path: str) -> Any:
+    """Open checkpoint for appending, terminating a truncated last line first."""
+    log = open(path, "a+b")
+    if log.tell() > 0:
+        log.seek(-1, os.SEEK_END)
+        if log.read(1) != b"\n":
+            log.write(b"\n")
+    return log
+
+
+def _shards(accounts: Sequence[Dict[str, Any]], chunk_size: int) -> Iterable[List[Dict[str, Any]]]:
+    """Split accounts into shards, keeping accounts of one canteen together."""
+    ordered = sorted(accounts, key=lambda account: str(account.get("canteen_number")))
+    for start in range(0, len(ordered), chunk_size):
+        yield ordered[start : start + chunk_size]
+
+
+def run_batch(
+    accounts: Sequence[Dict[str, Any]],
+    task: Task,
+    processes: Optional[int] = None,
+    threads: int = 8,
+    chunk_size: int = 50,
+    checkpoint: Optional[str] = None,
+    retry_failed: bool = False,
+    on_record: Optional[Callable[[Dict[str, Any]], None]] = None,
+    max_clients: int = 1000,
+    sessions: Optional[str] = None,
+    client_kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run task for every account in a pool of worker processes.
+
+    Args:
+        accounts: Accounts (dictionaries with username, canteen_number, ...)
+        task: Picklable function taking an account and returning a record
+        processes: Number of worker processes (None = number of CPUs)
+        threads: Threads per worker process
+        chunk_size: Accounts per shard (unit of work and of checkpointing)
+        checkpoint: NDJSON file recording completed accounts (None = no
+            checkpointing). Accounts already recorded are not run again.
+        retry_failed: Run accounts with failed records in the checkpoint again
+        on_record: Function called in the parent with every new record
+        max_clients: Clients kept in the pool of every worker process
+        sessions: SQLite file keeping the login sessions of pooled clients
+            between runs (None = clients are logged out when workers exit)
+        client_kwargs: Passed to StravaCZ by pooled_client() (e.g. base_url)
+
+    Returns:
+        Report {"records", "accounts", "skipped", "succeeded", "failed",
+        "duration", "throughput", "errors", "workers"} where records holds
+        records of all accounts (including those from the checkpoint) in
+        the order of accounts, errors counts failures by error type and
+        workers maps worker PIDs to {"shards", "accounts", "busy", "cpu"}
+        (seconds spent processing shards and their CPU time)
+
+    Raises:
+        ValueError: If an account key is duplicated or chunk_size is not positive
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    keys = [account_key(account) for account in accounts]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Accounts must be unique (by canteen number and username)")
+
+    started = time.perf_counter()
+    completed = read_checkpoint(checkpoint) if checkpoint else {}
+    if retry_failed:
+        completed = {key: record for key, record in completed.items() if record["ok"]}
+    skipped = sum(key in completed for key in keys)
+    pending = [account for account, key in zip(accounts, keys) if key not in completed]
+
+    workers: Dict[int, Dict[str, Any]] = {}
+    if pending:
+        log = _open_checkpoint(checkpoint) if checkpoint else None
+        try:
+            pool_options = {
+                "max_clients": max_clients,
+                "sessions": sessions,
+                "client_kwargs": client_kwargs,
+            }
+            with ProcessPoolExecutor(
+                max_workers=processes, initializer=_init_worker, initargs=(pool_options,)
+            ) as executor:
+                futures = [
+                    executor.submit(_run_shard, task, shard, threads)
+                    for shard in _shards(pending, chunk_size)
+                ]
+                for future in as_completed(futures):
+                    shard = future.result()
+                    _record_shard(shard, completed, workers, log, on_record)
+        finally:
+            if log is not None:
+                log.close()
+
+    duration = time.perf_counter() - started
+    records = [completed[key] for key in keys if key in completed]
+    failed = [record for record in records if not record["ok"]]
+    ran = len(records) - skipped
+    return {
+        "records": records,
+        "accounts": len(accounts),
+        "skipped": skipped,
+        "succeeded": len(records) - len(failed),
+        "failed": len(failed),
+        "duration": duration,
+        "throughput": ran / duration if duration > 0 else None,
+        "errors": dict(Counter(record.get("error_type") for record in failed)),
+        "workers": workers,
+    }
+
+
+def _record_shard(
+    shard: Dict[str, Any],
+    completed: Dict[str, Dict[str, Any]],
+    workers: Dict[int, Dict[str, Any]],
+    log: Any,
+    on_record: Optional[Callable[[Dict[str, Any]], None]],
+) -> None:
+    """Merge a finished shard into the results and append it to the checkpoint."""
+    worker = workers.setdefault(shard["pid"], {"shards": 0, "accounts": 0, "busy": 0.0, "cpu": 0.0})
+    worker["shards"] += 1
+    worker["accounts"] += len(shard["records"])
+    worker["busy"] += shard["duration"]
+    worker["cpu"] += shard["cpu"]
+
+    lines: List[bytes] = []
+    for key, record in shard["records"]:
+        completed[key] = record
+        line = json.dumps({"key": key, "record": record}, ensure_ascii=False) + "\n"
+        lines.append(line.encode("utf-8"))
+        if on_record is not None:
+            on_record(record)
+    if log is not None:
+        log.writelines(lines)
+        log.flush()
+        os.fsync(log.fileno())
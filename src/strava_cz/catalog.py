@@ -0,0 +1,114 @@
+"""Meal catalogs shared by the menus of all accounts of one canteen
+
+Accounts of the same canteen receive the same meals, differing only in
+the order state. A MealCatalog keeps one parsed meal dictionary per meal
+and order state ("ordered" False and True), and every Menu of the canteen
+references these shared dictionaries instead of parsing its own copies.
+Per account, a menu then holds only its day lists.
+
+Clients take their catalog from a registry keyed by server and canteen
+number, shared by all clients of the process by default:
+
+    catalogs = MealCatalogRegistry()
+    client = StravaCZ(username, password, canteen, meal_catalogs=catalogs)
+    catalogs.stats()  # {("https://app.strava.cz", "1234"): {"meals": ..., ...}}
+
+Meal dictionaries returned by a menu are shared between accounts and must
+not be mutated.
+"""
+
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Parsed meal (not ordered, ordered) or None for rows skipped by the parser
+Variants = Optional[Tuple[Dict[str, Any], Dict[str, Any]]]
+
+
+class MealCatalog:
+    """Parsed meals of one canteen keyed by the raw row fields they depend on."""
+
+    def __init__(self, max_meals: int = 20000):
+        """Initialize catalog.
+
+        Args:
+            max_meals: Number of entries after which the catalog is cleared
+                (old menus are not kept forever)
+        """
+        self.max_meals = max_meals
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Tuple[Any, ...], Variants]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[Tuple[Any, ...], Variants]]:
+        """Return (fingerprint, variants) stored for key, or None."""
+        return self._entries.get(key)
+
+    def put(self, key: Hashable, fingerprint: Tuple[Any, ...], variants: Variants) -> None:
+        """Store parsed variants of a row with the fingerprint of its raw fields."""
+        with self._lock:
+            if len(self._entries) >= self.max_meals:
+                self._entries.clear()
+            self._entries[key] = (fingerprint, variants)
+
+    def record(self, hits: int, misses: int) -> None:
+        """Add lookup counts of one parse."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> Dict[str, Any]:
+        """Return number of entries, hits, misses and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "meals": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MealCatalogRegistry:
+    """Thread safe collection of meal catalogs created on first use per canteen."""
+
+    def __init__(self, max_meals: int = 20000):
+        """Initialize registry.
+
+        Args:
+            max_meals: Size limit of every catalog (see MealCatalog)
+        """
+        self.max_meals = max_meals
+        self._lock = threading.Lock()
+        self._catalogs: Dict[Hashable, MealCatalog] = {}
+
+    def get(self, key: Hashable) -> MealCatalog:
+        """Return the catalog for key, creating it when needed."""
+        with self._lock:
+            catalog = self._catalogs.get(key)
+            if catalog is None:
+                catalog = self._catalogs[key] = MealCatalog(self.max_meals)
+            return catalog
+
+    def stats(self) -> Dict[Hashable, Dict[str, Any]]:
+        """Return stats of all catalogs by key."""
+        with self._lock:
+            catalogs = dict(self._catalogs)
+        return {key: catalog.stats() for key, catalog in catalogs.items()}
+
+    def clear(self) -> None:
+        """Drop all catalogs."""
+        with self._lock:
+            self._catalogs.clear()
+
+
+# Registry shared by all clients that do not get their own
+default_registry = MealCatalogRegistry()
@@ -0,0 +1,194 @@
+"""Circuit breakers failing fast while a Strava.cz backend is down
+
+Every StravaCZ client takes its breaker from a registry keyed by the
+server and the canteen backend (s5url), so all clients of a process
+talking to the same backend share one breaker:
+
+    registry = CircuitBreakerRegistry(failure_threshold=5, reset_timeout=30)
+    client = StravaCZ(username, password, canteen, circuit_breakers=registry)
+    registry.states()  # {("https://app.strava.cz", "https://..."): "closed"}
+
+A breaker is "closed" while requests succeed. After failure_threshold
+consecutive failures (network errors, transport timeouts and HTTP 502,
+503 and 504, not errors of single requests such as HTTP 555 or requests
+cut short by the caller's own deadline) it opens and requests
+fail immediately with CircuitOpenError. After reset_timeout seconds it
+becomes "half_open" and lets half_open_max_calls probe requests through;
+a successful probe closes it, a failed one opens it again.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure counter of one backend switching between closed, open and half-open."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures opening the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_max_calls: Concurrent probe requests in half-open state
+            clock: Function returning monotonic time in seconds (for testing)
+
+        Raises:
+            ValueError: If a limit is not positive
+        """
+        if failure_threshold < 1 or half_open_max_calls < 1 or reset_timeout < 0:
+            raise ValueError("Circuit breaker limits must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state - "closed", "open" or "half_open"."""
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 when not open)."""
+        with self._lock:
+            self._update_state()
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - self.clock())
+
+    def _update_state(self) -> None:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def allow(self) -> bool:
+        """Reserve a request slot.
+
+        Returns:
+            True if the request may be sent. Every allowed request must be
+            followed by record_success(), record_failure() or release().
+        """
+        with self._lock:
+            self._update_state()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self) -> None:
+        """Free a slot reserved by allow() without recording an outcome.
+
+        Used for requests whose result says nothing about the backend (e.g.
+        cut short by the caller's deadline).
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        """Record a successful request, closing a half-open circuit."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit when the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probes = 0
+
+    def reset(self) -> None:
+        """Close the circuit and forget failures."""
+        self.record_success()
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker(state={self.state!r}, failures={self._failures})"
+
+
+class CircuitBreakerRegistry:
+    """Thread safe collection of circuit breakers created on first use per key."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize registry.
+
+        Args:
+            failure_threshold: Consecutive failures opening a circuit
+            reset_timeout: Seconds a circuit stays open before probing
+            half_open_max_calls: Concurrent probe requests in half-open state
+            clock: Function returning monotonic time in seconds (for testing)
+        """
+        # Validate the settings now rather than on first use
+        CircuitBreaker(failure_threshold, reset_timeout, half_open_max_calls, clock)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._breakers: Dict[Hashable, CircuitBreaker] = {}
+
+    def get(self, key: Hashable) -> CircuitBreaker:
+        """Return the breaker for key, creating it when needed."""
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    self.failure_threshold,
+                    self.reset_timeout,
+                    self.half_open_max_calls,
+                    self.clock,
+                )
+                self._breakers[key] = breaker
+            return breaker
+
+    def states(self) -> Dict[Hashable, str]:
+        """Return states of all breakers by key."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.state for key, breaker in breakers.items()}
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Close the breaker for key, or all breakers when key is None."""
+        with self._lock:
+            if key is None:
+                breakers = list(self._breakers.values())
+            else:
+                breakers = [self._breakers[key]] if key in self._breakers else []
+        for breaker in breakers:
+            breaker.reset()
+
+
+# Registry shared by all clients that do not get their own
+default_registry = CircuitBreakerRegistry()
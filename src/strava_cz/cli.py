@@ -0,0 +1,292 @@
+"""Command line interface for Strava.cz
+
+Usage examples:
+
+    strava-cz -u jmeno -p heslo -c 1234 menu
+    strava-cz order 12 15 --check-balance
+    strava-cz --accounts accounts.jsonl --workers 16 balance
+    strava-cz --accounts accounts.jsonl --processes 8 --checkpoint run.ndjson order 12
+
+Credentials default to STRAVA_USERNAME, STRAVA_PASSWORD and
+STRAVA_CANTEEN_NUMBER environment variables. In batch mode (--accounts)
+every line of the file is a JSON object with "username", "password" and
+"canteen_number" keys (optionally "meal_ids" overriding the command
+arguments) and one NDJSON result line is printed per account (and per
+invalid line, with "line" instead of "account"). With
+--processes or --checkpoint the accounts are sharded across worker
+processes (see strava_cz.batch), every worker reusing its logged in
+clients, and an interrupted run resumes from the checkpoint. --sessions
+keeps the login sessions in a file for the next run.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from .batch import pooled_client, run_batch
+from .main import MealType, OrderType, StravaCZ
+
+
+def _meal_to_json(meal: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert meal dictionary to a JSON serializable dictionary."""
+    meal = dict(meal, type=meal["type"].name, orderType=meal["orderType"].name)
+    meal.pop("dateObj", None)  # Same as "date"
+    return meal
+
+
+def _run_command(client: StravaCZ, args: argparse.Namespace, meal_ids: List[int]) -> Any:
+    """Run a subcommand for one logged in client and return its result."""
+    if args.command == "balance":
+        return {"balance": float(client.user.balance), "currency": client.user.currency}
+
+    client.menu.fetch()
+    if args.command == "menu":
+        order_types = list(OrderType) if args.all else None
+        meal_types = [MealType.MAIN] if args.main_only else None
+        return [
+            {
+                "date": day["date"],
+                "ordered": day["ordered"],
+                "meals": [_meal_to_json(meal) for meal in day["meals"]],
+            }
+            for day in client.menu.get_days(meal_types=meal_types, order_types=order_types)
+        ]
+    if args.command == "order":
+        client.menu.order_meals(
+            *meal_ids,
+            continue_on_error=args.continue_on_error,
+            check_balance=args.check_balance,
+        )
+    elif args.command == "cancel":
+        client.menu.cancel_meals(*meal_ids, continue_on_error=args.continue_on_error)
+    return {
+        "ordered": [meal["id"] for meal in client.menu.get_meals(ordered=True)],
+        "balance": float(client.user.balance),
+    }
+
+
+def process_account(
+    account: Dict[str, Any], args: argparse.Namespace, pooled: bool = False
+) -> Dict[str, Any]:
+    """Log in one account, run the subcommand and log out.
+
+    Args:
+        account: Dictionary with username, password, canteen_number and
+            optional meal_ids
+        args: Parsed command line arguments
+        pooled: Use the client pool of the process (see
+            strava_cz.batch.pooled_client) and keep the client logged in
+
+    Returns:
+        JSON serializable result record (any exception is reported in the record)
+    """
+    record: Dict[str, Any] = {
+        "account": account.get("username"),
+        "canteen_number": account.get("canteen_number"),
+        "command": args.command,
+    }
+    client = None
+    try:
+        meal_ids = [int(meal_id) for meal_id in account.get("meal_ids", getattr(args, "ids", []))]
+        if not all(account.get(key) for key in ("username", "password", "canteen_number")):
+            raise ValueError("Username, password and canteen number are required")
+        if pooled:
+            record["result"] = _run_command(pooled_client(account), args, meal_ids)
+        else:
+            client = StravaCZ(
+                username=account.get("username"),
+                password=account.get("password"),
+                canteen_number=account.get("canteen_number"),
+            )
+            record["result"] = _run_command(client, args, meal_ids)
+        record["ok"] = True
+    except Exception as e:  # One failing account must not abort a batch
+        record["ok"] = False
+        record["error"] = str(e)
+        record["error_type"] = type(e).__name__
+    finally:
+        if client is not None:
+            try:
+                client.logout()
+            except Exception:
+                pass  # The result of the command is what matters
+    return record
+
+
+def _read_accounts(stream: TextIO) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """Read accounts from a JSON lines stream (blank lines and # comments are skipped).
+
+    Returns:
+        Tuple (accounts, [(line number, error message), ...] of invalid lines)
+    """
+    accounts: List[Dict[str, Any]] = []
+    invalid: List[Tuple[int, str]] = []
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            account = json.loads(line)
+        except ValueError as e:
+            invalid.append((number, f"Invalid JSON on line {number}: {e}"))
+            continue
+        if not isinstance(account, dict):
+            invalid.append((number, f"Line {number} is not a JSON object"))
+            continue
+        accounts.append(account)
+    return accounts, invalid
+
+
+def _print_human(record: Dict[str, Any], out: TextIO) -> None:
+    """Print result of a single account in human readable form."""
+    if not record["ok"]:
+        print(f"Error ({record['error_type']}): {record['error']}", file=out)
+        return
+    result = record["result"]
+    if record["command"] == "menu":
+        for day in result:
+            print(f"{day['date']}:", file=out)
+            for meal in day["meals"]:
+                status = "Ordered" if meal["ordered"] else "Not ordered"
+                print(
+                    f"  - {meal['id']} {meal['name']} ({meal['price']:.2f}) - [{status}]", file=out
+                )
+            print(file=out)
+    elif record["command"] == "balance":
+        print(f"{result['balance']:.2f} {result['currency']}", file=out)
+    else:
+        print(f"Ordered meals: {result['ordered']}, balance: {result['balance']:.2f}", file=out)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="strava-cz", description="Command line client for Strava.cz canteens"
+    )
+    parser.add_argument("-u", "--username", default=os.getenv("STRAVA_USERNAME"))
+    parser.add_argument("-p", "--password", default=os.getenv("STRAVA_PASSWORD"))
+    parser.add_argument("-c", "--canteen", default=os.getenv("STRAVA_CANTEEN_NUMBER"))
+    parser.add_argument(
+        "--accounts",
+        metavar="FILE",
+        help="batch mode: JSON lines file with accounts ('-' = stdin), prints NDJSON",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="accounts processed in parallel (batch mode)"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="batch mode: worker processes, each running --workers threads",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="batch mode: record completed accounts and skip them when resumed",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="batch mode: run accounts failed in the checkpoint again",
+    )
+    parser.add_argument(
+        "--sessions",
+        metavar="FILE",
+        help="batch mode: SQLite file keeping login sessions of worker processes between runs",
+    )
+    parser.add_argument("--json", action="store_true", help="print NDJSON also for one account")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    menu = subparsers.add_parser("menu", help="print menu")
+    menu.add_argument("--all", action="store_true", help="include restricted and optional days")
+    menu.add_argument("--main-only", action="store_true", help="only main dishes")
+
+    order = subparsers.add_parser("order", help="order meals by ID")
+    order.add_argument("ids", nargs="*", type=int)
+    order.add_argument("--continue-on-error", action="store_true")
+    order.add_argument("--check-balance", action="store_true")
+
+    cancel = subparsers.add_parser("cancel", help="cancel meals by ID")
+    cancel.add_argument("ids", nargs="*", type=int)
+    cancel.add_argument("--continue-on-error", action="store_true")
+
+    subparsers.add_parser("balance", help="print account balance")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, out: Optional[TextIO] = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv: Command line arguments (None = sys.argv[1:])
+        out: Output stream (None = sys.stdout)
+
+    Returns:
+        Exit code - 0 if all accounts succeeded, 1 otherwise
+    """
+    out = out or sys.stdout
+    args = build_parser().parse_args(argv)
+
+    if args.accounts is None:
+        account = {
+            "username": args.username,
+            "password": args.password,
+            "canteen_number": args.canteen,
+        }
+        record = process_account(account, args)
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False), file=out)
+        else:
+            _print_human(record, out)
+        return 0 if record["ok"] else 1
+
+    if args.accounts == "-":
+        accounts, invalid = _read_accounts(sys.stdin)
+    else:
+        with open(args.accounts, encoding="utf-8") as f:
+            accounts, invalid = _read_accounts(f)
+
+    # Invalid lines are reported like failed accounts, the valid ones still run
+    for line, error in invalid:
+        record = {
+            "account": None,
+            "line": line,
+            "command": args.command,
+            "ok": False,
+            "error": error,
+            "error_type": "ValueError",
+        }
+        print(json.dumps(record, ensure_ascii=False), file=out, flush=True)
+
+    if args.processes is not None or args.checkpoint is not None or args.sessions is not None:
+        report = run_batch(
+            accounts,
+            functools.partial(process_account, args=args, pooled=True),
+            processes=args.processes,
+            threads=args.workers,
+            checkpoint=args.checkpoint,
+            retry_failed=args.retry_failed,
+            sessions=args.sessions,
+            on_record=lambda record: print(
+                json.dumps(record, ensure_ascii=False), file=out, flush=True
+            ),
+        )
+        return 0 if report["failed"] == 0 and not invalid else 1
+
+    failed = len(invalid)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(process_account, account, args) for account in accounts]
+        for future in as_completed(futures):
+            record = future.result()
+            failed += not record["ok"]
+            print(json.dumps(record, ensure_ascii=False), file=out, flush=True)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
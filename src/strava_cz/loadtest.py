@@ -0,0 +1,284 @@
+"""Load test driving many simulated users through StravaCZ
+
+Usage examples:
+
+    python -m strava_cz.loadtest --users 200 --concurrency 32
+    python -m strava_cz.loadtest --users 500 --latency 0.05 --json
+    python -m strava_cz.loadtest --url http://staging:8080 --accounts accounts.jsonl
+
+Without --url a local MockStravaServer is started and populated with
+--users accounts. Every simulated user logs in, fetches the menu, orders
+meals, verifies the orders and logs out. The report contains throughput,
+latency percentiles per phase and the error rate. --max-error-rate and
+--max-p95 make the exit code fail on regressions.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, TextIO
+
+import requests
+
+from .cli import _read_accounts
+from .main import MealType, StravaAPIError, StravaCZ
+from .mock_server import MockStravaServer
+
+PHASES = ("login", "fetch", "order", "verify", "logout")
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Return the q-th percentile (0-100) of values using the nearest-rank method."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def simulate_user(
+    account: Dict[str, Any], base_url: Optional[str] = None, orders: int = 1, cancel: bool = False
+) -> Dict[str, Any]:
+    """Run one user session and measure its phases.
+
+    Args:
+        account: Dictionary with username, password and canteen_number
+        base_url: Server to test (None = production Strava.cz)
+        orders: Number of days to order the first available main dish for
+        cancel: Cancel the placed orders before logging out (keeps the
+            accounts reusable between runs)
+
+    Returns:
+        Record {"account", "ok", "error", "error_type", "phases", "total"}
+        where phases maps phase names to durations in seconds
+    """
+    record: Dict[str, Any] = {
+        "account": account.get("username"),
+        "ok": False,
+        "error": None,
+        "error_type": None,
+        "phases": {},
+    }
+    phases = record["phases"]
+    started = time.perf_counter()
+    client = None
+
+    def timed(phase: str, function: Any, *args: Any, **kwargs: Any) -> Any:
+        phase_started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - phase_started
+
+    try:
+        client = timed(
+            "login",
+            StravaCZ,
+            username=account.get("username"),
+            password=account.get("password"),
+            canteen_number=account.get("canteen_number"),
+            base_url=base_url,
+        )
+        timed("fetch", client.menu.fetch)
+
+        meal_ids = []
+        for day in client.menu.get_days(meal_types=[MealType.MAIN])[:orders]:
+            if not day["ordered"]:
+                meal_ids.append(day["meals"][0]["id"])
+        if meal_ids:
+            timed("order", client.menu.order_meals, *meal_ids)
+
+        timed("verify", client.menu.fetch)  # Independent of order_meals() verification
+        missing = [meal_id for meal_id in meal_ids if not client.menu.is_ordered(meal_id)]
+        if missing:
+            raise StravaAPIError(f"Meals not ordered after verification: {missing}")
+
+        if cancel and meal_ids:
+            timed("cancel", client.menu.cancel_meals, *meal_ids)
+        record["ok"] = True
+    except (StravaAPIError, ValueError, requests.RequestException) as e:
+        record["error"] = str(e)
+        record["error_type"] = type(e).__name__
+    finally:
+        if client is not None:
+            try:
+                timed("logout", client.logout)
+            except (StravaAPIError, requests.RequestException):
+                pass  # Failures of the session itself are what matters
+    record["total"] = time.perf_counter() - started
+    return record
+
+
+def run_load_test(
+    accounts: Sequence[Dict[str, Any]],
+    base_url: Optional[str] = None,
+    concurrency: int = 16,
+    orders: int = 1,
+    cancel: bool = False,
+) -> Dict[str, Any]:
+    """Run all user sessions with the given concurrency and summarize them.
+
+    Args:
+        accounts: Accounts to simulate (one session each)
+        base_url: Server to test (None = production Strava.cz)
+        concurrency: Number of sessions running at the same time
+        orders: Number of days each user orders
+        cancel: Cancel the placed orders before logging out
+
+    Returns:
+        Report dictionary (see summarize())
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        records = list(
+            executor.map(lambda account: simulate_user(account, base_url, orders, cancel), accounts)
+        )
+    report = summarize(records, time.perf_counter() - started)
+    report["concurrency"] = concurrency
+    return report
+
+
+def summarize(records: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """Summarize session records.
+
+    Args:
+        records: Records returned by simulate_user()
+        duration: Wall clock duration of the test in seconds
+
+    Returns:
+        Dictionary with user counts, error rate, throughput (sessions per
+        second), p50/p95/p99/max latency of sessions and of every phase in
+        seconds and error counts by type
+    """
+    failed = [record for record in records if not record["ok"]]
+
+    def stats(values: List[float]) -> Dict[str, Optional[float]]:
+        return {
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values) if values else None,
+        }
+
+    phase_names = list(PHASES) + sorted(
+        {phase for record in records for phase in record["phases"]} - set(PHASES)
+    )
+    return {
+        "users": len(records),
+        "succeeded": len(records) - len(failed),
+        "failed": len(failed),
+        "error_rate": len(failed) / len(records) if records else 0.0,
+        "duration": duration,
+        "throughput": len(records) / duration if duration > 0 else None,
+        "latency": stats([record["total"] for record in records]),
+        "phases": {
+            phase: stats([r["phases"][phase] for r in records if phase in r["phases"]])
+            for phase in phase_names
+        },
+        "errors": dict(Counter(record["error_type"] for record in failed)),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format report as human readable text."""
+
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value * 1000:.1f}"
+
+    lines = [
+        f"Users: {report['users']} (concurrency {report.get('concurrency', '-')}), "
+        f"succeeded: {report['succeeded']}, failed: {report['failed']} "
+        f"({report['error_rate']:.2%})",
+        f"Duration: {report['duration']:.2f} s, "
+        f"throughput: {report['throughput'] or 0:.1f} sessions/s",
+        f"{'phase':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    rows = list(report["phases"].items()) + [("session", report["latency"])]
+    for phase, stats in rows:
+        lines.append(
+            f"{phase:<10}{ms(stats['p50']):>10}{ms(stats['p95']):>10}"
+            f"{ms(stats['p99']):>10}{ms(stats['max']):>10}"
+        )
+    for error_type, count in report["errors"].items():
+        lines.append(f"Errors {error_type}: {count}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m strava_cz.loadtest", description="Load test of StravaCZ sessions"
+    )
+    parser.add_argument("--url", help="server to test (default: start a local mock server)")
+    parser.add_argument(
+        "--accounts", metavar="FILE", help="JSON lines file with accounts (required with --url)"
+    )
+    parser.add_argument("--users", type=int, default=100, help="simulated users (mock server)")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel sessions")
+    parser.add_argument("--orders", type=int, default=1, help="days ordered per user")
+    parser.add_argument("--cancel", action="store_true", help="cancel orders before logout")
+    parser.add_argument("--days", type=int, default=5, help="menu days (mock server)")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency (mock server)")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="injected error rate (mock server)"
+    )
+    parser.add_argument("--max-error-rate", type=float, help="fail if error rate is higher")
+    parser.add_argument("--max-p95", type=float, help="fail if session p95 (seconds) is higher")
+    parser.add_argument("--json", action="store_true", help="print report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, out: Optional[TextIO] = None) -> int:
+    """Run the load test from the command line.
+
+    Args:
+        argv: Command line arguments (None = sys.argv[1:])
+        out: Output stream (None = sys.stdout)
+
+    Returns:
+        Exit code - 1 if a --max-* threshold was exceeded, 0 otherwise
+    """
+    out = out or sys.stdout
+    args = build_parser().parse_args(argv)
+
+    server = None
+    if args.url is None:
+        server = MockStravaServer(latency=args.latency, failure_rate=args.failure_rate)
+        accounts = []
+        for i in range(args.users):
+            account = {"username": f"user{i}", "password": "heslo", "canteen_number": "1234"}
+            server.add_account(account["username"], "heslo", "1234", balance=1000)
+            accounts.append(account)
+        server.generate_menu("1234", days=args.days)
+        base_url = server.start().url
+    else:
+        if args.accounts is None:
+            build_parser().error("--accounts is required with --url")
+        with open(args.accounts, encoding="utf-8") as f:
+            accounts, invalid = _read_accounts(f)
+        if invalid:
+            build_parser().error(invalid[0][1])
+        base_url = args.url
+
+    try:
+        report = run_load_test(accounts, base_url, args.concurrency, args.orders, args.cancel)
+    finally:
+        if server is not None:
+            server.stop()
+
+    if args.json:
+        print(json.dumps(report), file=out)
+    else:
+        print(format_report(report), file=out)
+
+    failed = args.max_error_rate is not None and report["error_rate"] > args.max_error_rate
+    p95 = report["latency"]["p95"]
+    failed |= args.max_p95 is not None and p95 is not None and p95 > args.max_p95
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
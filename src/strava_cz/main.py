@@ -2,9 +2,39 @@
 
 # Komentare v tomto kodu byly doplnene pomoci LLM
 
-from typing import Dict, List, Optional, Any
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Any,
+    Tuple,
+    Union,
+)
+from contextlib import contextmanager
+from datetime import date as date_cls, datetime
 from enum import Enum
+from functools import lru_cache
+from operator import itemgetter
+import json
+import sys
+import threading
+import time
+import warnings
+import zlib
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
+
+from . import catalog as _catalog
+from .catalog import MealCatalog, MealCatalogRegistry
+from .circuit import CircuitBreaker, CircuitBreakerRegistry, default_registry
+
+if TYPE_CHECKING:
+    import pyarrow
 
 
 class MealType(Enum):
@@ -23,6 +53,15 @@ class OrderType(Enum):
     OPTIONAL = "Volitelne"  # "T" - not usually ordered but can be
 
 
+# Event types passed to callbacks registered with StravaCZ.add_callback()
+ORDER_PLACED = "order_placed"
+ORDER_CANCELLED = "order_cancelled"
+VERIFICATION_FAILED = "verification_failed"
+BALANCE_UPDATED = "balance_updated"
+MENU_REFRESHED = "menu_refreshed"
+EVENTS = (ORDER_PLACED, ORDER_CANCELLED, VERIFICATION_FAILED, BALANCE_UPDATED, MENU_REFRESHED)
+
+
 class StravaAPIError(Exception):
     """Custom exception for Strava API errors."""
 
@@ -53,6 +92,42 @@ class InvalidMealTypeError(StravaAPIError):
     pass
 
 
+class DeadlineExceededError(StravaAPIError):
+    """Raised when an operation does not finish within its timeout."""
+
+    pass
+
+
+class SessionExpiredError(AuthenticationError):
+    """Raised when the session expired during a request that cannot be repeated.
+
+    The client is already logged in again, so the operation can be retried.
+    """
+
+    pass
+
+
+class SaveTimeoutError(DeadlineExceededError):
+    """Raised when the deadline passes while order changes are being saved.
+
+    The server may have saved the changes before the request was cut short.
+    saved tells what the re-fetched menu shows: True (saved), False (not
+    saved, rolled back) or None (unknown, the menu could not be re-fetched).
+    """
+
+    def __init__(self, message: str, saved: Optional[bool] = None):
+        super().__init__(message)
+        self.saved = saved
+
+
+class CircuitOpenError(StravaAPIError):
+    """Raised without sending the request while the backend circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class User:
     """User data container"""
 
@@ -79,29 +154,260 @@ class User:
         )
 
 
+class OrderPlan:
+    """Order and cancel changes planned for one account."""
+
+    def __init__(
+        self,
+        order: Optional[List[int]] = None,
+        cancel: Optional[List[int]] = None,
+        account: Optional[Hashable] = None,
+    ):
+        """Initialize plan.
+
+        Args:
+            order: Meal IDs to order
+            cancel: Meal IDs to cancel
+            account: Optional key identifying the account the plan belongs to
+        """
+        self.order: List[int] = list(order or [])
+        self.cancel: List[int] = list(cancel or [])
+        self.account = account
+
+    def is_empty(self) -> bool:
+        """Return True if the plan contains no changes."""
+        return not self.order and not self.cancel
+
+    def __eq__(self, other: object) -> bool:
+        """Compare plans by their changes."""
+        if not isinstance(other, OrderPlan):
+            return NotImplemented
+        return self.order == other.order and self.cancel == other.cancel
+
+    def __repr__(self) -> str:
+        """Return representation of plan."""
+        return f"OrderPlan(account={self.account!r}, order={self.order}, cancel={self.cancel})"
+
+
+# Allergen lists shared by all parsed menus (many accounts of one canteen
+# receive the same lists); cleared when it grows past the limit
+_ALLERGEN_TABLE_LIMIT = 4096
+_allergen_table: Dict[Tuple[Tuple[Any, ...], ...], List[List[Any]]] = {}
+
+
+def _intern(value: Any) -> Any:
+    """Intern string values so repeated strings share one object across menus."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _shared_allergens(allergens: Any) -> Any:
+    """Return a shared copy of an allergen list ([[code, name], ...]).
+
+    The returned list is shared between meals and menus and must not be mutated.
+    """
+    if not isinstance(allergens, list):
+        return allergens
+    try:
+        key = tuple(tuple(allergen) for allergen in allergens)
+        shared = _allergen_table.get(key)
+    except TypeError:
+        return allergens  # Unexpected (unhashable) structure - keep as is
+    if shared is None:
+        if len(_allergen_table) >= _ALLERGEN_TABLE_LIMIT:
+            _allergen_table.clear()
+        shared = [[_intern(item) for item in allergen] for allergen in key]
+        shared = _allergen_table.setdefault(key, shared)
+    return shared
+
+
+@lru_cache(maxsize=4096)
+def _parse_datum(datum: str) -> Tuple[str, date_cls]:
+    """Convert Strava date ("dd-mm.yyyy") to an interned YYYY-MM-DD string and a date."""
+    date = _intern(f"{datum[6:10]}-{datum[3:5]}-{datum[0:2]}")
+    return date, date_cls(int(datum[6:10]), int(datum[3:5]), int(datum[0:2]))
+
+
+def _meal_type(meal_type_str: str) -> MealType:
+    """Convert Strava meal type ("druh_popis") to MealType."""
+    if meal_type_str == "Polévka":
+        return MealType.SOUP
+    if "Oběd" in meal_type_str:
+        return MealType.MAIN
+    return MealType.UNKNOWN
+
+
+def _deadline(timeout: Optional[float]) -> Optional[float]:
+    """Convert a timeout in seconds to a time.monotonic() deadline (None = no deadline)."""
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """Return seconds left until deadline (None = no deadline).
+
+    Raises:
+        DeadlineExceededError: If the deadline has passed
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError("Deadline exceeded")
+    return remaining
+
+
+@contextmanager
+def _locked(lock: Any, deadline: Optional[float]) -> Iterator[None]:
+    """Hold lock, waiting for it at most until deadline (None = no limit).
+
+    Raises:
+        DeadlineExceededError: If the lock is not acquired before the deadline
+    """
+    timeout = _remaining(deadline)
+    if not lock.acquire(timeout=-1 if timeout is None else timeout):
+        raise DeadlineExceededError(
+            "Deadline exceeded while waiting for another transaction of the account"
+        )
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _import_pyarrow() -> Any:
+    """Import optional pyarrow dependency."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required for Arrow/Parquet export, install it with "
+            "'pip install strava-cz[arrow]'"
+        ) from None
+    return pyarrow
+
+
+def _arrow_schema(pa: Any) -> Any:
+    """Return Arrow schema of exported meals."""
+    allergen = pa.struct([("code", pa.string()), ("name", pa.string())])
+    return pa.schema(
+        [
+            ("date", pa.date32()),
+            ("id", pa.int64()),
+            ("name", pa.string()),
+            ("price", pa.float64()),
+            ("type", pa.dictionary(pa.int8(), pa.string())),
+            ("order_type", pa.dictionary(pa.int8(), pa.string())),
+            ("ordered", pa.bool_()),
+            ("allergens", pa.list_(allergen)),
+            ("forbidden_allergens", pa.string()),
+            ("order_deadline", pa.timestamp("s")),
+        ]
+    )
+
+
 class Menu:
     """Menu data container and processor"""
 
-    def __init__(self, strava_client: "StravaCZ"):
+    # Retention modes of the raw objednavky response
+    RAW_DATA_MODES = ("off", "keep", "compressed")
+    # Seconds allowed for rolling back unsaved changes after a transaction timed out
+    ROLLBACK_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        strava_client: "StravaCZ",
+        raw_data_mode: str = "keep",
+        catalog: Optional[MealCatalog] = None,
+    ):
         """Initialize Menu with reference to StravaCZ client.
 
         Args:
             strava_client: Reference to the parent StravaCZ instance
+            raw_data_mode: How to retain the raw API response in raw_data -
+                "keep" (as decoded), "compressed" (zlib compressed JSON, decoded
+                on access) or "off" (not retained, raw_data is empty)
+            catalog: Shared catalog of parsed meals (None = catalog of the
+                client's canteen, see StravaCZ.meal_catalog)
+
+        Raises:
+            ValueError: If raw_data_mode is not supported
         """
+        if raw_data_mode not in self.RAW_DATA_MODES:
+            raise ValueError(
+                f"Unsupported raw_data_mode {raw_data_mode!r}, "
+                f"expected one of {', '.join(self.RAW_DATA_MODES)}"
+            )
         self.strava = strava_client
-        self.raw_data: Dict[str, Any] = {}
-        self._all_meals: List[Dict[str, Any]] = []  # Internal storage for all meals
+        self.raw_data_mode = raw_data_mode
+        self.catalog = catalog
+        self._raw_data: Union[Dict[str, Any], bytes] = {}
+        # Internal storage for all meals. The list is never mutated in place, fetch()
+        # builds a new one and swaps the reference, so readers always see a consistent
+        # snapshot without locking.
+        self._all_meals: List[Dict[str, Any]] = []
+        # Lookup indexes (meals by ID, days by date) of the current _all_meals list,
+        # rebuilt lazily whenever the list is swapped
+        self._indexes: Optional[Tuple[List[Dict[str, Any]], Dict[int, Any], Dict[Any, Any]]] = None
+        # Parse-time filters of the last fetch(), reused by internal refreshes
+        self._fetch_filters: Dict[str, Any] = {}
+        # Phase durations and counts of the last successful fetch()
+        self.fetch_stats: Dict[str, Any] = {}
+
+    @property
+    def raw_data(self) -> Dict[str, Any]:
+        """Raw response of the last fetch (empty if raw_data_mode is "off")."""
+        raw = self._raw_data
+        if isinstance(raw, bytes):
+            return json.loads(zlib.decompress(raw))
+        return raw
+
+    @raw_data.setter
+    def raw_data(self, value: Dict[str, Any]) -> None:
+        if self.raw_data_mode == "off":
+            self._raw_data = {}
+        elif self.raw_data_mode == "compressed" and value:
+            self._raw_data = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        else:
+            self._raw_data = value
 
-    def fetch(self) -> "Menu":
+    def fetch(
+        self,
+        date_from: Optional[Union[str, date_cls]] = None,
+        date_to: Optional[Union[str, date_cls]] = None,
+        meal_types: Optional[List[MealType]] = None,
+        timeout: Optional[float] = None,
+    ) -> "Menu":
         """Fetch menu data from API and process it into various lists.
 
+        Filters are applied while parsing, so skipped meals are never converted.
+        Meals outside the filters are not available in the menu at all (not even
+        through get_by_id()). The filters are remembered and reused when the menu
+        is refreshed after ordering or canceling.
+
+        Durations of the phases are stored in fetch_stats (in seconds):
+        "request" (sending the request and downloading the response body),
+        "decode" (JSON decoding), "parse" (_parse_menu_data), "index" (building
+        the lookup indexes) and "total", together with the counts "tables",
+        "rows" (meals in the response), "meals" (meals kept) and "days".
+
+        Args:
+            date_from: First date to keep (YYYY-MM-DD string or date, None = no limit)
+            date_to: Last date to keep (YYYY-MM-DD string or date, None = no limit)
+            meal_types: Meal types to keep (None = all types)
+            timeout: Time limit in seconds including waiting for other
+                transactions of the account (None = no limit)
+
         Returns:
             Self for method chaining
 
         Raises:
             AuthenticationError: If user is not logged in
+            ValueError: If a date is invalid or date_from is after date_to
+            DeadlineExceededError: If the menu is not fetched within timeout
             StravaAPIError: If menu retrieval fails
         """
+        deadline = _deadline(timeout)
+        filters = self._normalize_filters(date_from, date_to, meal_types)
+
         if not self.strava.user.is_logged_in:
             raise AuthenticationError("User not logged in")
 
@@ -115,90 +421,236 @@ class Menu:
             "ignoreCert": False,
         }
 
-        response = self.strava._api_request("objednavky", payload)
+        # Serialize with order transactions of the same account
+        with _locked(self.strava._lock, deadline):
+            started = time.perf_counter()
+            response = self.strava._api_request("objednavky", payload, deadline)
 
-        if response["status_code"] != 200:
-            raise StravaAPIError("Failed to fetch menu")
+            if response["status_code"] != 200:
+                raise StravaAPIError("Failed to fetch menu")
+
+            parse_started = time.perf_counter()
+            self._parse_menu_data(response["response"], **filters)
+            index_started = time.perf_counter()
+            by_id, _ = self._get_indexes()
+            finished = time.perf_counter()
 
-        self.raw_data = response["response"]
-        self._parse_menu_data()
+            self.raw_data = response["response"]
+            self._fetch_filters = filters
+            tables = [
+                meals for key, meals in response["response"].items() if key.startswith("table")
+            ]
+            self.fetch_stats = {
+                **response["timings"],
+                "parse": index_started - parse_started,
+                "index": finished - index_started,
+                "total": finished - started,
+                "tables": len(tables),
+                "rows": sum(len(meals) for meals in tables),
+                "meals": len(by_id),
+                "days": len(self._all_meals),
+            }
+        self.strava._emit(MENU_REFRESHED, menu=self, stats=self.fetch_stats)
         return self
 
-    def _parse_menu_data(self) -> None:
-        """Parse raw menu response into internal storage."""
+    @staticmethod
+    def _normalize_filters(
+        date_from: Optional[Union[str, date_cls]],
+        date_to: Optional[Union[str, date_cls]],
+        meal_types: Optional[List[MealType]],
+    ) -> Dict[str, Any]:
+        """Validate fetch() filters and convert dates to date objects."""
+        filters: Dict[str, Any] = {}
+        for key, value in (("date_from", date_from), ("date_to", date_to)):
+            if value is None:
+                continue
+            filters[key] = date_cls.fromisoformat(value) if isinstance(value, str) else value
+        if "date_from" in filters and "date_to" in filters:
+            if filters["date_from"] > filters["date_to"]:
+                raise ValueError("date_from must not be after date_to")
+        if meal_types is not None:
+            filters["meal_types"] = list(meal_types)
+        return filters
+
+    def _parse_menu_data(
+        self,
+        raw_data: Optional[Dict[str, Any]] = None,
+        date_from: Optional[date_cls] = None,
+        date_to: Optional[date_cls] = None,
+        meal_types: Optional[List[MealType]] = None,
+    ) -> None:
+        """Parse raw menu response into internal storage.
+
+        Rows outside the filters are skipped first. Rows already parsed for
+        another account of the canteen are taken from the shared meal catalog,
+        only the order state ("pocet") is read from them. Other rows are parsed
+        and added to the catalog (unless a field of the key is unhashable).
+
+        Args:
+            raw_data: Decoded objednavky response (None = self.raw_data)
+            date_from: Skip meals before this date
+            date_to: Skip meals after this date
+            meal_types: Skip meals of other types (None = all types)
+        """
         # Single storage for all meals grouped by date
         meals_by_date: Dict[str, List[Dict]] = {}
+        catalog = self._get_catalog()
+        hits = misses = 0
 
         # Process all table entries (table0, table1, etc.)
-        for table_key, meals_list in self.raw_data.items():
+        if raw_data is None:
+            raw_data = self.raw_data
+        for table_key, meals_list in raw_data.items():
             if not table_key.startswith("table"):
                 continue
 
             for meal in meals_list:
-                # Skip empty meals
-                has_no_description = not meal["delsiPopis"] and not meal["alergeny"]
-                is_unnamed_meal = meal["nazev"] == meal["druh_popis"]
-                if has_no_description or is_unnamed_meal:
+                # Apply the date window and type filters first, so skipped rows
+                # are neither looked up nor converted
+                if date_from is not None or date_to is not None:
+                    date_obj = _parse_datum(meal["datum"])[1]
+                    if (date_from is not None and date_obj < date_from) or (
+                        date_to is not None and date_obj > date_to
+                    ):
+                        continue
+                if meal_types is not None and _meal_type(meal["druh_popis"]) not in meal_types:
                     continue
 
-                # Get restriction status
+                # Forbidden allergens and restrictions may differ between accounts,
+                # the remaining fields parsed below are checked by the fingerprint
                 restriction = meal["omezeniObj"]["den"]
-
-                # Skip "VP" (no school) completely
-                if "VP" in restriction:
-                    continue
-
-                # Parse date
-                unformated_date = meal["datum"]  # Format: "dd-mm.yyyy"
-                date = f"{unformated_date[6:10]}-{unformated_date[3:5]}-{unformated_date[0:2]}"
-
-                # Convert string type to MealType enum
-                meal_type_str = meal["druh_popis"]
-                if meal_type_str == "Polévka":
-                    meal_type = MealType.SOUP
-                elif "Oběd" in meal_type_str:
-                    meal_type = MealType.MAIN
+                key: Optional[Tuple[Any, ...]] = (
+                    meal["veta"],
+                    meal["zakazaneAlergeny"],
+                    restriction,
+                )
+                fingerprint = (
+                    meal["datum"],
+                    meal["druh_popis"],
+                    meal["nazev"],
+                    not meal["delsiPopis"],
+                    meal["alergeny"],
+                    meal["cena"],
+                    meal.get("casKonec"),
+                )
+                try:
+                    entry = catalog.get(key)
+                except TypeError:  # Unhashable raw value (e.g. a list) - parse without catalog
+                    key = entry = None
+                if entry is not None and entry[0] == fingerprint:
+                    variants = entry[1]
+                    hits += 1
                 else:
-                    meal_type = MealType.UNKNOWN
-
-                # Skip unknown types
-                if meal_type == MealType.UNKNOWN:
-                    continue
-
-                # Determine order type
-                if "CO" in restriction:
-                    order_type = OrderType.RESTRICTED
-                elif "T" in restriction:
-                    order_type = OrderType.OPTIONAL
-                else:  # Empty string - orderable
-                    order_type = OrderType.NORMAL
-
-                meal_filtered = {
-                    "type": meal_type,
-                    "orderType": order_type,
-                    "name": meal["nazev"],
-                    "forbiddenAlergens": meal["zakazaneAlergeny"],
-                    "alergens": meal["alergeny"],
-                    "ordered": meal["pocet"] == 1,
-                    "id": int(meal["veta"]),
-                    "price": float(meal["cena"]),
-                    "date": date,
-                }
+                    variants = self._parse_meal(meal, restriction)
+                    if key is not None:
+                        if variants is not None:
+                            # Keep the shared allergen list instead of the raw one
+                            fingerprint = (
+                                fingerprint[:4] + (variants[0]["alergens"],) + fingerprint[5:]
+                            )
+                        catalog.put(key, fingerprint, variants)
+                    misses += 1
+                if variants is None:
+                    continue  # Skipped for every account
+
+                meal_filtered = variants[meal["pocet"] == 1]
 
                 # Store all meals together
+                date = meal_filtered["date"]
                 if date not in meals_by_date:
                     meals_by_date[date] = []
                 meals_by_date[date].append(meal_filtered)
 
-        # Convert to day-grouped format and sort by date
-        self._all_meals = sorted(
+        catalog.record(hits, misses)
+        self._all_meals = self._build_days(meals_by_date)
+
+    @staticmethod
+    def _parse_meal(
+        meal: Dict[str, Any], restriction: str
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Parse a raw menu row.
+
+        Returns:
+            Tuple (meal not ordered, meal ordered) of parsed meal dictionaries,
+            or None if the row is not a meal (unknown type, empty, no school)
+        """
+        # Skip unknown types
+        meal_type = _meal_type(meal["druh_popis"])
+        if meal_type == MealType.UNKNOWN:
+            return None
+
+        # Skip empty meals
+        has_no_description = not meal["delsiPopis"] and not meal["alergeny"]
+        is_unnamed_meal = meal["nazev"] == meal["druh_popis"]
+        if has_no_description or is_unnamed_meal:
+            return None
+
+        # Skip "VP" (no school) completely
+        if "VP" in restriction:
+            return None
+
+        # Determine order type
+        if "CO" in restriction:
+            order_type = OrderType.RESTRICTED
+        elif "T" in restriction:
+            order_type = OrderType.OPTIONAL
+        else:  # Empty string - orderable
+            order_type = OrderType.NORMAL
+
+        date, date_obj = _parse_datum(meal["datum"])  # Format: "dd-mm.yyyy"
+        meal_filtered = {
+            "type": meal_type,
+            "orderType": order_type,
+            "name": _intern(meal["nazev"]),
+            "forbiddenAlergens": _intern(meal["zakazaneAlergeny"]),
+            "alergens": _shared_allergens(meal["alergeny"]),
+            "ordered": False,
+            "id": int(meal["veta"]),
+            "price": float(meal["cena"]),
+            "date": date,
+            "dateObj": date_obj,
+            "orderDeadline": _intern(meal.get("casKonec") or None),
+        }
+        return meal_filtered, dict(meal_filtered, ordered=True)
+
+    def _get_catalog(self) -> MealCatalog:
+        """Return the catalog used by the parser."""
+        if self.catalog is not None:
+            return self.catalog
+        if self.strava is not None:
+            return self.strava.meal_catalog
+        return MealCatalog()  # Standalone menu - nothing to share with
+
+    @staticmethod
+    def _build_days(meals_by_date: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Convert meals grouped by date to the day-grouped format sorted by date."""
+        return sorted(
             [
-                {"date": date, "ordered": any(m["ordered"] for m in meals), "meals": meals}
+                {
+                    "date": date,
+                    "dateObj": meals[0]["dateObj"],
+                    "ordered": any(m["ordered"] for m in meals),
+                    "meals": meals,
+                }
                 for date, meals in meals_by_date.items()
             ],
-            key=lambda x: x["date"],
+            key=itemgetter("dateObj"),
         )
 
+    def _get_indexes(self) -> Tuple[Dict[int, Dict[str, Any]], Dict[Any, Dict[str, Any]]]:
+        """Return (meals by ID, days by date string and date) of the current menu."""
+        all_meals = self._all_meals
+        indexes = self._indexes
+        if indexes is None or indexes[0] is not all_meals:
+            by_id = {meal["id"]: meal for day in all_meals for meal in day["meals"]}
+            by_date: Dict[Any, Dict[str, Any]] = {}
+            for day in all_meals:
+                by_date[day["date"]] = day
+                by_date[day["dateObj"]] = day
+            indexes = (all_meals, by_id, by_date)
+            self._indexes = indexes  # Single reference swap, safe for concurrent readers
+        return indexes[1], indexes[2]
+
     def get_days(
         self,
         meal_types: Optional[List[MealType]] = None,
@@ -216,7 +668,7 @@ class Menu:
 
         Returns:
             List of days with meals:
-                [{"date": "YYYY-MM-DD", "ordered": bool, "meals": [...]}]
+                [{"date": "YYYY-MM-DD", "dateObj": date, "ordered": bool, "meals": [...]}]
         """
         # Default to NORMAL order type only
         if order_types is None:
@@ -246,7 +698,12 @@ class Menu:
                     continue
 
             filtered_days.append(
-                {"date": day["date"], "ordered": day_has_orders, "meals": filtered_meals}
+                {
+                    "date": day["date"],
+                    "dateObj": day["dateObj"],
+                    "ordered": day_has_orders,
+                    "meals": filtered_meals,
+                }
             )
 
         return filtered_days
@@ -267,7 +724,7 @@ class Menu:
                 (True = ordered only, False = unordered only, None = all)
 
         Returns:
-            Flat list of meals with date: [{...meal, "date": "YYYY-MM-DD"}]
+            Flat list of meals with date: [{...meal, "date": "YYYY-MM-DD", "dateObj": date}]
         """
         # Default to NORMAL order type only
         if order_types is None:
@@ -288,19 +745,16 @@ class Menu:
 
         return meals
 
-    def get_by_date(self, date: str) -> Optional[Dict[str, Any]]:
+    def get_by_date(self, date: Union[str, date_cls]) -> Optional[Dict[str, Any]]:
         """Get menu items for a specific date (searches all order types).
 
         Args:
-            date: Date in YYYY-MM-DD format
+            date: Date in YYYY-MM-DD format or date object
 
         Returns:
             Dictionary with date and meals, or None if not found
         """
-        for day in self._all_meals:
-            if day["date"] == date:
-                return day
-        return None
+        return self._get_indexes()[1].get(date)
 
     def get_by_id(self, meal_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific meal by its ID (searches all order types).
@@ -311,11 +765,7 @@ class Menu:
         Returns:
             Meal dictionary, or None if not found
         """
-        for day in self._all_meals:
-            for meal in day["meals"]:
-                if meal["id"] == meal_id:
-                    return meal
-        return None
+        return self._get_indexes()[0].get(meal_id)
 
     def is_ordered(self, meal_id: int) -> bool:
         """Check whether a meal is ordered or not (searches all order types).
@@ -329,12 +779,15 @@ class Menu:
         meal = self.get_by_id(meal_id)
         return meal["ordered"] if meal else False
 
-    def _change_meal_order(self, meal_id: int, ordered: bool) -> bool:
+    def _change_meal_order(
+        self, meal_id: int, ordered: bool, deadline: Optional[float] = None
+    ) -> bool:
         """Change the order status of a meal (without saving).
 
         Args:
             meal_id: Meal identification number
             ordered: New order status
+            deadline: time.monotonic() deadline of the request (None = no limit)
 
         Returns:
             True if meal order status was changed successfully
@@ -369,7 +822,7 @@ class Menu:
             "ignoreCert": "false",
         }
 
-        response = self.strava._api_request("pridejJidloS5", payload)
+        response = self.strava._api_request("pridejJidloS5", payload, deadline)
 
         if response["status_code"] != 200:
             # Check for specific error codes
@@ -386,18 +839,16 @@ class Menu:
             )
 
         # Update balance from response
-        response_data = response.get("response", {})
-        if "konto" in response_data:
-            try:
-                self.strava.user.balance = float(response_data["konto"])
-            except (ValueError, TypeError):
-                pass  # Keep old balance if parsing fails
+        self.strava._update_balance(response.get("response", {}))
 
         return True
 
-    def _save_order(self) -> bool:
+    def _save_order(self, deadline: Optional[float] = None) -> bool:
         """Save current order changes.
 
+        Args:
+            deadline: time.monotonic() deadline of the request (None = no limit)
+
         Returns:
             True if order was saved successfully
 
@@ -417,15 +868,18 @@ class Menu:
             "ignoreCert": "false",
         }
 
-        response = self.strava._api_request("saveOrders", payload)
+        response = self.strava._api_request("saveOrders", payload, deadline)
 
         if response["status_code"] != 200:
             raise StravaAPIError("Failed to save order")
         return True
 
-    def _cancel_order(self) -> bool:
+    def _cancel_order(self, deadline: Optional[float] = None) -> bool:
         """Cancel current order changes (revert to previous state).
 
+        Args:
+            deadline: time.monotonic() deadline of the request (None = no limit)
+
         Returns:
             True if order was canceled successfully
 
@@ -448,26 +902,335 @@ class Menu:
             "frontendFunction": "refreshInformations",
         }
 
-        response = self.strava._api_request("nactiVlastnostiPA", payload)
+        response = self.strava._api_request("nactiVlastnostiPA", payload, deadline)
 
         if response["status_code"] != 200:
             raise StravaAPIError("Failed to cancel order changes")
 
         # Update balance from response
-        response_data = response.get("response", {})
-        if "konto" in response_data:
+        self.strava._update_balance(response.get("response", {}))
+
+        return True
+
+    def _execute_changes(
+        self,
+        changes: List[Tuple[int, bool]],
+        continue_on_error: bool,
+        deadline: Optional[float] = None,
+    ) -> List[Tuple[int, str]]:
+        """Send order status changes, save them in one transaction and verify them.
+
+        Args:
+            changes: List of (meal_id, ordered) tuples in the order they should be sent
+            continue_on_error: If True, collect errors instead of raising them
+            deadline: time.monotonic() deadline of the transaction (None = no limit)
+
+        Returns:
+            List of (meal_id, error message) tuples (empty unless continue_on_error=True)
+
+        The changes are sent once more if the session expires before they are
+        saved (see SessionExpiredError).
+
+        Raises:
+            SaveTimeoutError: If the deadline passes while the changes are
+                being saved (see _save_timed_out())
+            DeadlineExceededError: If the deadline passes before the changes
+                are saved (they are rolled back, also with continue_on_error=True)
+            StravaAPIError: If any change fails (only if continue_on_error=False)
+        """
+        # Meals already in the requested state produce no events
+        unchanged = {meal_id for meal_id, ordered in changes if self.is_ordered(meal_id) == ordered}
+
+        try:
             try:
-                self.strava.user.balance = float(response_data["konto"])
+                errors = self._send_changes(changes, continue_on_error, deadline)
+            except SessionExpiredError:
+                # Unsaved changes were lost with the expired session, start the
+                # transaction again with the new one
+                errors = self._send_changes(changes, continue_on_error, deadline)
+        except SaveTimeoutError:
+            raise
+        except DeadlineExceededError as e:
+            raise DeadlineExceededError(f"{e}, {self._rollback()}") from e
+        failed_meal_ids = {meal_id for meal_id, _ in errors}  # Meals that already failed
+
+        try:
+            self.fetch(**self._fetch_filters, timeout=_remaining(deadline))  # Refresh menu data
+        except DeadlineExceededError as e:
+            raise DeadlineExceededError(
+                f"{e}, order changes were saved but could not be verified"
+            ) from e
+
+        # Verify changes (skip meals that already failed)
+        failures = []
+        for meal_id, ordered in changes:
+            if meal_id in failed_meal_ids:
+                continue  # Skip verification for meals that already had errors
+            if self.is_ordered(meal_id) != ordered:
+                action = "order" if ordered else "cancel"
+                error_msg = f"Failed to {action} meal with ID {meal_id}"
+                failures.append((meal_id, error_msg))
+                self.strava._emit(
+                    VERIFICATION_FAILED, meal_id=meal_id, ordered=ordered, error=error_msg
+                )
+            elif meal_id not in unchanged:
+                self.strava._emit(
+                    ORDER_PLACED if ordered else ORDER_CANCELLED,
+                    meal_id=meal_id,
+                    meal=self.get_by_id(meal_id),
+                )
+
+        if failures and not continue_on_error:
+            raise StravaAPIError(failures[0][1])
+        return errors + failures
+
+    def _send_changes(
+        self,
+        changes: List[Tuple[int, bool]],
+        continue_on_error: bool,
+        deadline: Optional[float] = None,
+    ) -> List[Tuple[int, str]]:
+        """Send order status changes and save them (see _execute_changes()).
+
+        Returns:
+            List of (meal_id, error message) tuples (empty unless continue_on_error=True)
+
+        Raises:
+            SessionExpiredError: If the session expired (nothing was saved)
+            SaveTimeoutError: If the deadline passes during the saveOrders request
+            DeadlineExceededError: If the deadline passes before the changes are
+                saved (nothing is rolled back)
+            StravaAPIError: If any change fails (only if continue_on_error=False)
+        """
+        # Changes the save has to make, to check the outcome of a timed out save
+        expected = [
+            (meal_id, ordered)
+            for meal_id, ordered in changes
+            if self.is_ordered(meal_id) != ordered
+        ]
+        errors = []
+        for meal_id, ordered in changes:
+            try:
+                self._change_meal_order(meal_id, ordered, deadline)
+            except (DeadlineExceededError, SessionExpiredError):
+                raise
+            except (InsufficientBalanceError, InvalidMealTypeError, StravaAPIError) as e:
+                if continue_on_error:
+                    errors.append((meal_id, str(e)))
+                else:
+                    # Cancel all changes and re-raise
+                    self._rollback()
+                    raise
+
+        try:
+            self._save_order(deadline)
+        except DeadlineExceededError as e:
+            failed_meal_ids = {meal_id for meal_id, _ in errors}
+            expected = [change for change in expected if change[0] not in failed_meal_ids]
+            raise self._save_timed_out(e, expected) from e
+        return errors
+
+    def _save_timed_out(
+        self, error: DeadlineExceededError, expected: List[Tuple[int, bool]]
+    ) -> SaveTimeoutError:
+        """Find out whether order changes were saved after the saveOrders request timed out.
+
+        The server may have saved them before the request was cut short, so
+        the menu is re-fetched with its own ROLLBACK_TIMEOUT. Changes found
+        unsaved are rolled back, so that a later transaction does not save them.
+
+        Args:
+            error: Timeout of the saveOrders request
+            expected: (meal_id, ordered) changes the save should have made
+
+        Returns:
+            SaveTimeoutError describing the outcome
+        """
+        try:
+            self.fetch(**self._fetch_filters, timeout=self.ROLLBACK_TIMEOUT)
+        except StravaAPIError as e:
+            return SaveTimeoutError(
+                f"{error}, order changes may or may not have been saved "
+                f"(menu could not be re-fetched: {e})"
+            )
+        if all(self.is_ordered(meal_id) == ordered for meal_id, ordered in expected):
+            return SaveTimeoutError(f"{error}, order changes were saved", saved=True)
+        return SaveTimeoutError(
+            f"{error}, order changes were not saved, {self._rollback()}", saved=False
+        )
+
+    def _rollback(self) -> str:
+        """Cancel unsaved order changes after a failed change or a passed deadline.
+
+        The rollback gets its own ROLLBACK_TIMEOUT, as the transaction
+        deadline may already be exhausted.
+
+        Returns:
+            Description of the outcome for the error message
+        """
+        try:
+            self._cancel_order(_deadline(self.ROLLBACK_TIMEOUT))
+        except StravaAPIError as e:
+            return f"rollback of unsaved order changes failed: {e}"
+        return "unsaved order changes were rolled back"
+
+    def plan_selection(self, selection: Dict[Union[str, date_cls], Optional[int]]) -> OrderPlan:
+        """Diff a desired selection against the current order state.
+
+        Days missing from the selection are left untouched. Days that are
+        already in the desired state produce no changes.
+
+        Args:
+            selection: Mapping of date (YYYY-MM-DD or date object) to the meal
+                ID that should be ordered on that day, or None for no meal
+
+        Returns:
+            OrderPlan with the minimal set of meals to order and cancel
+
+        Raises:
+            StravaAPIError: If a date or meal ID is not in the menu or the meal
+                is from a different day
+            InvalidMealTypeError: If the selected meal is not a main dish
+        """
+        plan = OrderPlan()
+        for date, meal_id in selection.items():
+            day = self.get_by_date(date)
+            if day is None:
+                raise StravaAPIError(f"Day {date} not found in menu")
+
+            if meal_id is not None:
+                meal = self.get_by_id(meal_id)
+                if meal is None or meal["date"] != day["date"]:
+                    raise StravaAPIError(f"Meal with ID {meal_id} not found on {date}")
+                if meal["type"] != MealType.MAIN:
+                    raise InvalidMealTypeError(
+                        f"Cannot order or cancel {meal['type'].value} meals. "
+                        f"Only main dishes (MAIN) can be ordered or canceled."
+                    )
+
+            for meal in day["meals"]:
+                if meal["ordered"] and meal["type"] == MealType.MAIN and meal["id"] != meal_id:
+                    plan.cancel.append(meal["id"])
+            if meal_id is not None and not self.is_ordered(meal_id):
+                plan.order.append(meal_id)
+        return plan
+
+    def apply_plan(
+        self, plan: OrderPlan, continue_on_error: bool = False, timeout: Optional[float] = None
+    ) -> None:
+        """Execute planned changes in a single saveOrders transaction.
+
+        Cancellations are sent before orders so the released balance can be
+        used for the new meals.
+
+        Args:
+            plan: Plan to execute (see plan_selection() and RuleEngine)
+            continue_on_error: If True, continue with other meals if one fails
+                and collect errors. If False (default), stop on first error
+                and cancel all changes.
+            timeout: Time limit of the whole transaction in seconds including
+                waiting for other transactions of the account (None = no limit),
+                unsaved changes are rolled back when it runs out
+
+        Raises:
+            DuplicateMealError: If the plan orders multiple meals from the same day
+            DeadlineExceededError: If the transaction does not finish within timeout
+            StravaAPIError: If a meal is not in the menu or any change fails
+                (only if continue_on_error=False)
+        """
+        if plan.is_empty():
+            return
+
+        deadline = _deadline(timeout)
+        with _locked(self.strava._lock, deadline):
+            meals: Dict[int, Dict[str, Any]] = {}
+            for meal_id in plan.cancel + plan.order:
+                meal = self.get_by_id(meal_id)
+                if meal is None:
+                    raise StravaAPIError(f"Meal with ID {meal_id} not found")
+                meals[meal_id] = meal
+
+            seen_dates: Dict[str, int] = {}
+            for meal_id in plan.order:
+                meal = meals[meal_id]
+                if meal["date"] in seen_dates:
+                    raise DuplicateMealError(
+                        f"Cannot order multiple meals from the same day ({meal['date']}). "
+                        f"Meal IDs {seen_dates[meal['date']]} and {meal_id} "
+                        f"are from the same day."
+                    )
+                seen_dates[meal["date"]] = meal_id
+
+            changes = [(meal_id, False) for meal_id in plan.cancel]
+            changes += [(meal_id, True) for meal_id in plan.order]
+            errors = self._execute_changes(changes, continue_on_error, deadline)
+
+            if errors and continue_on_error:
+                error_details = "; ".join([f"Meal {mid}: {err}" for mid, err in errors])
+                raise StravaAPIError(f"Some meal changes failed: {error_details}")
+
+    def plan_affordable(
+        self,
+        *meal_ids: int,
+        balance: Optional[float] = None,
+        priority: Union[str, Callable[[Dict[str, Any]], Any]] = "date",
+    ) -> Tuple[List[int], List[int]]:
+        """Split meals into those affordable with the current balance and the rest.
+
+        No request is sent. Already ordered meals cost nothing, unknown meals
+        are treated as unaffordable.
+
+        Args:
+            *meal_ids: Meal identification numbers to order
+            balance: Available balance (None = current user balance)
+            priority: Which meals get the money first - "date" (earliest date
+                first, default), "order" (as given), "price" (cheapest first,
+                maximizes the number of meals) or a key function taking a meal
+                dictionary
+
+        Returns:
+            Tuple (affordable meal IDs, unaffordable meal IDs), both in the
+            order given by meal_ids
+
+        Raises:
+            ValueError: If priority is not a known value
+        """
+        if balance is None:
+            try:
+                balance = float(self.strava.user.balance)
             except (ValueError, TypeError):
-                pass
+                balance = 0.0
+
+        meals = [self.get_by_id(meal_id) for meal_id in meal_ids]
+        known = [meal for meal in meals if meal is not None]
+
+        if callable(priority):
+            known.sort(key=priority)
+        elif priority in ("date", "price"):
+            known.sort(key=itemgetter(priority))  # sort() is stable
+        elif priority != "order":
+            raise ValueError(f"Unknown priority: {priority}")
+
+        affordable = set()
+        remaining = balance
+        for meal in known:
+            cost = 0.0 if meal["ordered"] else meal["price"]
+            if cost <= remaining:
+                remaining -= cost
+                affordable.add(meal["id"])
 
-        return True
+        return (
+            [meal_id for meal_id in meal_ids if meal_id in affordable],
+            [meal_id for meal_id in meal_ids if meal_id not in affordable],
+        )
 
     def order_meals(
         self,
         *meal_ids: int,
         continue_on_error: bool = False,
         strict_duplicates: bool = False,
+        check_balance: bool = False,
+        timeout: Optional[float] = None,
     ) -> None:
         """Order multiple meals in a single transaction.
 
@@ -479,6 +1242,13 @@ class Menu:
             strict_duplicates: If True, raise DuplicateMealError when multiple
                 meals from the same day are being ordered. If False (default),
                 only order the first meal from each day and warn about skipped duplicates.
+            check_balance: If True, check the balance locally before sending any
+                request (see plan_affordable(), earliest dates are paid first).
+                Unaffordable meals are reported as errors without being sent.
+            timeout: Time limit of the whole transaction in seconds including
+                waiting for other transactions of the account (None = no limit).
+                Each request gets the remaining time as its timeout and unsaved
+                changes are rolled back when it runs out.
 
         Raises:
             InsufficientBalanceError: If insufficient balance (only if continue_on_error=False)
@@ -486,83 +1256,73 @@ class Menu:
                 (only if continue_on_error=False)
             DuplicateMealError: If ordering multiple meals from same day
                 (only if strict_duplicates=True)
+            DeadlineExceededError: If the transaction does not finish within timeout
             StravaAPIError: If ordering any meal fails (only if continue_on_error=False)
         """
-        import warnings
-
-        # Detect duplicate days
-        seen_dates: Dict[str, int] = {}
-        filtered_meal_ids: List[int] = []
-        skipped_meals: List[tuple] = []
-
-        for meal_id in meal_ids:
-            meal = self.get_by_id(meal_id)
-            if not meal:
-                if continue_on_error:
-                    warnings.warn(f"Meal with ID {meal_id} not found, skipping")
-                    continue
-                else:
-                    raise StravaAPIError(f"Meal with ID {meal_id} not found")
-
-            meal_date = meal["date"]
-
-            if meal_date in seen_dates:
-                # Duplicate day detected
-                if strict_duplicates:
-                    raise DuplicateMealError(
-                        f"Cannot order multiple meals from the same day ({meal_date}). "
-                        f"Meal IDs {seen_dates[meal_date]} and {meal_id} are from the same day."
+        deadline = _deadline(timeout)
+        # Hold the account lock for the whole transaction
+        with _locked(self.strava._lock, deadline):
+            # Detect duplicate days
+            seen_dates: Dict[str, int] = {}
+            filtered_meal_ids: List[int] = []
+            skipped_meals: List[tuple] = []
+
+            for meal_id in meal_ids:
+                meal = self.get_by_id(meal_id)
+                if not meal:
+                    if continue_on_error:
+                        warnings.warn(f"Meal with ID {meal_id} not found, skipping")
+                        continue
+                    else:
+                        raise StravaAPIError(f"Meal with ID {meal_id} not found")
+
+                meal_date = meal["date"]
+
+                if meal_date in seen_dates:
+                    # Duplicate day detected
+                    if strict_duplicates:
+                        raise DuplicateMealError(
+                            f"Cannot order multiple meals from the same day ({meal_date}). "
+                            f"Meal IDs {seen_dates[meal_date]} and {meal_id} are from the same day."
+                        )
+                    else:
+                        skipped_meals.append((meal_id, meal_date, seen_dates[meal_date]))
+                        continue
+
+                seen_dates[meal_date] = meal_id
+                filtered_meal_ids.append(meal_id)
+
+            # Warn about skipped duplicates
+            if skipped_meals and not strict_duplicates:
+                for meal_id, meal_date, first_meal_id in skipped_meals:
+                    warnings.warn(
+                        f"Skipping meal {meal_id} from {meal_date} because meal {first_meal_id} "
+                        f"from the same day is already being ordered"
                     )
-                else:
-                    skipped_meals.append((meal_id, meal_date, seen_dates[meal_date]))
-                    continue
 
-            seen_dates[meal_date] = meal_id
-            filtered_meal_ids.append(meal_id)
+            errors: List[Tuple[int, str]] = []
+            if check_balance:
+                filtered_meal_ids, unaffordable = self.plan_affordable(*filtered_meal_ids)
+                if unaffordable and not continue_on_error:
+                    raise InsufficientBalanceError(
+                        f"Insufficient balance to order meals {unaffordable} "
+                        f"(balance: {self.strava.user.balance})"
+                    )
+                errors += [(meal_id, "Insufficient balance") for meal_id in unaffordable]
 
-        # Warn about skipped duplicates
-        if skipped_meals and not strict_duplicates:
-            for meal_id, meal_date, first_meal_id in skipped_meals:
-                warnings.warn(
-                    f"Skipping meal {meal_id} from {meal_date} because meal {first_meal_id} "
-                    f"from the same day is already being ordered"
+            if filtered_meal_ids or not check_balance:
+                errors += self._execute_changes(
+                    [(meal_id, True) for meal_id in filtered_meal_ids], continue_on_error, deadline
                 )
 
-        errors = []
-        failed_meal_ids = set()  # Track meals that already failed
+            # If there were errors and continue_on_error is True, report them
+            if errors and continue_on_error:
+                error_details = "; ".join([f"Meal {mid}: {err}" for mid, err in errors])
+                raise StravaAPIError(f"Some meals failed to order: {error_details}")
 
-        for meal_id in filtered_meal_ids:
-            try:
-                self._change_meal_order(meal_id, True)
-            except (InsufficientBalanceError, InvalidMealTypeError, StravaAPIError) as e:
-                if continue_on_error:
-                    errors.append((meal_id, str(e)))
-                    failed_meal_ids.add(meal_id)  # Mark as failed
-                else:
-                    # Cancel all changes and re-raise
-                    self._cancel_order()
-                    raise
-
-        self._save_order()
-        self.fetch()  # Refresh menu data
-
-        # Verify orders (skip meals that already failed)
-        for meal_id in filtered_meal_ids:
-            if meal_id in failed_meal_ids:
-                continue  # Skip verification for meals that already had errors
-            if not self.is_ordered(meal_id):
-                error_msg = f"Failed to order meal with ID {meal_id}"
-                if continue_on_error:
-                    errors.append((meal_id, error_msg))
-                else:
-                    raise StravaAPIError(error_msg)
-
-        # If there were errors and continue_on_error is True, report them
-        if errors and continue_on_error:
-            error_details = "; ".join([f"Meal {mid}: {err}" for mid, err in errors])
-            raise StravaAPIError(f"Some meals failed to order: {error_details}")
-
-    def cancel_meals(self, *meal_ids: int, continue_on_error: bool = False) -> None:
+    def cancel_meals(
+        self, *meal_ids: int, continue_on_error: bool = False, timeout: Optional[float] = None
+    ) -> None:
         """Cancel multiple meal orders in a single transaction.
 
         Args:
@@ -570,45 +1330,151 @@ class Menu:
             continue_on_error: If True, continue canceling other meals if one fails
                 and collect errors. If False (default), stop on first error
                 and cancel all changes.
+            timeout: Time limit of the whole transaction in seconds including
+                waiting for other transactions of the account (None = no limit),
+                unsaved changes are rolled back when it runs out
 
         Raises:
             InvalidMealTypeError: If trying to cancel non-MAIN meal type
                 (only if continue_on_error=False)
+            DeadlineExceededError: If the transaction does not finish within timeout
             StravaAPIError: If canceling any meal fails (only if continue_on_error=False)
         """
-        errors = []
-        failed_meal_ids = set()  # Track meals that already failed
+        deadline = _deadline(timeout)
+        # Hold the account lock for the whole transaction
+        with _locked(self.strava._lock, deadline):
+            errors = self._execute_changes(
+                [(meal_id, False) for meal_id in meal_ids], continue_on_error, deadline
+            )
 
-        for meal_id in meal_ids:
-            try:
-                self._change_meal_order(meal_id, False)
-            except (InvalidMealTypeError, StravaAPIError) as e:
-                if continue_on_error:
-                    errors.append((meal_id, str(e)))
-                    failed_meal_ids.add(meal_id)  # Mark as failed
-                else:
-                    # Cancel all changes and re-raise
-                    self._cancel_order()
-                    raise
+            # If there were errors and continue_on_error is True, report them
+            if errors and continue_on_error:
+                error_details = "; ".join([f"Meal {mid}: {err}" for mid, err in errors])
+                raise StravaAPIError(f"Some meals failed to cancel: {error_details}")
 
-        self._save_order()
-        self.fetch()  # Refresh menu data
+    def add_callback(
+        self, callback: Callable[[Dict[str, Any]], None], events: Optional[List[str]] = None
+    ) -> None:
+        """Register a function called with events of the account (see StravaCZ.add_callback())."""
+        self.strava.add_callback(callback, events)
 
-        # Verify cancellations (skip meals that already failed)
-        for meal_id in meal_ids:
-            if meal_id in failed_meal_ids:
-                continue  # Skip verification for meals that already had errors
-            if self.is_ordered(meal_id):
-                error_msg = f"Failed to cancel meal with ID {meal_id}"
-                if continue_on_error:
-                    errors.append((meal_id, error_msg))
-                else:
-                    raise StravaAPIError(error_msg)
+    def remove_callback(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Unregister a function registered with add_callback()."""
+        self.strava.remove_callback(callback)
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """Export all parsed meals (all order types) as a typed Apache Arrow table.
+
+        Requires the optional pyarrow dependency (pip install strava-cz[arrow]).
+
+        Returns:
+            pyarrow.Table with one row per meal
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        pa = _import_pyarrow()
+        meals = [meal for day in self._all_meals for meal in day["meals"]]
+        columns = {
+            "date": [meal["dateObj"] for meal in meals],
+            "id": [meal["id"] for meal in meals],
+            "name": [meal["name"] for meal in meals],
+            "price": [meal["price"] for meal in meals],
+            "type": [meal["type"].name for meal in meals],
+            "order_type": [meal["orderType"].name for meal in meals],
+            "ordered": [meal["ordered"] for meal in meals],
+            "allergens": [
+                [{"code": str(a[0]), "name": str(a[1])} for a in meal["alergens"] or []]
+                for meal in meals
+            ],
+            "forbidden_allergens": [
+                None if meal["forbiddenAlergens"] is None else str(meal["forbiddenAlergens"])
+                for meal in meals
+            ],
+            "order_deadline": [
+                datetime.fromisoformat(meal["orderDeadline"]) if meal["orderDeadline"] else None
+                for meal in meals
+            ],
+        }
+        return pa.table(columns, schema=_arrow_schema(pa))
+
+    def to_parquet(self, path: str, **kwargs: Any) -> None:
+        """Write all parsed meals to a Parquet file (see to_arrow()).
+
+        Args:
+            path: Destination file path
+            **kwargs: Passed to pyarrow.parquet.write_table (e.g. compression)
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+    @classmethod
+    def from_arrow(
+        cls, table: "pyarrow.Table", strava_client: Optional["StravaCZ"] = None
+    ) -> "Menu":
+        """Create menu from a table produced by to_arrow().
+
+        The returned menu supports all read methods (get_days(), get_meals(), ...).
+        Ordering requires a logged in strava_client.
+
+        Args:
+            table: Table with the to_arrow() schema
+            strava_client: Optional StravaCZ instance to attach
+
+        Returns:
+            Menu with restored meals
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        _import_pyarrow()
+        meals_by_date: Dict[str, List[Dict[str, Any]]] = {}
+        for row in table.to_pylist():
+            date = row["date"].isoformat()
+            meals_by_date.setdefault(date, []).append(
+                {
+                    "type": MealType[row["type"]],
+                    "orderType": OrderType[row["order_type"]],
+                    "name": row["name"],
+                    "forbiddenAlergens": row["forbidden_allergens"],
+                    "alergens": [[a["code"], a["name"]] for a in row["allergens"]],
+                    "ordered": row["ordered"],
+                    "id": row["id"],
+                    "price": row["price"],
+                    "date": date,
+                    "dateObj": row["date"],
+                    "orderDeadline": (
+                        row["order_deadline"].isoformat() if row["order_deadline"] else None
+                    ),
+                }
+            )
+        menu = cls(strava_client)  # type: ignore[arg-type]
+        menu._all_meals = cls._build_days(meals_by_date)
+        return menu
+
+    @classmethod
+    def from_parquet(cls, path: str, strava_client: Optional["StravaCZ"] = None) -> "Menu":
+        """Load menu from a Parquet file written by to_parquet().
+
+        Args:
+            path: Parquet file path
+            strava_client: Optional StravaCZ instance to attach
+
+        Returns:
+            Menu with restored meals
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        _import_pyarrow()
+        import pyarrow.parquet as pq
 
-        # If there were errors and continue_on_error is True, report them
-        if errors and continue_on_error:
-            error_details = "; ".join([f"Meal {mid}: {err}" for mid, err in errors])
-            raise StravaAPIError(f"Some meals failed to cancel: {error_details}")
+        return cls.from_arrow(pq.read_table(path), strava_client)
 
     def print(self) -> None:
         """Print formatted menu (default: orderable meals only)."""
@@ -656,11 +1522,31 @@ class StravaCZ:
 
     BASE_URL = "https://app.strava.cz"
 
+    # Content codings urllib3 can decode in this environment - br and zstd only
+    # when brotli/zstandard are installed (pip install strava-cz[compression])
+    ACCEPT_ENCODING = ", ".join(ACCEPT_ENCODING.split(","))
+
+    # HTTP status codes returned for requests with an expired or invalid sid
+    SESSION_EXPIRED_STATUS_CODES = frozenset({401, 403})
+    # Endpoints that are safe to repeat after a transparent re-login
+    IDEMPOTENT_ENDPOINTS = frozenset({"objednavky", "nactiVlastnostiPA"})
+    # HTTP status codes of an unavailable backend, counted as circuit breaker
+    # failures. Errors caught by the API (555 "Chyba odchycena v api callu")
+    # are faults of single requests, not of the backend.
+    BACKEND_FAILURE_STATUS_CODES = frozenset({502, 503, 504})
+
     def __init__(
         self,
         username: Optional[str] = None,
         password: Optional[str] = None,
         canteen_number: Optional[str] = None,
+        auto_relogin: bool = True,
+        base_url: Optional[str] = None,
+        raw_data_mode: str = "keep",
+        transport: Optional[Any] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        meal_catalogs: Optional[MealCatalogRegistry] = None,
+        session_state: Optional[Dict[str, Any]] = None,
     ):
         """Initialize Strava.cz API client.
 
@@ -668,15 +1554,59 @@ class StravaCZ:
             username: User's login username
             password: User's login password
             canteen_number: Canteen number (required for login)
+            auto_relogin: If True, log in again with the stored credentials when
+                the session expires and retry the failed idempotent request or
+                order transaction
+            base_url: Server URL (default: BASE_URL), e.g. a local MockStravaServer
+            raw_data_mode: Retention of the raw menu response in menu.raw_data
+                ("keep", "compressed" or "off", see Menu)
+            transport: Shared transport creating the HTTP session, e.g.
+                strava_cz.transport.HTTP2Transport (None = requests.Session)
+            circuit_breakers: Registry of circuit breakers per server and canteen
+                backend (None = registry shared by all clients of the process)
+            meal_catalogs: Registry of parsed meals shared by the menus of one
+                canteen (None = registry shared by all clients of the process)
+            session_state: Login session returned by export_session() to
+                restore instead of logging in. The password (if given) is
+                kept for re-login when the restored session has expired.
+
+        Raises:
+            ValueError: If raw_data_mode is not supported
         """
 
-        self.session = requests.Session()
-        self.api_url = f"{self.BASE_URL}/api"
+        self.session = transport.session() if transport is not None else requests.Session()
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.api_url = f"{self.base_url}/api"
+        self.auto_relogin = auto_relogin
+        self.raw_data_mode = raw_data_mode
+        self.circuit_breakers = (
+            circuit_breakers if circuit_breakers is not None else default_registry
+        )
+        self.meal_catalogs = (
+            meal_catalogs if meal_catalogs is not None else _catalog.default_registry
+        )
+        # Transfer statistics - totals and per endpoint "requests", "wire_bytes"
+        # (compressed body size) and "decoded_bytes", per endpoint also the last
+        # "encoding"
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, Any] = {}
+        self.reset_stats()
+
+        # Per-account lock serializing order transactions, menu refreshes and
+        # balance updates when the client is shared between threads
+        self._lock = threading.RLock()
+        # Registered (callback, event types or None for all) pairs, replaced on change
+        self._callbacks: Tuple[
+            Tuple[Callable[[Dict[str, Any]], None], Optional[FrozenSet[str]]], ...
+        ] = ()
 
         self.user = User()  # Initialize the user object
-        self.menu = Menu(self)  # Initialize the menu object with reference to self
+        self.menu = Menu(self, raw_data_mode)  # Initialize the menu object with reference to self
 
         self._setup_headers()
+        if session_state is not None:
+            self._restore_session(session_state, password)
+            return
         self._initialize_session()
 
         # Auto-login if credentials are provided
@@ -694,10 +1624,10 @@ class StravaCZ:
             ),
             "Accept": "*/*",
             "Accept-Language": "en-US,en;q=0.9,de-DE;q=0.8,de;q=0.7,cs;q=0.6",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
+            "Accept-Encoding": self.ACCEPT_ENCODING,
             "Content-Type": "text/plain;charset=UTF-8",
-            "Origin": self.BASE_URL,
-            "Referer": f"{self.BASE_URL}/en/prihlasit-se?jidelna",
+            "Origin": self.base_url,
+            "Referer": f"{self.base_url}/en/prihlasit-se?jidelna",
             "sec-fetch-dest": "empty",
             "sec-fetch-mode": "cors",
             "sec-fetch-site": "same-origin",
@@ -705,29 +1635,204 @@ class StravaCZ:
 
     def _initialize_session(self) -> None:
         """Initialize session with initial GET request."""
-        self.session.get(f"{self.BASE_URL}/en/prihlasit-se?jidelna")
+        self.session.get(f"{self.base_url}/en/prihlasit-se?jidelna")
 
     def _api_request(
-        self, endpoint: str, payload: Optional[Dict[str, Any]] = None
+        self,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         """Make API request to Strava.cz endpoint.
 
+        When the session has expired, the client logs in again with the stored
+        credentials. Requests to IDEMPOTENT_ENDPOINTS are then repeated with
+        the new session, other requests raise SessionExpiredError. An expired
+        session needs no logOut, so logOut requests do not log in again.
+
         Args:
             endpoint: API endpoint path
             payload: Request payload data
+            deadline: time.monotonic() deadline, the remaining time is used as
+                request timeout (None = no limit)
 
         Returns:
             Dictionary containing status code and response data
 
         Raises:
             StravaAPIError: If API request fails
+            AuthenticationError: If the session expired and re-login failed
+            SessionExpiredError: If the session expired during a request to a
+                non-idempotent endpoint (logged in again, request not repeated)
+            CircuitOpenError: If the backend circuit breaker is open
+            DeadlineExceededError: If the deadline passes
+        """
+        result = self._send_request(endpoint, payload, deadline)
+
+        if (
+            result["status_code"] in self.SESSION_EXPIRED_STATUS_CODES
+            and self.auto_relogin
+            and self.user.is_logged_in
+            and payload is not None
+            and "sid" in payload
+            and endpoint != "logOut"
+        ):
+            self._relogin(payload["sid"], deadline)
+            if endpoint not in self.IDEMPOTENT_ENDPOINTS:
+                raise SessionExpiredError(
+                    f"Session expired during {endpoint} request, logged in again "
+                    f"(request not repeated)"
+                )
+            payload = dict(payload, sid=self.user.sid)
+            for key in ("s5url", "url"):
+                if key in payload:
+                    payload[key] = self.user.s5url
+            result = self._send_request(endpoint, payload, deadline)
+
+        return result
+
+    def _send_request(
+        self,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Send a single POST request to Strava.cz endpoint.
+
+        Network errors, transport timeouts, invalid responses and
+        BACKEND_FAILURE_STATUS_CODES count as failures of the circuit breaker,
+        any other response as a success. Requests cut short by the deadline count as neither, as the
+        timeout was set by the caller.
+
+        The result contains "timings" with the durations of the "request"
+        (including the body download) and of the JSON "decode" in seconds.
+
+        Args:
+            endpoint: API endpoint path
+            payload: Request payload data
+            deadline: time.monotonic() deadline, the remaining time is used as
+                request timeout (None = default timeout of the session)
+
+        Returns:
+            Dictionary containing status code and response data
+
+        Raises:
+            StravaAPIError: If API request fails
+            CircuitOpenError: If the circuit breaker is open (request not sent)
+            DeadlineExceededError: If the deadline passes before or during the request
         """
         url = f"{self.api_url}/{endpoint}"
         try:
-            response = self.session.post(url, json=payload, headers=self.headers)
-            return {"status_code": response.status_code, "response": response.json()}
+            timeout = _remaining(deadline)
+        except DeadlineExceededError:
+            raise DeadlineExceededError(f"Deadline exceeded before {endpoint} request")
+        breaker = self.circuit_breaker
+        if not breaker.allow():
+            retry_after = breaker.retry_after
+            raise CircuitOpenError(
+                f"API request not sent, backend is failing (retry in {retry_after:.0f} s)",
+                retry_after,
+            )
+        failed: Optional[bool] = True  # None = outcome says nothing about the backend
+        try:
+            started = time.perf_counter()
+            # Without a deadline the session (transport) keeps its own timeout
+            kwargs: Dict[str, Any] = {} if timeout is None else {"timeout": timeout}
+            response = self.session.post(url, json=payload, headers=self.headers, **kwargs)
+            self._record_stats(endpoint, response)  # Reads the whole body
+            received = time.perf_counter()
+            data = response.json()
+            result = {
+                "status_code": response.status_code,
+                "response": data,
+                "timings": {
+                    "request": received - started,
+                    "decode": time.perf_counter() - received,
+                },
+            }
+            failed = response.status_code in self.BACKEND_FAILURE_STATUS_CODES
+            return result
+        except requests.Timeout as e:
+            if deadline is None:
+                raise StravaAPIError(f"API request failed: {e}")
+            failed = None
+            raise DeadlineExceededError(f"Deadline exceeded during {endpoint} request")
         except requests.RequestException as e:
             raise StravaAPIError(f"API request failed: {e}")
+        finally:
+            if failed is None:
+                breaker.release()
+            elif failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    @property
+    def meal_catalog(self) -> MealCatalog:
+        """Catalog of parsed meals shared with other clients of the same canteen."""
+        return self.meal_catalogs.get((self.base_url, self.user.canteen_number))
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Circuit breaker of the current server and canteen backend (s5url)."""
+        return self.circuit_breakers.get((self.base_url, self.user.s5url or ""))
+
+    def reset_stats(self) -> None:
+        """Reset transfer statistics (see stats)."""
+        with self._stats_lock:
+            self.stats = {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0, "endpoints": {}}
+
+    def _record_stats(self, endpoint: str, response: requests.Response) -> None:
+        """Add response sizes to stats.
+
+        Wire bytes are the (possibly compressed) body bytes read from the
+        connection, decoded bytes the body after content decoding.
+        """
+        content = response.content  # Reads and decodes the whole body
+        wire = response.raw.tell() if response.raw is not None else None
+        if not isinstance(content, bytes) or not isinstance(wire, int):
+            return  # Not a real HTTP response (e.g. a test double)
+        encoding = response.headers.get("Content-Encoding", "identity")
+        with self._stats_lock:
+            endpoint_stats = self.stats["endpoints"].setdefault(
+                endpoint, {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0}
+            )
+            for stats in (self.stats, endpoint_stats):
+                stats["requests"] += 1
+                stats["wire_bytes"] += wire
+                stats["decoded_bytes"] += len(content)
+            endpoint_stats["encoding"] = encoding
+
+    def _relogin(self, expired_sid: Optional[str], deadline: Optional[float] = None) -> None:
+        """Log in again with stored credentials after the session expired.
+
+        Only one thread performs the login; others waiting on the lock reuse
+        the new session.
+
+        Args:
+            expired_sid: Session identifier the failed request was sent with
+            deadline: time.monotonic() deadline of the caller (None = no limit)
+
+        Raises:
+            AuthenticationError: If the login fails
+            DeadlineExceededError: If the deadline passes (the client stays
+                logged in with the expired session and logs in on next use)
+        """
+        with _locked(self._lock, deadline):
+            if self.user.sid != expired_sid:
+                return  # Another thread already refreshed the session
+
+            # is_logged_in stays True while logging in, so callers checking it
+            # without the lock do not fail in the meantime
+            try:
+                self._authenticate(
+                    self.user.username, self.user.password, self.user.canteen_number, deadline
+                )
+            except DeadlineExceededError:
+                raise
+            except (StravaAPIError, ValueError) as e:
+                self.user.is_logged_in = False
+                raise AuthenticationError(f"Session expired and re-login failed: {e}")
 
     def login(self, username, password, canteen_number):
         """Log in to Strava.cz account.
@@ -744,8 +1849,26 @@ class StravaCZ:
             AuthenticationError: If user is already logged in or login fails
             ValueError: If username, password, or canteen_number is missing
         """
-        if self.user.is_logged_in:
-            raise AuthenticationError("User already logged in")
+        with self._lock:
+            if self.user.is_logged_in:
+                raise AuthenticationError("User already logged in")
+            self._authenticate(username, password, canteen_number)
+            self.user.is_logged_in = True
+            return self.user
+
+    def _authenticate(
+        self, username, password, canteen_number, deadline: Optional[float] = None
+    ) -> None:
+        """Send login request and populate user data (is_logged_in is left to the caller).
+
+        Args:
+            deadline: time.monotonic() deadline of the request (None = no limit)
+
+        Raises:
+            AuthenticationError: If login fails
+            DeadlineExceededError: If the deadline passes
+            ValueError: If username, password, or canteen_number is missing
+        """
         if not username or not password:
             raise ValueError("Username and password are required for login")
         if not canteen_number:
@@ -764,16 +1887,57 @@ class StravaCZ:
             "lang": "EN",
         }
 
-        response = self._api_request("login", payload)
+        response = self._api_request("login", payload, deadline)
 
         if response["status_code"] == 200:
             self._populate_user_data(response["response"])
-            self.user.is_logged_in = True
-            return self.user
         else:
             error_message = response["response"].get("message", "Unknown error")
             raise AuthenticationError(f"Login failed: {error_message}")
 
+    # User attributes saved by export_session()
+    SESSION_FIELDS = (
+        "username",
+        "canteen_number",
+        "sid",
+        "s5url",
+        "full_name",
+        "email",
+        "balance",
+        "id",
+        "currency",
+        "canteen_name",
+    )
+
+    def export_session(self) -> Dict[str, Any]:
+        """Return the login session for restoring it later (see session_state).
+
+        The password is not included.
+
+        Returns:
+            JSON serializable dictionary with user data, sid, s5url and cookies
+
+        Raises:
+            AuthenticationError: If user is not logged in
+        """
+        with self._lock:
+            if not self.user.is_logged_in:
+                raise AuthenticationError("User not logged in")
+            state = {field: getattr(self.user, field) for field in self.SESSION_FIELDS}
+            cookies = self.session.cookies
+            state["cookies"] = requests.utils.dict_from_cookiejar(getattr(cookies, "jar", cookies))
+            return state
+
+    def _restore_session(self, state: Dict[str, Any], password: Optional[str]) -> None:
+        """Restore a session exported by export_session() without logging in."""
+        for field in self.SESSION_FIELDS:
+            setattr(self.user, field, state.get(field))
+        self.user.currency = _intern(self.user.currency)
+        self.user.canteen_name = _intern(self.user.canteen_name)
+        self.user.password = password
+        self.session.cookies.update(state.get("cookies") or {})
+        self.user.is_logged_in = True
+
     def _populate_user_data(self, data: Dict[str, Any]) -> None:
         """Populate user object with login response data."""
         user_data = data.get("uzivatel", {})
@@ -784,8 +1948,84 @@ class StravaCZ:
         self.user.email = user_data.get("email", "")
         self.user.balance = user_data.get("konto", 0.0)
         self.user.id = user_data.get("id", 0)
-        self.user.currency = user_data.get("mena", "Kč")
-        self.user.canteen_name = user_data.get("nazevJidelny", "")
+        self.user.currency = _intern(user_data.get("mena", "Kč"))
+        self.user.canteen_name = _intern(user_data.get("nazevJidelny", ""))
+
+    def add_callback(
+        self, callback: Callable[[Dict[str, Any]], None], events: Optional[List[str]] = None
+    ) -> None:
+        """Register a function called when the state of the account changes.
+
+        The callback gets an event dictionary {"event": type, "client": self, ...}
+        with further keys depending on the type:
+
+        - "order_placed" / "order_cancelled": "meal_id" and "meal" (as parsed
+          after the change) - sent once the change is saved and verified
+        - "verification_failed": "meal_id", "ordered" (requested state) and "error"
+        - "balance_updated": "balance" and "previous" - on a changed balance
+          reported by pridejJidloS5 or nactiVlastnostiPA
+        - "menu_refreshed": "menu" and "stats" (Menu.fetch_stats)
+
+        Callbacks run in the thread performing the operation, possibly while
+        the account lock is held, so they should return quickly. Exceptions
+        raised by callbacks are turned into warnings.
+
+        Args:
+            callback: Function taking the event dictionary
+            events: Event types to receive (None = all, see EVENTS)
+
+        Raises:
+            ValueError: If an event type is unknown
+        """
+        selected: Optional[FrozenSet[str]] = None
+        if events is not None:
+            selected = frozenset(events)
+            unknown = selected - set(EVENTS)
+            if unknown:
+                raise ValueError(f"Unknown event types: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._callbacks += ((callback, selected),)
+
+    def remove_callback(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Unregister a function registered with add_callback()."""
+        with self._lock:
+            self._callbacks = tuple(item for item in self._callbacks if item[0] != callback)
+
+    def _emit(self, event: str, **data: Any) -> None:
+        """Call registered callbacks with an event."""
+        callbacks = self._callbacks
+        if not callbacks:
+            return
+        payload = {"event": event, "client": self, **data}
+        for callback, events in callbacks:
+            if events is not None and event not in events:
+                continue
+            try:
+                callback(payload)
+            except Exception as e:
+                warnings.warn(f"Callback for {event} event failed: {e!r}")
+
+    def _update_balance(self, response_data: Dict[str, Any]) -> None:
+        """Update user balance from the "konto" field of an API response.
+
+        Args:
+            response_data: Decoded API response
+        """
+        if "konto" not in response_data:
+            return
+        try:
+            balance = float(response_data["konto"])
+        except (ValueError, TypeError):
+            return  # Keep old balance if parsing fails
+        with self._lock:
+            previous = self.user.balance
+            self.user.balance = balance
+        try:
+            changed = float(previous) != balance
+        except (ValueError, TypeError):
+            changed = True
+        if changed:
+            self._emit(BALANCE_UPDATED, balance=balance, previous=previous)
 
     def logout(self) -> bool:
         """Log out from Strava.cz account.
@@ -796,25 +2036,30 @@ class StravaCZ:
         Raises:
             StravaAPIError: If logout fails
         """
-        if not self.user.is_logged_in:
-            return True  # Already logged out
-
-        payload = {
-            "sid": self.user.sid,
-            "cislo": self.user.canteen_number,
-            "url": self.user.s5url,
-            "lang": "EN",
-            "ignoreCert": "false",
-        }
-
-        response = self._api_request("logOut", payload)
-
-        if response["status_code"] == 200:
-            self.user = User()  # Reset user
-            self.menu = Menu(self)  # Clear menu
-            return True
-        else:
-            raise StravaAPIError("Failed to logout")
+        with self._lock:
+            if not self.user.is_logged_in:
+                return True  # Already logged out
+
+            payload = {
+                "sid": self.user.sid,
+                "cislo": self.user.canteen_number,
+                "url": self.user.s5url,
+                "lang": "EN",
+                "ignoreCert": "false",
+            }
+
+            response = self._api_request("logOut", payload)
+
+            # An expired session is already logged out on the server
+            if (
+                response["status_code"] == 200
+                or response["status_code"] in self.SESSION_EXPIRED_STATUS_CODES
+            ):
+                self.user = User()  # Reset user
+                self.menu = Menu(self, self.raw_data_mode)  # Clear menu
+                return True
+            else:
+                raise StravaAPIError("Failed to logout")
 
 
 if __name__ == "__main__":
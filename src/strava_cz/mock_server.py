@@ -0,0 +1,622 @@
+"""Local stand-in for the Strava.cz API for integration and load testing
+
+Example:
+
+    with MockStravaServer() as server:
+        server.add_account("user", "pass", canteen_number="1234", balance=200)
+        server.generate_menu("1234", days=5)
+        strava = StravaCZ("user", "pass", "1234", base_url=server.url)
+        strava.menu.fetch()
+
+The server speaks HTTP/1.1 with keep-alive, keeps per-account state
+(balance, committed and pending orders) and implements the endpoints used
+by StravaCZ: login, objednavky, pridejJidloS5, saveOrders,
+nactiVlastnostiPA and logOut.
+"""
+
+import asyncio
+import gzip
+import json
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_cls, datetime, timedelta, time as time_cls
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+S5URL = "https://wss5.strava.cz/WSStravne5_15/WSStravne5.svc"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler dispatching to MockStravaServer."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive like the real server
+    disable_nagle_algorithm = True  # Headers and body are written separately
+    server: "_HTTPServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.mock._count_connection()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # Keep test output clean
+
+    def _send(self, status: int, body: Union[Dict[str, Any], str]) -> None:
+        data, headers = self.server.mock._encode(body, self.headers.get("Accept-Encoding", ""))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        self._send(*self.server.mock.handle_get())
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        self._send(*self.server.mock.handle_post(self.path, raw))
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockStravaServer"
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients giving up on a request (timeouts) close the connection before
+        # the response is written - not an error of the server
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockStravaServer:
+    """In-process HTTP server emulating the Strava.cz API."""
+
+    # Smallest response body compressed when the client accepts gzip
+    COMPRESS_MIN_SIZE = 512
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Union[float, Callable[[], float]] = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+        compress: bool = True,
+    ):
+        """Initialize server (call start() or use as context manager).
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 = random free port)
+            latency: Seconds added to every request, or a function returning them
+            failure_rate: Probability of answering any API request with HTTP 500
+            seed: Seed of the random generator used for failure injection
+            compress: Gzip larger responses when the client accepts gzip
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.compress = compress
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._accounts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._menus: Dict[str, List[Dict[str, Any]]] = {}
+        self._sessions: Dict[str, Tuple[str, str]] = {}
+        self._forced_failures: List[Tuple[Optional[str], int, Dict[str, Any]]] = []
+        self._next_veta = 1
+        self._httpd: Optional[_HTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._address: Optional[Tuple[str, int]] = None
+        self._shutdown: Optional[Callable[[], None]] = None
+        self._http2_clients: set = set()
+        self.request_counts: Counter = Counter()
+        self.connections = 0
+
+    # Lifecycle
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to StravaCZ(base_url=...)."""
+        if self._address is None:
+            raise RuntimeError("Server is not running")
+        host, port = self._address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockStravaServer":
+        """Start serving HTTP/1.1 in a background thread."""
+        self._httpd = _HTTPServer((self.host, self.port), _Handler)
+        self._httpd.mock = self
+        self._address = (self.host, self._httpd.server_port)
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="MockStravaServer",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def start_http2(self) -> "MockStravaServer":
+        """Start serving cleartext HTTP/2 (prior knowledge) and HTTP/1.1 in a background thread.
+
+        Requires the hypercorn package. `connections` counts distinct client
+        connections, so multiplexing of concurrent requests can be checked.
+
+        Raises:
+            ImportError: If hypercorn is not installed
+        """
+        try:
+            from hypercorn.asyncio import serve
+            from hypercorn.config import Config
+        except ImportError as e:
+            raise ImportError("HTTP/2 mock server requires: pip install hypercorn") from e
+
+        port = self.port
+        if port == 0:
+            with socket.socket() as sock:  # Reserve a free port
+                sock.bind((self.host, 0))
+                port = sock.getsockname()[1]
+        config = Config()
+        config.bind = [f"{self.host}:{port}"]
+        config.accesslog = config.errorlog = None
+        config.keep_alive_max_requests = 10**9  # Never recycle connections mid-benchmark
+        started = threading.Event()
+        loop = asyncio.new_event_loop()
+        # Requests are handled in threads (latency is simulated by sleeping)
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=64))
+        stop = asyncio.Event()
+
+        async def main() -> None:
+            started.set()
+            await serve(self.asgi_app, config, shutdown_trigger=stop.wait)  # type: ignore
+
+        self._thread = threading.Thread(
+            target=loop.run_until_complete, args=(main(),), name="MockStravaServer", daemon=True
+        )
+        self._thread.start()
+        started.wait()
+
+        def shutdown() -> None:
+            loop.call_soon_threadsafe(stop.set)
+
+        self._shutdown = shutdown
+        self._address = (self.host, port)
+        for _ in range(200):  # Wait until hypercorn listens
+            try:
+                socket.create_connection(self._address, timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._shutdown is not None:
+            self._shutdown()
+            self._shutdown = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._address = None
+
+    async def asgi_app(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """ASGI application serving the mock API (e.g. with an HTTP/2 capable server)."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                else:
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        with self._lock:
+            if scope.get("client") not in self._http2_clients:
+                self._http2_clients.add(scope.get("client"))
+                self.connections += 1
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        loop = asyncio.get_running_loop()
+        status: int
+        response: Union[Dict[str, Any], str]
+        if scope["method"] == "GET":
+            status, response = await loop.run_in_executor(None, self.handle_get)
+        else:
+            status, response = await loop.run_in_executor(
+                None, self.handle_post, scope["path"], body
+            )
+        headers = dict(scope["headers"])
+        data, response_headers = self._encode(
+            response, headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.lower().encode(), v.encode()) for k, v in response_headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": data})
+
+    def __enter__(self) -> "MockStravaServer":
+        """Start server on entering the context."""
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop server on leaving the context."""
+        self.stop()
+
+    # State setup
+
+    def add_account(
+        self,
+        username: str,
+        password: str,
+        canteen_number: str = "1234",
+        balance: float = 100.0,
+        full_name: Optional[str] = None,
+    ) -> None:
+        """Register an account.
+
+        Args:
+            username: Login username
+            password: Login password
+            canteen_number: Canteen the account belongs to
+            balance: Initial balance
+            full_name: Displayed name (default: username)
+        """
+        with self._lock:
+            self._accounts[(canteen_number, username)] = {
+                "password": password,
+                "balance": float(balance),
+                "full_name": full_name or username,
+                "ordered": set(),
+                "pending": {},
+            }
+            self._menus.setdefault(canteen_number, [])
+
+    def add_meal(
+        self,
+        canteen_number: str,
+        date: str,
+        name: str,
+        price: float = 40.0,
+        kind: str = "Oběd 1",
+        restriction: str = "",
+        allergens: Optional[List[List[str]]] = None,
+        deadline: Optional[str] = None,
+    ) -> int:
+        """Add a meal to the menu of a canteen.
+
+        Args:
+            canteen_number: Canteen number
+            date: Date in YYYY-MM-DD format
+            name: Meal name
+            price: Meal price
+            kind: Meal kind as shown by Strava ("Polévka", "Oběd 1", ...)
+            restriction: Value of omezeniObj.den ("", "CO", "T", "VP")
+            allergens: Allergens as [[code, name], ...]
+            deadline: Order deadline (default: 14:00 the day before)
+
+        Returns:
+            Meal ID (veta)
+        """
+        day = date_cls.fromisoformat(date)
+        if deadline is None:
+            deadline = datetime.combine(day - timedelta(days=1), time_cls(14)).isoformat()
+        with self._lock:
+            veta = self._next_veta
+            self._next_veta += 1
+            self._menus.setdefault(canteen_number, []).append(
+                {
+                    "veta": veta,
+                    "date": day,
+                    "name": name,
+                    "price": float(price),
+                    "kind": kind,
+                    "restriction": restriction,
+                    "allergens": allergens if allergens is not None else [],
+                    "deadline": deadline,
+                }
+            )
+            return veta
+
+    def generate_menu(
+        self,
+        canteen_number: str,
+        days: int = 10,
+        start: Optional[date_cls] = None,
+        mains_per_day: int = 2,
+        soup: bool = True,
+        price: float = 40.0,
+    ) -> List[int]:
+        """Add meals for consecutive days to a canteen menu.
+
+        Args:
+            canteen_number: Canteen number
+            days: Number of days
+            start: First day (default: tomorrow)
+            mains_per_day: Number of main dishes per day
+            soup: Whether each day has a soup
+            price: Price of main dishes
+
+        Returns:
+            IDs of the added main dishes
+        """
+        start = start or date_cls.today() + timedelta(days=1)
+        main_ids = []
+        for offset in range(days):
+            date = (start + timedelta(days=offset)).isoformat()
+            if soup:
+                self.add_meal(canteen_number, date, f"Polévka {offset + 1}", 0, "Polévka")
+            for number in range(1, mains_per_day + 1):
+                main_ids.append(
+                    self.add_meal(
+                        canteen_number,
+                        date,
+                        f"Jídlo {number} ({date})",
+                        price,
+                        f"Oběd {number}",
+                        allergens=[["01", "Obiloviny obsahující lepek"]],
+                    )
+                )
+        return main_ids
+
+    def balance(self, username: str, canteen_number: str = "1234") -> float:
+        """Return committed balance of an account."""
+        with self._lock:
+            return float(self._accounts[(canteen_number, username)]["balance"])
+
+    def ordered(self, username: str, canteen_number: str = "1234") -> List[int]:
+        """Return committed ordered meal IDs of an account."""
+        with self._lock:
+            return sorted(self._accounts[(canteen_number, username)]["ordered"])
+
+    # Failure injection
+
+    def fail_next(
+        self,
+        endpoint: Optional[str] = None,
+        status: int = 500,
+        body: Optional[Dict[str, Any]] = None,
+        count: int = 1,
+    ) -> None:
+        """Answer the next matching requests with an error.
+
+        Args:
+            endpoint: Endpoint to fail (None = any endpoint)
+            status: HTTP status code of the error
+            body: Response body (default: {"message": "Injected failure"})
+            count: Number of requests to fail
+        """
+        with self._lock:
+            for _ in range(count):
+                self._forced_failures.append(
+                    (endpoint, status, body or {"message": "Injected failure"})
+                )
+
+    def expire_sessions(self) -> None:
+        """Invalidate all session identifiers (clients must log in again)."""
+        with self._lock:
+            self._sessions.clear()
+
+    # Request handling
+
+    def _encode(
+        self, body: Union[Dict[str, Any], str], accept_encoding: str
+    ) -> Tuple[bytes, List[Tuple[str, str]]]:
+        """Serialize response body and return it with response headers."""
+        if isinstance(body, str):
+            data = body.encode("utf-8")
+            headers = [("Content-Type", "text/html; charset=utf-8")]
+        else:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            headers = [("Content-Type", "application/json; charset=utf-8")]
+        if self.compress and len(data) >= self.COMPRESS_MIN_SIZE and "gzip" in accept_encoding:
+            data = gzip.compress(data)
+            headers.append(("Content-Encoding", "gzip"))
+        headers.append(("Content-Length", str(len(data))))
+        return data, headers
+
+    def handle_get(self) -> Tuple[int, str]:
+        """Process a GET request (the login page)."""
+        self._delay()
+        return 200, "<html><body>Strava.cz mock</body></html>"
+
+    def handle_post(self, path: str, raw: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Process a POST request with a raw JSON body."""
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return 400, {"message": "Invalid JSON"}
+        return self.handle(path.split("?", 1)[0].rsplit("/", 1)[-1], payload)
+
+    def _count_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def _delay(self) -> None:
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency > 0:
+            time.sleep(latency)
+
+    def handle(self, endpoint: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Process one API request.
+
+        Args:
+            endpoint: Endpoint name (last path segment)
+            payload: Decoded JSON payload
+
+        Returns:
+            Tuple (HTTP status code, response body)
+        """
+        self._delay()
+        with self._lock:
+            self.request_counts[endpoint] += 1
+            for index, (failing_endpoint, status, body) in enumerate(self._forced_failures):
+                if failing_endpoint in (None, endpoint):
+                    del self._forced_failures[index]
+                    return status, body
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                return 500, {"message": "Injected random failure"}
+
+            handler = getattr(self, f"_api_{endpoint}", None)
+            if handler is None:
+                return 404, {"message": f"Unknown endpoint {endpoint}"}
+            if endpoint == "login":
+                return handler(payload)
+
+            key = self._sessions.get(payload.get("sid", ""))
+            if key is None or key[0] != str(payload.get("cislo")):
+                return 401, {"number": 1, "message": "Session expired"}
+            return handler(payload, key, self._accounts[key])
+
+    def _api_login(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        key = (str(payload.get("cislo")), str(payload.get("jmeno")))
+        account = self._accounts.get(key)
+        if account is None or account["password"] != payload.get("heslo"):
+            return 401, {"number": 2, "message": "Neplatné přihlašovací údaje"}
+
+        sid = uuid.uuid4().hex.upper()
+        self._sessions[sid] = key
+        return 200, {
+            "sid": sid,
+            "s5url": S5URL,
+            "cislo": key[0],
+            "jmeno": key[1],
+            "uzivatel": {
+                "konto": f"{account['balance']:.2f}",
+                "jmeno": account["full_name"],
+                "email": f"{key[1]}@example.com",
+                "id": key[1],
+                "mena": "Kč",
+                "cislo": key[0],
+                "nazevJidelny": f"Školní jídelna {key[0]}",
+            },
+            "betatest": False,
+            "ignoreCert": False,
+            "zustatPrihlasen": bool(payload.get("zustatPrihlasen")),
+        }
+
+    def _api_objednavky(
+        self, payload: Dict[str, Any], key: Tuple[str, str], account: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        tables: Dict[str, List[Dict[str, Any]]] = {}
+        for meal in sorted(self._menus.get(key[0], []), key=lambda m: (m["date"], m["veta"])):
+            tables.setdefault(meal["date"].isoformat(), []).append(
+                self._raw_meal(meal, meal["veta"] in account["ordered"])
+            )
+        return 200, {f"table{i}": meals for i, meals in enumerate(tables.values())}
+
+    @staticmethod
+    def _raw_meal(meal: Dict[str, Any], ordered: bool) -> Dict[str, Any]:
+        soup = meal["kind"] == "Polévka"
+        return {
+            "id": meal["veta"],
+            "datum": meal["date"].strftime("%d.%m.%Y"),
+            "druh_popis": meal["kind"],
+            "druh_chod": "Oběd",
+            "nazev": meal["name"],
+            "popis": "" if soup else meal["kind"],
+            "delsiPopis": meal["name"],
+            "zakazaneAlergeny": None,
+            "alergeny_text": "".join(f"{code} -{name}|" for code, name in meal["allergens"]),
+            "alergeny": meal["allergens"],
+            "chod": "C",
+            "druh": "PO" if soup else "O1",
+            "cena": f"{meal['price']:.2f}",
+            "polevka": "A" if soup else "N",
+            "pocet": 1 if ordered else 0,
+            "veta": str(meal["veta"]),
+            "omezeniObj": {"den": meal["restriction"], "obj": "", "zm": "", "bur": ""},
+            "casKonec": meal["deadline"],
+            "casOdhlaseni": meal["deadline"],
+            "version": 5,
+        }
+
+    def _api_pridejJidloS5(
+        self, payload: Dict[str, Any], key: Tuple[str, str], account: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        veta = int(payload.get("veta", -1))
+        meal = next((m for m in self._menus.get(key[0], []) if m["veta"] == veta), None)
+        if meal is None:
+            return 400, {"number": 10, "message": "Jídlo neexistuje"}
+        if meal["kind"] == "Polévka" or meal["restriction"] in ("CO", "VP"):
+            return 400, {"number": 20, "message": "Jídlo nelze objednat ani zrušit"}
+
+        pending = account["pending"]
+        ordered = {m for m in account["ordered"] if pending.get(m, 1) == 1}
+        ordered |= {m for m, count in pending.items() if count == 1}
+        balance = self._pending_balance(key, account)
+
+        if payload.get("pocet") == "1" and veta not in ordered:
+            # One meal per day - ordering replaces another meal of the same day
+            same_day = [
+                m["veta"]
+                for m in self._menus[key[0]]
+                if m["date"] == meal["date"] and m["veta"] in ordered
+            ]
+            refund = sum(self._price(key, m) for m in same_day)
+            if balance + refund < meal["price"]:
+                return 400, {"number": 35, "message": "Nedostatečný zůstatek na kontě"}
+            for other in same_day:
+                pending[other] = 0
+            pending[veta] = 1
+        elif payload.get("pocet") == "0":
+            pending[veta] = 0
+        return 200, {"konto": f"{self._pending_balance(key, account):.2f}"}
+
+    def _price(self, key: Tuple[str, str], veta: int) -> float:
+        return next(m["price"] for m in self._menus[key[0]] if m["veta"] == veta)
+
+    def _pending_balance(self, key: Tuple[str, str], account: Dict[str, Any]) -> float:
+        balance = account["balance"]
+        for veta, count in account["pending"].items():
+            if count == 1 and veta not in account["ordered"]:
+                balance -= self._price(key, veta)
+            elif count == 0 and veta in account["ordered"]:
+                balance += self._price(key, veta)
+        return balance
+
+    def _api_saveOrders(
+        self, payload: Dict[str, Any], key: Tuple[str, str], account: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        account["balance"] = self._pending_balance(key, account)
+        for veta, count in account["pending"].items():
+            if count == 1:
+                account["ordered"].add(veta)
+            else:
+                account["ordered"].discard(veta)
+        account["pending"] = {}
+        return 200, {"konto": f"{account['balance']:.2f}"}
+
+    def _api_nactiVlastnostiPA(
+        self, payload: Dict[str, Any], key: Tuple[str, str], account: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        account["pending"] = {}
+        return 200, {"konto": f"{account['balance']:.2f}", "text": ""}
+
+    def _api_logOut(
+        self, payload: Dict[str, Any], key: Tuple[str, str], account: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        self._sessions.pop(payload.get("sid", ""), None)
+        return 200, {}
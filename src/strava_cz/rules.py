@@ -0,0 +1,208 @@
+"""Declarative auto-order rules evaluated against parsed menus"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_cls
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from .main import Menu, MealType, OrderPlan, OrderType, StravaAPIError
+
+
+class OrderPolicy:
+    """Ordering preferences of one account."""
+
+    def __init__(
+        self,
+        preferred_names: Optional[List[str]] = None,
+        forbidden_allergens: Optional[List[str]] = None,
+        max_price: Optional[float] = None,
+        skip_days: Optional[Iterable[Union[int, str, date_cls]]] = None,
+        fallback: bool = True,
+        cancel_unwanted: bool = False,
+    ):
+        """Initialize policy.
+
+        Args:
+            preferred_names: Substrings of meal names in order of preference
+                (case insensitive). The first matching pattern wins.
+            forbidden_allergens: Allergen codes ("01") or names ("Mléko") that
+                must not be contained in an ordered meal
+            max_price: Maximum price of an ordered meal (None = no limit)
+            skip_days: Days to never order - weekday numbers (0 = Monday)
+                or dates (YYYY-MM-DD strings or date objects)
+            fallback: If True, order any allowed meal on days where no meal
+                matches preferred_names. If False, such days are left alone.
+            cancel_unwanted: If True, cancel already ordered meals that break
+                the policy (forbidden allergen, price, skipped day)
+        """
+        self.preferred_names = [name.lower() for name in preferred_names or []]
+        self.forbidden_allergens = frozenset(
+            allergen.lower() for allergen in forbidden_allergens or []
+        )
+        self.max_price = max_price
+        skip_days = list(skip_days or [])
+        self.skip_weekdays = frozenset(day for day in skip_days if isinstance(day, int))
+        self.skip_dates = frozenset(
+            date_cls.fromisoformat(day) if isinstance(day, str) else day
+            for day in skip_days
+            if isinstance(day, (str, date_cls))
+        )
+        self.fallback = fallback
+        self.cancel_unwanted = cancel_unwanted
+
+    def is_skipped(self, date: Union[str, date_cls]) -> bool:
+        """Check whether the policy skips given day.
+
+        Args:
+            date: Date in YYYY-MM-DD format or date object
+
+        Returns:
+            True if nothing should be ordered on this day
+        """
+        if isinstance(date, str):
+            date = date_cls.fromisoformat(date)
+        if date in self.skip_dates:
+            return True
+        return date.weekday() in self.skip_weekdays
+
+    def allows(self, meal: Dict[str, Any]) -> bool:
+        """Check whether a meal may be ordered under this policy.
+
+        Args:
+            meal: Meal dictionary from Menu
+
+        Returns:
+            True if meal passes allergen and price limits
+        """
+        if self.max_price is not None and meal["price"] > self.max_price:
+            return False
+        if self.forbidden_allergens:
+            for allergen in meal["alergens"] or []:
+                if any(str(part).lower() in self.forbidden_allergens for part in allergen):
+                    return False
+        return True
+
+    def rank(self, meal: Dict[str, Any]) -> Optional[int]:
+        """Return preference rank of a meal (lower is better).
+
+        Args:
+            meal: Meal dictionary from Menu
+
+        Returns:
+            Index of the first matching preferred name, len(preferred_names)
+            for non-matching meals when fallback is enabled, None otherwise
+        """
+        name = meal["name"].lower()
+        for index, pattern in enumerate(self.preferred_names):
+            if pattern in name:
+                return index
+        return len(self.preferred_names) if self.fallback else None
+
+    def __repr__(self) -> str:
+        """Return representation of policy."""
+        return (
+            f"OrderPolicy(preferred_names={self.preferred_names}, "
+            f"forbidden_allergens={sorted(self.forbidden_allergens)}, "
+            f"max_price={self.max_price})"
+        )
+
+
+class RuleEngine:
+    """Evaluates order policies against parsed menus in bulk."""
+
+    def plan(
+        self, menu: Menu, policy: OrderPolicy, account: Optional[Hashable] = None
+    ) -> OrderPlan:
+        """Create order plan for a single menu.
+
+        Only orderable (OrderType.NORMAL) main dishes are considered. Days that
+        already have an allowed meal ordered are kept as they are.
+
+        Args:
+            menu: Fetched menu of the account
+            policy: Policy of the account
+            account: Optional key stored in the resulting plan
+
+        Returns:
+            OrderPlan with meals to order and cancel
+        """
+        plan = OrderPlan(account=account)
+        for day in menu.get_days(meal_types=[MealType.MAIN], order_types=[OrderType.NORMAL]):
+            skipped = policy.is_skipped(day["dateObj"])
+            ordered = [meal for meal in day["meals"] if meal["ordered"]]
+            unwanted = [meal for meal in ordered if skipped or not policy.allows(meal)]
+
+            if policy.cancel_unwanted:
+                plan.cancel.extend(meal["id"] for meal in unwanted)
+            elif unwanted:
+                continue  # Leave days with manual orders untouched
+
+            if skipped or len(ordered) > len(unwanted):
+                continue  # Nothing to order, or an allowed meal is already ordered
+
+            best: Optional[Tuple[int, int]] = None
+            for meal in day["meals"]:
+                if meal["ordered"] or not policy.allows(meal):
+                    continue
+                rank = policy.rank(meal)
+                if rank is not None and (best is None or rank < best[0]):
+                    best = (rank, meal["id"])
+            if best is not None:
+                plan.order.append(best[1])
+        return plan
+
+    def plan_many(
+        self, accounts: Iterable[Tuple[Hashable, Menu, OrderPolicy]]
+    ) -> Dict[Hashable, OrderPlan]:
+        """Create order plans for many accounts.
+
+        Args:
+            accounts: Iterable of (account key, fetched menu, policy) tuples
+
+        Returns:
+            Dictionary mapping account key to its OrderPlan
+        """
+        return {key: self.plan(menu, policy, account=key) for key, menu, policy in accounts}
+
+    @staticmethod
+    def execute(menu: Menu, plan: OrderPlan, continue_on_error: bool = False) -> None:
+        """Send planned changes in a single transaction using Menu.apply_plan().
+
+        Args:
+            menu: Menu of the account the plan was created for
+            plan: Plan to execute
+            continue_on_error: Passed to Menu.apply_plan()
+
+        Raises:
+            StravaAPIError: If any change fails (see Menu.apply_plan())
+        """
+        menu.apply_plan(plan, continue_on_error=continue_on_error)
+
+    def execute_many(
+        self,
+        plans: Iterable[Tuple[Menu, OrderPlan]],
+        max_workers: int = 8,
+        continue_on_error: bool = False,
+    ) -> Dict[Hashable, Optional[StravaAPIError]]:
+        """Execute plans of many accounts concurrently.
+
+        Args:
+            plans: Iterable of (menu, plan) tuples; plans should have account set
+            max_workers: Number of accounts processed in parallel
+            continue_on_error: Passed to execute()
+
+        Returns:
+            Dictionary mapping account key to the raised error (None = success)
+        """
+
+        def run(item: Tuple[Menu, OrderPlan]) -> Optional[StravaAPIError]:
+            menu, plan = item
+            try:
+                self.execute(menu, plan, continue_on_error=continue_on_error)
+            except StravaAPIError as e:
+                return e
+            return None
+
+        items = [item for item in plans if not item[1].is_empty()]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(run, items)
+            return {plan.account: error for (_, plan), error in zip(items, results)}
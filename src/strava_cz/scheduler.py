@@ -0,0 +1,188 @@
+"""Scheduler firing order batches for many accounts at a precise instant"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Union
+
+import requests
+
+from .main import AuthenticationError, StravaAPIError, StravaCZ
+
+
+class OrderScheduler:
+    """Pre-authenticates accounts and orders meals for all of them at a given time.
+
+    Clients are logged in and warmed up (menu fetched, connection kept alive)
+    `lead_time` seconds before the target. Up to `max_workers` worker threads
+    are started in advance and blocked on an event, which is released at the
+    target instant after a coarse sleep followed by a short busy wait. With
+    more accounts than workers, the remaining batches are sent as soon as a
+    worker is free.
+    """
+
+    def __init__(
+        self,
+        at: Union[datetime, float],
+        lead_time: float = 30.0,
+        spin: float = 0.05,
+        clock: Callable[[], float] = time.time,
+        max_workers: int = 32,
+    ):
+        """Initialize scheduler.
+
+        Args:
+            at: Target instant as local datetime or UNIX timestamp
+            lead_time: Seconds before the target to log in and warm up clients
+            spin: Seconds before the target to switch from sleeping to busy waiting
+            clock: Function returning current UNIX time (for testing)
+            max_workers: Maximum number of threads logging in and ordering in
+                parallel (limits the login burst against the server)
+
+        Raises:
+            ValueError: If max_workers is not positive
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+        self.max_workers = max_workers
+        self.target = at.timestamp() if isinstance(at, datetime) else float(at)
+        self.lead_time = lead_time
+        self.spin = spin
+        self.clock = clock
+        self._jobs: List[Dict[str, Any]] = []
+
+    def add(
+        self,
+        meal_ids: Sequence[int],
+        client: Optional[StravaCZ] = None,
+        credentials: Optional[Dict[str, str]] = None,
+        account: Optional[Hashable] = None,
+        refresh: bool = False,
+        **order_kwargs: Any,
+    ) -> None:
+        """Add an order batch for one account.
+
+        Args:
+            meal_ids: Meals to order at the target instant
+            client: Existing StravaCZ client (logged in during prepare() if needed)
+            credentials: Dictionary with username, password and canteen_number
+                used to create a client in prepare() when client is None
+            account: Key identifying the account in results (default: username)
+            refresh: If True, fetch the menu again at the target instant before
+                ordering (needed when the meals are not listed in advance)
+            **order_kwargs: Passed to Menu.order_meals() (e.g. continue_on_error)
+
+        Raises:
+            ValueError: If neither client nor credentials are given
+        """
+        if client is None and credentials is None:
+            raise ValueError("Either client or credentials are required")
+        if account is None:
+            if client is not None:
+                account = client.user.username
+            elif credentials is not None:
+                account = credentials["username"]
+        self._jobs.append(
+            {
+                "account": account,
+                "client": client,
+                "credentials": credentials,
+                "meal_ids": list(meal_ids),
+                "refresh": refresh,
+                "order_kwargs": order_kwargs,
+                "error": None,
+            }
+        )
+
+    def _prepare_job(self, job: Dict[str, Any]) -> None:
+        try:
+            if job["client"] is None:
+                job["client"] = StravaCZ(**job["credentials"])
+            client = job["client"]
+            if not client.user.is_logged_in:
+                if job["credentials"] is None:
+                    raise AuthenticationError("Client is not logged in")
+                client.login(**job["credentials"])
+            client.menu.fetch()  # Warm up connection and menu data
+        except (StravaAPIError, ValueError, requests.RequestException) as e:
+            job["error"] = e
+
+    def prepare(self) -> None:
+        """Log in and warm up all clients in parallel (called by run())."""
+        if not self._jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self._jobs))) as executor:
+            list(executor.map(self._prepare_job, self._jobs))
+
+    def _wait_until(self, timestamp: float) -> None:
+        """Sleep until shortly before timestamp, then busy wait for precision."""
+        while True:
+            remaining = timestamp - self.clock()
+            if remaining <= self.spin:
+                break
+            time.sleep(min(remaining - self.spin, 1.0))
+        while self.clock() < timestamp:
+            pass
+
+    def _fire(self, job: Dict[str, Any], go: threading.Event) -> Dict[str, Any]:
+        go.wait()
+        started = self.clock()
+        result = {"account": job["account"], "ok": False, "error": None}
+        try:
+            if job["error"] is not None:
+                raise job["error"]
+            menu = job["client"].menu
+            if job["refresh"]:
+                menu.fetch(**menu._fetch_filters)
+            menu.order_meals(*job["meal_ids"], **job["order_kwargs"])
+            result["ok"] = True
+        except (StravaAPIError, ValueError, requests.RequestException) as e:
+            result["error"] = str(e)
+        finished = self.clock()
+        result["start_latency"] = started - self.target
+        result["latency"] = finished - self.target
+        return result
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Wait for the lead time, prepare clients and fire all batches at the target.
+
+        Returns:
+            List of results, one per added batch:
+                {"account", "ok", "error", "start_latency", "latency"} where
+                latencies are seconds relative to the target (start of the
+                order and completion including verification)
+        """
+        if not self._jobs:
+            return []
+
+        self._wait_until(self.target - self.lead_time)
+        self.prepare()
+
+        go = threading.Event()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self._jobs))) as executor:
+            futures = [executor.submit(self._fire, job, go) for job in self._jobs]
+            self._wait_until(self.target)
+            go.set()
+            return [future.result() for future in futures]
+
+    @staticmethod
+    def summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summarize results of run().
+
+        Args:
+            results: Results returned by run()
+
+        Returns:
+            Dictionary with counts and start/completion latency statistics in seconds
+        """
+        starts = sorted(result["start_latency"] for result in results)
+        latencies = sorted(result["latency"] for result in results)
+        return {
+            "accounts": len(results),
+            "succeeded": sum(result["ok"] for result in results),
+            "failed": sum(not result["ok"] for result in results),
+            "max_start_latency": starts[-1] if starts else None,
+            "median_latency": latencies[len(latencies) // 2] if latencies else None,
+            "max_latency": latencies[-1] if latencies else None,
+        }
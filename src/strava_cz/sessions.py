@@ -0,0 +1,349 @@
+"""Session store keeping logged in clients of many accounts
+
+Usage example:
+
+    store = SessionStore(max_clients=500, idle_timeout=300,
+                         backend=SQLiteSessionBackend("sessions.db"))
+    client = store.client(username, password, canteen_number)
+    client.menu.fetch()
+
+At most max_clients StravaCZ clients are kept in memory (least recently
+used first out) and clients unused for idle_timeout seconds are evicted.
+The login session of an evicted client (sid, s5url, cookies and user data,
+see StravaCZ.export_session()) stays in the backend, and the next request
+for the account rehydrates a client from it without logging in. Sessions
+expired on the server are renewed by the client's transparent re-login.
+
+A client is only returned for the password it was logged in with. Passwords
+are not stored in the backend, only an HMAC-SHA256 digest next to each
+session, keyed by a random key kept in the backend; a request with another
+password logs in to have it verified by the server.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .main import StravaAPIError, StravaCZ
+
+# Backend entry holding the key of password digests (account keys contain ":")
+_DIGEST_KEY_ENTRY = "digest_key"
+
+
+def account_key(account: Dict[str, Any]) -> str:
+    """Return key identifying an account in session stores and checkpoints."""
+    return f"{account.get('canteen_number')}:{account.get('username')}"
+
+
+def _same_password(client: StravaCZ, password: str) -> bool:
+    """Return whether a client was logged in with password."""
+    return hmac.compare_digest((client.user.password or "").encode(), password.encode())
+
+
+class MemorySessionBackend:
+    """Keeps exported sessions in a dictionary (lost when the process exits)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the session stored for key, or None."""
+        with self._lock:
+            return self._sessions.get(key)
+
+    def put(self, key: str, state: Dict[str, Any]) -> None:
+        """Store session for key."""
+        with self._lock:
+            self._sessions[key] = state
+
+    def delete(self, key: str) -> None:
+        """Remove session for key."""
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class SQLiteSessionBackend:
+    """Keeps exported sessions in an SQLite database shared between runs and processes."""
+
+    def __init__(self, path: str):
+        """Open (and create) the database.
+
+        Args:
+            path: Database file (":memory:" for a private in-memory database)
+        """
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(key TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the session stored for key, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT state FROM sessions WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, state: Dict[str, Any]) -> None:
+        """Store session for key."""
+        data = json.dumps(state, ensure_ascii=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (key, state, updated) VALUES (?, ?, ?)",
+                (key, data, time.time()),
+            )
+
+    def delete(self, key: str) -> None:
+        """Remove session for key."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+
+class SessionStore:
+    """LRU of logged in clients backed by a store of exported sessions."""
+
+    def __init__(
+        self,
+        max_clients: int = 1000,
+        idle_timeout: Optional[float] = 600.0,
+        backend: Optional[Any] = None,
+        clock: Callable[[], float] = time.monotonic,
+        **client_kwargs: Any,
+    ):
+        """Initialize store.
+
+        Args:
+            max_clients: Maximum number of clients kept in memory
+            idle_timeout: Seconds after which an unused client is evicted
+                (None = only evicted when max_clients is exceeded)
+            backend: Storage of exported sessions with get(), put(), delete()
+                and close() (None = MemorySessionBackend)
+            clock: Function returning monotonic time in seconds (for testing)
+            **client_kwargs: Passed to StravaCZ (e.g. base_url, transport)
+
+        Raises:
+            ValueError: If max_clients is not positive
+        """
+        if max_clients < 1:
+            raise ValueError("max_clients must be positive")
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.backend = backend if backend is not None else MemorySessionBackend()
+        self.clock = clock
+        self.client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        # Account key -> (client, last use), least recently used first
+        self._clients: "OrderedDict[str, Tuple[StravaCZ, float]]" = OrderedDict()
+        # Account key -> (lock, number of callers using it), dropped when unused
+        self._account_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._digest_key = self._load_digest_key()
+        self.hits = 0
+        self.rehydrated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def client(self, username: str, password: str, canteen_number: str) -> StravaCZ:
+        """Return a logged in client of the account.
+
+        A logged in client kept in memory is returned as is, otherwise a
+        client is rehydrated from the stored session or logged in. A client
+        or session of the account kept for another password is not used:
+        the account is logged in with the given password, replacing it only
+        if the login succeeds. Idle clients are evicted on every call.
+
+        Args:
+            username: User's login username
+            password: User's login password (used for login and re-login)
+            canteen_number: Canteen number
+
+        Returns:
+            Logged in StravaCZ client
+
+        Raises:
+            AuthenticationError: If the login fails (e.g. wrong password)
+            StravaAPIError: If the login request fails
+        """
+        key = account_key({"username": username, "canteen_number": canteen_number})
+        with self._lock:
+            account_lock, users = self._account_locks.get(key) or (threading.Lock(), 0)
+            self._account_locks[key] = (account_lock, users + 1)
+        try:
+            with account_lock:  # One login or rehydration per account at a time
+                client = self._lookup(key, username, password, canteen_number)
+        finally:
+            with self._lock:
+                account_lock, users = self._account_locks[key]
+                if users == 1:
+                    del self._account_locks[key]
+                else:
+                    self._account_locks[key] = (account_lock, users - 1)
+        self.evict_idle()
+        return client
+
+    def _load_digest_key(self) -> bytes:
+        """Return the key of password digests stored in the backend, creating it if missing."""
+        entry = self.backend.get(_DIGEST_KEY_ENTRY)
+        if entry is None:
+            entry = {"key": os.urandom(32).hex()}
+            self.backend.put(_DIGEST_KEY_ENTRY, entry)
+            entry = self.backend.get(_DIGEST_KEY_ENTRY) or entry  # Another process may have won
+        return bytes.fromhex(entry["key"])
+
+    def _password_digest(self, key: str, password: str) -> str:
+        """Return HMAC-SHA256 digest of the password of an account."""
+        message = f"{key}\0{password}".encode()
+        return hmac.new(self._digest_key, message, hashlib.sha256).hexdigest()
+
+    def _lookup(self, key: str, username: str, password: str, canteen_number: str) -> StravaCZ:
+        """Return client from memory, rehydrate it or log in (holding the account lock)."""
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[0].user.is_logged_in:
+                if _same_password(entry[0], password):
+                    self.hits += 1
+                    self._clients[key] = (entry[0], self.clock())
+                    self._clients.move_to_end(key)  # Most recently used
+                    return entry[0]
+
+        # Not in memory, logged out or logged in with another password
+        state = self.backend.get(key)
+        if state is not None:
+            state = dict(state)
+            digest = state.pop("password_digest", None)
+            if not isinstance(digest, str) or not hmac.compare_digest(
+                digest, self._password_digest(key, password)
+            ):
+                state = None  # Saved for another password, verify it by logging in
+        if state is not None:
+            client = StravaCZ(password=password, session_state=state, **self.client_kwargs)
+        else:
+            client = StravaCZ(username, password, canteen_number, **self.client_kwargs)
+        with self._lock:
+            if state is not None:
+                self.rehydrated += 1
+            else:
+                self.misses += 1
+            self._clients[key] = (client, self.clock())
+            self._clients.move_to_end(key)
+        return client
+
+    def evict_idle(self) -> int:
+        """Evict clients over max_clients and clients idle longer than idle_timeout.
+
+        The sessions of evicted clients are saved to the backend. Evicted
+        clients are not closed as callers may still be using them; their
+        connections are released when they are garbage collected.
+
+        Returns:
+            Number of evicted clients
+        """
+        evicted = []
+        with self._lock:
+            now = self.clock()
+            while self._clients:
+                key, (client, last_used) = next(iter(self._clients.items()))
+                idle = self.idle_timeout is not None and now - last_used >= self.idle_timeout
+                if len(self._clients) <= self.max_clients and not idle:
+                    break
+                del self._clients[key]
+                evicted.append((key, client))
+            self.evictions += len(evicted)
+        for key, client in evicted:
+            self._save(key, client)
+        return len(evicted)
+
+    def _save(self, key: str, client: StravaCZ) -> None:
+        """Save session of a client with its password digest to the backend.
+
+        The stored session is dropped if the client is logged out.
+        """
+        try:
+            state = client.export_session()
+        except StravaAPIError:
+            self.backend.delete(key)
+            return
+        state["password_digest"] = self._password_digest(key, client.user.password or "")
+        self.backend.put(key, state)
+
+    def invalidate(self, username: str, canteen_number: str, logout: bool = True) -> None:
+        """Forget the client and the stored session of an account.
+
+        Args:
+            username: User's login username
+            canteen_number: Canteen number
+            logout: Log the client out on the server if it is in memory
+        """
+        key = account_key({"username": username, "canteen_number": canteen_number})
+        with self._lock:
+            entry = self._clients.pop(key, None)
+        self.backend.delete(key)
+        if entry is not None and logout:
+            try:
+                entry[0].logout()
+            except StravaAPIError:
+                pass  # The session is forgotten anyway
+
+    def stats(self) -> Dict[str, Any]:
+        """Return client count, lookup counts and hit rate.
+
+        Returns:
+            {"clients", "hits" (client in memory), "rehydrated" (client restored
+            from the backend), "misses" (login needed), "evictions", "hit_rate"
+            (share of lookups that did not need a login)}
+        """
+        with self._lock:
+            lookups = self.hits + self.rehydrated + self.misses
+            return {
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "rehydrated": self.rehydrated,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.rehydrated) / lookups if lookups else None,
+            }
+
+    def close(self, logout: bool = False) -> None:
+        """Save sessions of all clients in memory and close the backend.
+
+        Args:
+            logout: Log the clients out and delete their sessions instead of
+                saving them
+        """
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for key, (client, _) in clients:
+            if logout:
+                self.backend.delete(key)
+                try:
+                    client.logout()
+                except StravaAPIError:
+                    pass  # The session is forgotten anyway
+            else:
+                self._save(key, client)
+            client.session.close()
+        self.backend.close()
+
+    def __enter__(self) -> "SessionStore":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Save sessions and close the backend on exit."""
+        self.close()
@@ -0,0 +1,292 @@
+"""Compact binary snapshots of parsed menus shared between processes via mmap"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+from datetime import date as date_cls
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .main import MealType, Menu, OrderType
+
+# File layout (all integers little endian):
+#   header  - magic, version, meal count, day count, string blob size
+#   meals   - fixed size records sorted by meal id
+#   days    - (date ordinal, first meal index, meal count) sorted by date,
+#             meal indexes point into the day order table
+#   order   - meal record indexes in day order (meals of each day are contiguous)
+#   strings - UTF-8 blob with meal names and JSON encoded
+#             [allergens, forbidden allergens, order deadline]
+_MAGIC = b"STRVMENU"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIIQ")
+# id, date ordinal, price, name offset, name length, allergens offset,
+# allergens length, type, order type, ordered flag
+_MEAL = struct.Struct("<qidQIQIBBB")
+_DAY = struct.Struct("<iII")
+_INDEX = struct.Struct("<I")
+
+_MEAL_TYPES = list(MealType)
+_ORDER_TYPES = list(OrderType)
+
+
+def write_snapshot(menu: Menu, path: str) -> None:
+    """Write all parsed meals of a menu (all order types) to a snapshot file.
+
+    The file is written to a temporary path and atomically renamed, so
+    readers never map a partially written snapshot.
+
+    Args:
+        menu: Fetched menu
+        path: Destination file path
+    """
+    meals = [meal for day in menu._all_meals for meal in day["meals"]]
+    blob = bytearray()
+
+    def add_string(value: str) -> Tuple[int, int]:
+        data = value.encode("utf-8")
+        offset = len(blob)
+        blob.extend(data)
+        return offset, len(data)
+
+    by_id = sorted(range(len(meals)), key=lambda i: meals[i]["id"])
+    position = {meal_index: record for record, meal_index in enumerate(by_id)}
+
+    records = bytearray()
+    for meal_index in by_id:
+        meal = meals[meal_index]
+        name = add_string(meal["name"])
+        allergens = add_string(
+            json.dumps(
+                [meal["alergens"], meal["forbiddenAlergens"], meal["orderDeadline"]],
+                ensure_ascii=False,
+            )
+        )
+        records += _MEAL.pack(
+            meal["id"],
+            meal["dateObj"].toordinal(),
+            meal["price"],
+            name[0],
+            name[1],
+            allergens[0],
+            allergens[1],
+            _MEAL_TYPES.index(meal["type"]),
+            _ORDER_TYPES.index(meal["orderType"]),
+            meal["ordered"],
+        )
+
+    days = bytearray()
+    order = bytearray()
+    meal_index = 0
+    for day in menu._all_meals:
+        days += _DAY.pack(day["dateObj"].toordinal(), meal_index, len(day["meals"]))
+        for _ in day["meals"]:
+            order += _INDEX.pack(position[meal_index])
+            meal_index += 1
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(meals), len(menu._all_meals), len(blob)))
+        f.write(records)
+        f.write(days)
+        f.write(order)
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class MenuSnapshot:
+    """Read-only, memory-mapped view of a menu snapshot.
+
+    Meals are decoded lazily from the shared mapping on access, so many
+    processes mapping the same file share a single copy of the data in the
+    page cache. Returned dictionaries have the same structure as Menu meals.
+    """
+
+    def __init__(self, path: str):
+        """Map snapshot file.
+
+        Args:
+            path: Snapshot file written by write_snapshot()
+
+        Raises:
+            ValueError: If the file is not a supported snapshot or is truncated
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"{path} is not a supported menu snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, self._meal_count, self._day_count, blob_size = _HEADER.unpack_from(
+            self._view
+        )
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a supported menu snapshot")
+
+        self._meals_offset = _HEADER.size
+        self._days_offset = self._meals_offset + self._meal_count * _MEAL.size
+        self._order_offset = self._days_offset + self._day_count * _DAY.size
+        self._strings_offset = self._order_offset + self._meal_count * _INDEX.size
+        if self._strings_offset + blob_size != len(self._view):
+            self.close()
+            raise ValueError(f"{path} is truncated or corrupt")
+
+    def close(self) -> None:
+        """Release the mapping."""
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "MenuSnapshot":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close mapping on exit."""
+        self.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return str(self._view[start : start + length], "utf-8")
+
+    def _meal_id(self, record: int) -> int:
+        return int(
+            struct.unpack_from("<q", self._view, self._meals_offset + record * _MEAL.size)[0]
+        )
+
+    def _meal(self, record: int) -> Dict[str, Any]:
+        (
+            meal_id,
+            ordinal,
+            price,
+            name_offset,
+            name_length,
+            allergens_offset,
+            allergens_length,
+            meal_type,
+            order_type,
+            ordered,
+        ) = _MEAL.unpack_from(self._view, self._meals_offset + record * _MEAL.size)
+        allergens, forbidden, deadline = json.loads(
+            self._string(allergens_offset, allergens_length)
+        )
+        date = date_cls.fromordinal(ordinal)
+        return {
+            "type": _MEAL_TYPES[meal_type],
+            "orderType": _ORDER_TYPES[order_type],
+            "name": self._string(name_offset, name_length),
+            "forbiddenAlergens": forbidden,
+            "alergens": allergens,
+            "ordered": bool(ordered),
+            "id": meal_id,
+            "price": price,
+            "date": date.isoformat(),
+            "dateObj": date,
+            "orderDeadline": deadline,
+        }
+
+    def _day(self, index: int) -> Tuple[int, int, int]:
+        ordinal, first, count = _DAY.unpack_from(self._view, self._days_offset + index * _DAY.size)
+        return ordinal, first, count
+
+    def _day_meals(self, first: int, count: int) -> List[Dict[str, Any]]:
+        return [
+            self._meal(
+                _INDEX.unpack_from(self._view, self._order_offset + (first + i) * _INDEX.size)[0]
+            )
+            for i in range(count)
+        ]
+
+    def get_by_id(self, meal_id: int) -> Optional[Dict[str, Any]]:
+        """Get a specific meal by its ID using binary search.
+
+        Args:
+            meal_id: Meal identification number
+
+        Returns:
+            Meal dictionary, or None if not found
+        """
+        ids = _SortedColumn(self._meal_count, self._meal_id)
+        record = bisect.bisect_left(ids, meal_id)
+        if record < self._meal_count and ids[record] == meal_id:
+            return self._meal(record)
+        return None
+
+    def get_by_date(self, date: Union[str, date_cls]) -> Optional[Dict[str, Any]]:
+        """Get all meals (all order types) of a specific date using binary search.
+
+        Args:
+            date: Date in YYYY-MM-DD format or date object
+
+        Returns:
+            Dictionary with date and meals, or None if not found
+        """
+        if isinstance(date, str):
+            date = date_cls.fromisoformat(date)
+        ordinal = date.toordinal()
+        ordinals = _SortedColumn(self._day_count, lambda index: self._day(index)[0])
+        index = bisect.bisect_left(ordinals, ordinal)
+        if index == self._day_count or ordinals[index] != ordinal:
+            return None
+        _, first, count = self._day(index)
+        meals = self._day_meals(first, count)
+        return {
+            "date": date.isoformat(),
+            "dateObj": date,
+            "ordered": any(m["ordered"] for m in meals),
+            "meals": meals,
+        }
+
+    def is_ordered(self, meal_id: int) -> bool:
+        """Check whether a meal is ordered.
+
+        Args:
+            meal_id: Meal identification number
+
+        Returns:
+            True if meal is ordered, False otherwise
+        """
+        meal = self.get_by_id(meal_id)
+        return meal["ordered"] if meal else False
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all days (all order types) sorted by date."""
+        for index in range(self._day_count):
+            ordinal, first, count = self._day(index)
+            meals = self._day_meals(first, count)
+            date = date_cls.fromordinal(ordinal)
+            yield {
+                "date": date.isoformat(),
+                "dateObj": date,
+                "ordered": any(m["ordered"] for m in meals),
+                "meals": meals,
+            }
+
+    def __len__(self) -> int:
+        """Return the number of days in the snapshot."""
+        return self._day_count
+
+    def to_menu(self) -> Menu:
+        """Decode the whole snapshot into a regular (unattached) Menu object."""
+        menu = Menu(None)  # type: ignore[arg-type]
+        menu._all_meals = list(self)
+        return menu
+
+    def __repr__(self) -> str:
+        """Return representation of snapshot."""
+        return f"MenuSnapshot(days={self._day_count}, meals={self._meal_count})"
+
+
+class _SortedColumn:
+    """Sequence view over a sorted column of the mapping, used with bisect."""
+
+    def __init__(self, length: int, getter: Callable[[int], int]):
+        self._length = length
+        self._getter = getter
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> int:
+        return self._getter(index)
@@ -0,0 +1,215 @@
+"""Optional HTTP/2 transport multiplexing many accounts over shared connections
+
+Example:
+
+    transport = HTTP2Transport()
+    clients = [
+        StravaCZ(username, password, canteen, transport=transport)
+        for username, password, canteen in accounts
+    ]
+
+Requires the optional httpx dependency (pip install strava-cz[http2]).
+Every StravaCZ client gets its own session with its own cookies, while the
+connection pool (and so the HTTP/2 connections) is shared by all of them.
+Requests from all threads are executed by one asyncio event loop running
+in a background thread, which interleaves them as streams on the shared
+connections. The calling threads just block on the result, so StravaCZ
+keeps its synchronous API.
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Dict, Optional
+
+import requests
+
+
+def _import_httpx() -> Any:
+    """Import httpx or raise ImportError with installation hint."""
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError(
+            "HTTP/2 transport requires httpx with HTTP/2 support. "
+            "Install it with: pip install strava-cz[http2]"
+        ) from e
+    return httpx
+
+
+class _WireCounter:
+    """Stand-in for requests' response.raw, reporting bytes read from the wire."""
+
+    def __init__(self, response: Any):
+        self._response = response
+
+    def tell(self) -> int:
+        return int(self._response.num_bytes_downloaded)
+
+
+class HTTP2Response:
+    """Subset of requests.Response used by StravaCZ, backed by an httpx response."""
+
+    def __init__(self, response: Any):
+        """Wrap httpx response.
+
+        Args:
+            response: Fully read httpx.Response
+        """
+        self._response = response
+        self.status_code: int = response.status_code
+        self.headers = response.headers
+        self.content: bytes = response.content
+        self.raw = _WireCounter(response)
+        self.http_version: str = response.http_version
+
+    def json(self) -> Any:
+        """Decode JSON body.
+
+        Raises:
+            requests.JSONDecodeError: If the body is not valid JSON
+        """
+        try:
+            return self._response.json()
+        except ValueError as e:
+            raise requests.JSONDecodeError(str(e), self._response.text, 0) from e
+
+
+class HTTP2Session:
+    """Per-account session with requests.Session compatible get() and post().
+
+    Network errors are raised as requests exceptions, so StravaCZ handles
+    them the same way as with the default transport.
+    """
+
+    def __init__(self, transport: "HTTP2Transport", client: Any):
+        """Initialize session.
+
+        Args:
+            transport: Transport owning the event loop and connection pool
+            client: httpx.AsyncClient using the shared connection pool
+        """
+        self._transport = transport
+        self._client = client
+        self.cookies = client.cookies
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> HTTP2Response:
+        httpx = _import_httpx()
+        try:
+            return HTTP2Response(self._transport._run(self._client.request(method, url, **kwargs)))
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> Any:
+        """Send GET request."""
+        return self._send("GET", url, headers=headers, **kwargs)
+
+    def post(
+        self,
+        url: str,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Send POST request with JSON body."""
+        return self._send("POST", url, json=json, headers=headers, **kwargs)
+
+    def close(self) -> None:
+        """Close the session (the shared connection pool stays open)."""
+        self._transport._run(self._client.aclose())
+
+
+class HTTP2Transport:
+    """Connection pool shared by many StravaCZ clients, speaking HTTP/2.
+
+    Concurrent requests of all clients are multiplexed as streams over a few
+    connections per host instead of one connection per concurrent request.
+    Servers without HTTP/2 support are served over HTTP/1.1.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 10,
+        timeout: Optional[float] = 30.0,
+        http1: bool = True,
+    ):
+        """Initialize transport.
+
+        Args:
+            max_connections: Maximum number of connections in the shared pool
+            timeout: Request timeout in seconds (None = no timeout)
+            http1: Allow HTTP/1.1 fallback. Set to False to use HTTP/2 with
+                prior knowledge, which is needed for cleartext (http://)
+                servers such as a local test server.
+
+        Raises:
+            ImportError: If httpx with HTTP/2 support is not installed
+        """
+        httpx = _import_httpx()
+        try:
+            import h2  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "HTTP/2 transport requires the h2 package. "
+                "Install it with: pip install strava-cz[http2]"
+            ) from e
+        self.timeout = timeout
+        self._transport = httpx.AsyncHTTPTransport(
+            http1=http1,
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections),
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="HTTP2Transport", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coroutine: Coroutine[Any, Any, Any]) -> Any:
+        """Run coroutine in the transport event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def session(self) -> HTTP2Session:
+        """Create a session with its own cookies using the shared connection pool."""
+        httpx = _import_httpx()
+        client = httpx.AsyncClient(
+            transport=_SharedTransport(self._transport), timeout=self.timeout
+        )
+        return HTTP2Session(self, client)
+
+    def close(self) -> None:
+        """Close all pooled connections and stop the event loop."""
+        if self._loop.is_closed():
+            return
+        self._run(self._transport.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "HTTP2Transport":
+        """Enter context manager."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close connections on exit."""
+        self.close()
+
+
+class _SharedTransport:
+    """Delegates requests to the shared transport but never closes it."""
+
+    def __init__(self, transport: Any):
+        self._transport = transport
+
+    async def handle_async_request(self, request: Any) -> Any:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass  # Owned by HTTP2Transport
+
+    async def __aenter__(self) -> "_SharedTransport":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
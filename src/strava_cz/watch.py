@@ -0,0 +1,181 @@
+"""Menu watcher with adaptive polling and change notifications"""
+
+import threading
+import warnings
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .main import Menu, OrderType, StravaAPIError
+
+# Change event types
+MEAL_ADDED = "added"
+MEAL_REMOVED = "removed"
+MEAL_ORDERED = "ordered"
+MEAL_CANCELLED = "cancelled"
+ORDER_TYPE_CHANGED = "order_type_changed"
+MEAL_CHANGED = "changed"
+
+
+def diff_meals(
+    previous: Dict[int, Dict[str, Any]], current: Dict[int, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Compare two parses of a menu.
+
+    Args:
+        previous: Meals of the previous parse keyed by meal ID
+        current: Meals of the current parse keyed by meal ID
+
+    Returns:
+        List of change events: {"event": type, "meal": meal, "previous": meal or None}
+    """
+    events: List[Dict[str, Any]] = []
+    for meal_id, meal in current.items():
+        old = previous.get(meal_id)
+        if old is None:
+            events.append({"event": MEAL_ADDED, "meal": meal, "previous": None})
+            continue
+        if meal["ordered"] != old["ordered"]:
+            event = MEAL_ORDERED if meal["ordered"] else MEAL_CANCELLED
+            events.append({"event": event, "meal": meal, "previous": old})
+        if meal["orderType"] != old["orderType"]:
+            events.append({"event": ORDER_TYPE_CHANGED, "meal": meal, "previous": old})
+        if (meal["name"], meal["price"], meal["date"]) != (old["name"], old["price"], old["date"]):
+            events.append({"event": MEAL_CHANGED, "meal": meal, "previous": old})
+    for meal_id, old in previous.items():
+        if meal_id not in current:
+            events.append({"event": MEAL_REMOVED, "meal": old, "previous": old})
+    return events
+
+
+class MenuWatcher:
+    """Polls a menu and reports changes between successive fetches.
+
+    The polling interval adapts to order deadlines: far from any deadline the
+    menu is polled every `interval` seconds, within `fast_window` seconds
+    before the nearest deadline of an orderable meal every `fast_interval`
+    seconds, and right after the deadline passes to catch the transition to
+    OrderType.RESTRICTED.
+    """
+
+    def __init__(
+        self,
+        menu: Menu,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        interval: float = 600.0,
+        fast_interval: float = 15.0,
+        fast_window: float = 1800.0,
+        on_error: Optional[Callable[[StravaAPIError], None]] = None,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        """Initialize watcher.
+
+        Args:
+            menu: Menu of a logged in client
+            callback: Function called with every change event (see diff_meals()),
+                exceptions it raises are turned into warnings
+            interval: Polling interval far from deadlines in seconds
+            fast_interval: Polling interval close to a deadline in seconds
+            fast_window: How many seconds before a deadline to poll fast
+            on_error: Function called with errors raised by fetch() in run()
+            clock: Function returning current local time (for testing)
+        """
+        self.menu = menu
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.fast_window = fast_window
+        self.on_error = on_error
+        self.clock = clock
+        self._callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        if callback is not None:
+            self._callbacks.append(callback)
+        self._previous: Optional[Dict[int, Dict[str, Any]]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_callback(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Register another function called with every change event."""
+        self._callbacks.append(callback)
+
+    def _current_meals(self) -> Dict[int, Dict[str, Any]]:
+        return {meal["id"]: meal for meal in self.menu.get_meals(order_types=list(OrderType))}
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Fetch the menu once and report changes since the previous poll.
+
+        The first poll only records the initial state and reports no changes.
+        Exceptions raised by callbacks are turned into warnings, so a failing
+        callback neither stops polling nor hides the events from other callbacks.
+
+        Returns:
+            List of change events
+
+        Raises:
+            StravaAPIError: If fetching the menu fails
+        """
+        self.menu.fetch(**self.menu._fetch_filters)
+        current = self._current_meals()
+        events = [] if self._previous is None else diff_meals(self._previous, current)
+        self._previous = current
+        for event in events:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    warnings.warn(f"Callback for {event['event']} event failed: {e!r}")
+        return events
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Return the nearest future order deadline of an orderable meal."""
+        now = self.clock()
+        deadlines = [
+            datetime.fromisoformat(meal["orderDeadline"])
+            for meal in self.menu.get_meals(order_types=[OrderType.NORMAL])
+            if meal.get("orderDeadline")
+        ]
+        upcoming = [deadline for deadline in deadlines if deadline > now]
+        return min(upcoming) if upcoming else None
+
+    def next_interval(self) -> float:
+        """Return seconds to wait before the next poll."""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return self.interval
+
+        remaining = (deadline - self.clock()).total_seconds()
+        if remaining <= self.fast_window:
+            # Poll fast, and once more just after the deadline passes
+            return max(min(self.fast_interval, remaining + 1.0), 1.0)
+        # Wake up when the fast window starts
+        return min(self.interval, remaining - self.fast_window)
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """Poll until stop() is called (blocking).
+
+        Args:
+            max_polls: Stop after this many polls (None = run until stopped)
+        """
+        polls = 0
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except StravaAPIError as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e)
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            self._stop.wait(self.next_interval())
+
+    def start(self) -> None:
+        """Start polling in a background daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="MenuWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop polling and wait for the background thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,153 @@
+import functools
+import json
+import os
+
+import pytest
+
+from strava_cz import StravaCZ
+from strava_cz.batch import pooled_client, read_checkpoint, run_batch
+from strava_cz.mock_server import MockStravaServer
+from strava_cz.sessions import SessionStore
+
+
+def _double(account):
+    if account["n"] % 5 == 0:
+        raise ValueError(f"Bad account {account['n']}")
+    return {"ok": True, "value": account["n"] * 2, "pid": os.getpid()}
+
+
+def _fetch_menu(account, base_url):
+    client = StravaCZ(
+        account["username"], account["password"], account["canteen_number"], base_url=base_url
+    )
+    try:
+        client.menu.fetch()
+        return {"ok": True, "meals": len(client.menu.get_meals())}
+    finally:
+        client.logout()
+
+
+def _pooled_menu(account):
+    client = pooled_client(account)
+    client.menu.fetch()
+    return {"ok": True, "client": id(client), "pid": os.getpid()}
+
+
+def _accounts(count, canteens=2):
+    return [
+        {"username": f"user{n}", "canteen_number": str(n % canteens), "n": n}
+        for n in range(1, count + 1)
+    ]
+
+
+class TestBatch:
+    """Test the process-sharded batch runner."""
+
+    def test_results_are_aggregated_in_account_order(self):
+        """Records come back in input order and failures are counted by type."""
+        accounts = _accounts(20)
+        report = run_batch(accounts, _double, processes=2, threads=2, chunk_size=3)
+
+        assert [record["account"] for record in report["records"]] == [
+            account["username"] for account in accounts
+        ]
+        assert report["records"][0]["value"] == 2
+        assert (report["succeeded"], report["failed"], report["skipped"]) == (16, 4, 0)
+        assert report["errors"] == {"ValueError": 4}
+        assert sum(worker["accounts"] for worker in report["workers"].values()) == 20
+        assert os.getpid() not in report["workers"]
+
+    def test_checkpoint_resume(self, tmp_path):
+        """Completed accounts are skipped when the run is started again."""
+        checkpoint = str(tmp_path / "run.ndjson")
+        accounts = _accounts(12)
+        run_batch(accounts[:7], _double, processes=2, chunk_size=2, checkpoint=checkpoint)
+        with open(checkpoint, "a", encoding="utf-8") as f:
+            f.write('[]\n{}\n{"key": "1:user9"}\n{"key": 7, "record": {"ok": true}}\n')
+            f.write('{"key": "1:user')  # Interrupted while writing
+
+        new = []
+        report = run_batch(
+            accounts,
+            _double,
+            processes=2,
+            chunk_size=2,
+            checkpoint=checkpoint,
+            on_record=new.append,
+        )
+        assert report["skipped"] == 7
+        assert sorted(record["account"] for record in new) == sorted(
+            f"user{n}" for n in range(8, 13)
+        )
+        assert len(report["records"]) == 12
+        assert len(read_checkpoint(checkpoint)) == 12
+
+        retried = []
+        run_batch(
+            accounts,
+            _double,
+            processes=1,
+            checkpoint=checkpoint,
+            retry_failed=True,
+            on_record=retried.append,
+        )
+        assert sorted(record["account"] for record in retried) == ["user10", "user5"]
+
+    def test_duplicate_accounts(self):
+        """Accounts must be unique for checkpointing."""
+        with pytest.raises(ValueError):
+            run_batch(_accounts(2) * 2, _double)
+
+    def test_workers_use_clients(self):
+        """Worker processes run real clients against the mock server."""
+        with MockStravaServer() as server:
+            accounts = []
+            for n in range(6):
+                server.add_account(f"user{n}", "heslo", "1234")
+                accounts.append(
+                    {"username": f"user{n}", "password": "heslo", "canteen_number": "1234"}
+                )
+            server.generate_menu("1234", days=2)
+
+            task = functools.partial(_fetch_menu, base_url=server.url)
+            report = run_batch(accounts, task, processes=2, threads=3, chunk_size=3)
+
+        assert report["succeeded"] == 6
+        assert {record["meals"] for record in report["records"]} == {6}
+        assert json.dumps(report["records"])
+
+    def test_workers_reuse_pooled_clients(self, tmp_path):
+        """Clients stay logged in for all tasks of a worker and are reused by the next run."""
+        with MockStravaServer() as server:
+            accounts = []
+            for n in range(6):
+                server.add_account(f"user{n}", "heslo", "1234")
+                accounts.append(
+                    {"username": f"user{n}", "password": "heslo", "canteen_number": "1234"}
+                )
+            server.generate_menu("1234", days=2)
+            options = {"client_kwargs": {"base_url": server.url}}
+
+            report = run_batch(accounts, _pooled_menu, processes=2, threads=2, **options)
+            assert report["succeeded"] == 6
+            assert server.request_counts["login"] == 6
+            assert server.request_counts["logOut"] == 6  # When the workers exited
+
+            sessions = str(tmp_path / "sessions.db")
+            run_batch(accounts, _pooled_menu, processes=2, sessions=sessions, **options)
+            report = run_batch(accounts, _pooled_menu, processes=2, sessions=sessions, **options)
+            assert report["succeeded"] == 6
+            assert server.request_counts["login"] == 12  # Second run rehydrated all clients
+            assert server.request_counts["logOut"] == 6
+
+    def test_pooled_client_is_shared(self):
+        """Tasks in one process get the same client of an account."""
+        with MockStravaServer() as server:
+            server.add_account("jan", "heslo", "1234")
+            server.generate_menu("1234", days=1)
+            account = {"username": "jan", "password": "heslo", "canteen_number": "1234"}
+            with SessionStore(base_url=server.url) as pool, pytest.MonkeyPatch.context() as mp:
+                mp.setattr("strava_cz.batch._client_pool", pool)
+                first, second = _pooled_menu(account), _pooled_menu(account)
+            assert first["client"] == second["client"]
+            assert server.request_counts["login"] == 1
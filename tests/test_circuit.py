@@ -0,0 +1,155 @@
+import pytest
+
+from strava_cz import CircuitOpenError, DeadlineExceededError, StravaAPIError, StravaCZ
+from strava_cz.circuit import CircuitBreaker, CircuitBreakerRegistry
+from strava_cz.mock_server import MockStravaServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Only consecutive failures count towards the threshold."""
+        breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.rejected == 1
+
+    def test_half_open_probe(self):
+        """After the timeout one probe is let through and decides the next state."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 4
+        assert breaker.retry_after == 6
+
+        clock.now = 10
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # Probe already in flight
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow()
+
+    def test_release_frees_probe(self):
+        """A released probe lets the next request probe the backend."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+
+    def test_invalid_limits(self):
+        """Non-positive limits are rejected."""
+        with pytest.raises(ValueError):
+            CircuitBreakerRegistry(failure_threshold=0)
+
+
+class TestClientCircuitBreaker:
+    """Test the circuit breaker of StravaCZ against the mock server."""
+
+    def test_fails_fast_while_backend_is_down(self):
+        """Requests are not sent while the circuit is open and resume after a probe."""
+        clock = FakeClock()
+        registry = CircuitBreakerRegistry(failure_threshold=2, reset_timeout=30, clock=clock)
+        with MockStravaServer() as server:
+            server.add_account("user", "pass", canteen_number="1234")
+            server.generate_menu("1234", days=2)
+            strava = StravaCZ(
+                "user", "pass", "1234", base_url=server.url, circuit_breakers=registry
+            )
+
+            server.fail_next("objednavky", status=503, count=2)
+            for _ in range(2):
+                with pytest.raises(StravaAPIError):
+                    strava.menu.fetch()
+            assert strava.circuit_breaker.state == "open"
+            assert registry.states() == {
+                (server.url, ""): "closed",
+                (server.url, strava.user.s5url): "open",
+            }
+
+            with pytest.raises(CircuitOpenError) as excinfo:
+                strava.menu.fetch()
+            assert excinfo.value.retry_after == 30
+            assert server.request_counts["objednavky"] == 2
+
+            clock.now = 30
+            strava.menu.fetch()
+            assert strava.circuit_breaker.state == "closed"
+            assert len(strava.menu) == 2
+
+    def test_client_errors_do_not_open_circuit(self):
+        """HTTP 4xx answers prove the backend is up."""
+        registry = CircuitBreakerRegistry(failure_threshold=1)
+        with MockStravaServer() as server:
+            server.add_account("user", "pass", canteen_number="1234")
+            server.fail_next("objednavky", status=400)
+            strava = StravaCZ(
+                "user", "pass", "1234", base_url=server.url, circuit_breakers=registry
+            )
+            with pytest.raises(StravaAPIError):
+                strava.menu.fetch()
+            assert strava.circuit_breaker.state == "closed"
+
+    def test_api_errors_do_not_open_circuit(self):
+        """HTTP 555 (error caught by the API) concerns one request, not the backend."""
+        registry = CircuitBreakerRegistry(failure_threshold=2)
+        with MockStravaServer() as server:
+            server.add_account("user", "pass", canteen_number="1234")
+            server.generate_menu("1234", days=2)
+            strava = StravaCZ(
+                "user", "pass", "1234", base_url=server.url, circuit_breakers=registry
+            )
+            server.fail_next(
+                "objednavky", status=555, body={"message": "Chyba odchycena v api callu"}, count=3
+            )
+            for _ in range(3):
+                with pytest.raises(StravaAPIError):
+                    strava.menu.fetch()
+            assert strava.circuit_breaker.state == "closed"
+            strava.menu.fetch()
+            assert len(strava.menu) == 2
+
+    def test_deadline_timeouts_do_not_open_circuit(self):
+        """Requests cut short by the caller's deadline say nothing about the backend."""
+        registry = CircuitBreakerRegistry(failure_threshold=2)
+        with MockStravaServer() as server:
+            server.add_account("user", "pass", canteen_number="1234")
+            server.generate_menu("1234", days=2)
+            strava = StravaCZ(
+                "user", "pass", "1234", base_url=server.url, circuit_breakers=registry
+            )
+            server.latency = 0.2
+            for _ in range(3):
+                with pytest.raises(DeadlineExceededError):
+                    strava.menu.fetch(timeout=0.05)
+            assert strava.circuit_breaker.state == "closed"
+
+            server.latency = 0.0
+            strava.menu.fetch()
+            assert len(strava.menu) == 2
@@ -0,0 +1,103 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+from strava_cz import AuthenticationError, MealType, OrderType
+from strava_cz.cli import main
+
+
+CLIENTS = []
+
+
+def _fake_client(username, password, canteen_number):
+    """Return a fake logged in client."""
+    if password == "bad":
+        raise AuthenticationError("Login failed: Invalid credentials")
+    if password == "broken":
+        raise KeyError("uzivatel")
+    client = MagicMock()
+    CLIENTS.append(client)
+    client.user.balance = "120.00"
+    client.user.currency = "Kč"
+    meal = {
+        "type": MealType.MAIN,
+        "orderType": OrderType.NORMAL,
+        "name": f"Rizek {username}",
+        "forbiddenAlergens": None,
+        "alergens": [],
+        "ordered": True,
+        "id": 7,
+        "price": 40.0,
+        "date": "2025-09-15",
+    }
+    client.menu.get_days.return_value = [{"date": "2025-09-15", "ordered": True, "meals": [meal]}]
+    client.menu.get_meals.return_value = [meal]
+    return client
+
+
+class TestCLI:
+    """Test the strava-cz command line interface."""
+
+    @patch('strava_cz.cli.StravaCZ', side_effect=_fake_client)
+    def test_single_account_menu(self, mock_client):
+        """Menu of one account is printed in human readable form."""
+        out = io.StringIO()
+
+        code = main(["-u", "user", "-p", "pass", "-c", "1234", "menu"], out=out)
+
+        assert code == 0
+        assert "2025-09-15:" in out.getvalue()
+        assert "7 Rizek user (40.00) - [Ordered]" in out.getvalue()
+        mock_client.assert_called_once_with(username="user", password="pass", canteen_number="1234")
+
+    @patch('strava_cz.cli.StravaCZ', side_effect=_fake_client)
+    def test_order_json(self, mock_client):
+        """Order subcommand passes meal IDs and options to order_meals."""
+        out = io.StringIO()
+
+        code = main(
+            ["-u", "user", "-p", "pass", "-c", "1234", "--json", "order", "7", "8",
+             "--check-balance"],
+            out=out,
+        )
+
+        record = json.loads(out.getvalue())
+        assert code == 0
+        assert record["result"] == {"ordered": [7], "balance": 120.0}
+        client = CLIENTS[-1]
+        client.menu.order_meals.assert_called_once_with(
+            7, 8, continue_on_error=False, check_balance=True
+        )
+        client.logout.assert_called_once()
+
+    @patch('strava_cz.cli.StravaCZ', side_effect=_fake_client)
+    def test_batch_mode_ndjson(self, mock_client, tmp_path):
+        """Batch mode prints one NDJSON record per account and reports failures."""
+        accounts = tmp_path / "accounts.jsonl"
+        accounts.write_text(
+            "\n".join([
+                json.dumps({"username": "a", "password": "pass", "canteen_number": "1"}),
+                "# comment",
+                json.dumps({"username": "b", "password": "bad", "canteen_number": "1"}),
+                json.dumps({"username": "c", "password": "pass", "canteen_number": "2"}),
+                json.dumps({"username": "d", "canteen_number": "2"}),
+                json.dumps({"username": "e", "password": "broken", "canteen_number": "2"}),
+                '{"username": "f", ',
+                "[1, 2]",
+            ]),
+            encoding="utf-8",
+        )
+        out = io.StringIO()
+
+        code = main(["--accounts", str(accounts), "--workers", "3", "balance"], out=out)
+
+        lines = list(map(json.loads, out.getvalue().splitlines()))
+        records = {r["account"]: r for r in lines if r["account"]}
+        assert code == 1
+        assert set(records) == {"a", "b", "c", "d", "e"}
+        assert records["a"]["ok"] and records["a"]["result"]["balance"] == 120.0
+        assert records["b"]["error_type"] == "AuthenticationError"
+        assert records["d"]["error_type"] == "ValueError"
+        assert records["e"]["error_type"] == "KeyError"
+        assert [(r["line"], r["ok"]) for r in lines if not r["account"]] == [(7, False), (8, False)]
+        assert mock_client.call_count == 4
@@ -0,0 +1,92 @@
+import io
+import json
+
+from strava_cz.loadtest import main, percentile, run_load_test
+from strava_cz.mock_server import MockStravaServer
+
+
+def test_percentile():
+    """Nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 100) == 100
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+
+class TestLoadTest:
+    """Test the load test harness against the mock server."""
+
+    def test_run_load_test(self):
+        """All sessions succeed and every phase is measured."""
+        with MockStravaServer() as server:
+            accounts = []
+            for i in range(12):
+                server.add_account(f"user{i}", "heslo", balance=200)
+                accounts.append(
+                    {"username": f"user{i}", "password": "heslo", "canteen_number": "1234"}
+                )
+            server.generate_menu("1234", days=3)
+
+            report = run_load_test(accounts, server.url, concurrency=4, orders=2)
+
+            assert report["users"] == 12
+            assert report["failed"] == 0
+            assert report["error_rate"] == 0.0
+            assert report["throughput"] > 0
+            assert set(report["phases"]) == {"login", "fetch", "order", "verify", "logout"}
+            assert report["latency"]["p50"] <= report["latency"]["p99"]
+            assert all(len(server.ordered(f"user{i}")) == 2 for i in range(12))
+            assert server.request_counts["login"] == 12
+            assert server.request_counts["logOut"] == 12
+
+    def test_errors_are_counted(self):
+        """Failed sessions are reported by error type."""
+        with MockStravaServer() as server:
+            server.add_account("rich", "heslo", balance=200)
+            server.add_account("poor", "heslo", balance=0)
+            server.generate_menu("1234", days=2)
+            accounts = [
+                {"username": "rich", "password": "heslo", "canteen_number": "1234"},
+                {"username": "poor", "password": "heslo", "canteen_number": "1234"},
+                {"username": "ghost", "password": "heslo", "canteen_number": "1234"},
+            ]
+
+            report = run_load_test(accounts, server.url, concurrency=3, cancel=True)
+
+            assert report["succeeded"] == 1
+            assert report["errors"] == {
+                "InsufficientBalanceError": 1,
+                "AuthenticationError": 1,
+            }
+            assert server.ordered("rich") == []
+            assert server.balance("rich") == 200.0
+
+    def test_main_with_thresholds(self):
+        """Command line run with the built-in mock server and a failing threshold."""
+        out = io.StringIO()
+        assert main(["--users", "5", "--concurrency", "2", "--json"], out=out) == 0
+        report = json.loads(out.getvalue())
+        assert report["succeeded"] == 5
+
+        out = io.StringIO()
+        code = main(["--users", "5", "--failure-rate", "1.0", "--max-error-rate", "0.1"], out=out)
+        assert code == 1
+        assert "failed: 5" in out.getvalue()
+
+    def test_main_reads_accounts_file(self, tmp_path):
+        """Accounts files may contain blank lines and comments, like in the CLI."""
+        path = tmp_path / "accounts.jsonl"
+        with MockStravaServer() as server:
+            server.add_account("jan", "heslo", "1234", balance=1000)
+            server.generate_menu("1234", days=2)
+            path.write_text(
+                "# Staging accounts\n\n"
+                '{"username": "jan", "password": "heslo", "canteen_number": "1234"}\n',
+                encoding="utf-8",
+            )
+            out = io.StringIO()
+            code = main(["--url", server.url, "--accounts", str(path), "--json"], out=out)
+        assert code == 0
+        assert json.loads(out.getvalue())["succeeded"] == 1
@@ -0,0 +1,331 @@
+import threading
+import time
+
+import pytest
+
+from strava_cz import (
+    AuthenticationError,
+    DeadlineExceededError,
+    InsufficientBalanceError,
+    InvalidMealTypeError,
+    MealType,
+    SaveTimeoutError,
+    StravaAPIError,
+    StravaCZ,
+)
+from strava_cz.mock_server import MockStravaServer
+
+
+@pytest.fixture
+def server():
+    with MockStravaServer() as server:
+        server.add_account("user", "pass", canteen_number="1234", balance=100)
+        server.generate_menu("1234", days=3)
+        yield server
+
+
+def _login(server):
+    return StravaCZ("user", "pass", "1234", base_url=server.url)
+
+
+def _order(strava, meal_id):
+    """Order a meal with a short timeout, returning the exception raised."""
+    try:
+        strava.menu.order_meals(meal_id, timeout=0.2)
+    except StravaAPIError as e:
+        return e
+    return None
+
+
+class TestMockServer:
+    """Test the real client against the local mock server."""
+
+    def test_login_and_fetch(self, server):
+        """Client logs in and parses the menu served by the mock."""
+        strava = _login(server)
+        assert strava.user.is_logged_in
+        assert strava.user.balance == "100.00"
+        assert strava.user.canteen_name == "Školní jídelna 1234"
+
+        strava.menu.fetch()
+        assert len(strava.menu) == 3
+        assert len(strava.menu.get_meals(meal_types=[MealType.MAIN])) == 6
+        assert len(strava.menu.get_meals(meal_types=[MealType.SOUP])) == 3
+
+    def test_invalid_credentials(self, server):
+        """Bad password is rejected with the server message."""
+        with pytest.raises(AuthenticationError, match="Neplatné"):
+            StravaCZ("user", "wrong", "1234", base_url=server.url)
+
+    def test_order_and_cancel(self, server):
+        """Orders are committed on the server and the balance follows."""
+        strava = _login(server)
+        strava.menu.fetch()
+        first, second = [m["id"] for m in strava.menu.get_meals(meal_types=[MealType.MAIN])][::2][
+            :2
+        ]
+
+        strava.menu.order_meals(first, second)
+        assert server.ordered("user") == [first, second]
+        assert server.balance("user") == 20.0
+        assert strava.user.balance == 20.0
+        assert strava.menu.is_ordered(first)
+
+        strava.menu.cancel_meals(first)
+        assert server.ordered("user") == [second]
+        assert server.balance("user") == 60.0
+
+    def test_insufficient_balance_rolls_back(self, server):
+        """Error 35 raises InsufficientBalanceError and pending changes are discarded."""
+        strava = _login(server)
+        strava.menu.fetch()
+        ids = [m["id"] for m in strava.menu.get_meals(meal_types=[MealType.MAIN])][::2]
+
+        with pytest.raises(InsufficientBalanceError):
+            strava.menu.order_meals(*ids)
+        assert server.ordered("user") == []
+        assert server.balance("user") == 100.0
+
+    def test_soup_cannot_be_ordered(self, server):
+        """Client refuses to order soups before contacting the server."""
+        strava = _login(server)
+        strava.menu.fetch()
+        soup = strava.menu.get_meals(meal_types=[MealType.SOUP])[0]["id"]
+        with pytest.raises(InvalidMealTypeError):
+            strava.menu.order_meals(soup)
+        assert server.request_counts["pridejJidloS5"] == 0
+
+    def test_injected_failure(self, server):
+        """Injected errors surface as StravaAPIError."""
+        strava = _login(server)
+        server.fail_next("objednavky", status=500)
+        with pytest.raises(StravaAPIError):
+            strava.menu.fetch()
+        strava.menu.fetch()
+        assert len(strava.menu) == 3
+
+    def test_order_timeout_rolls_back(self, server):
+        """Running out of time cancels the unsaved changes instead of saving them."""
+        strava = _login(server)
+        strava.menu.fetch()
+        ids = [m["id"] for m in strava.menu.get_meals(meal_types=[MealType.MAIN])][::2][:2]
+
+        server.latency = 0.2
+        with pytest.raises(DeadlineExceededError, match="rolled back"):
+            strava.menu.order_meals(*ids, timeout=0.3)
+        assert server.request_counts["saveOrders"] == 0
+        assert server.request_counts["nactiVlastnostiPA"] == 1
+
+        server.latency = 0.0
+        strava.menu.order_meals(ids[0], timeout=5)
+        assert server.ordered("user") == [ids[0]]
+
+    def test_save_timeout_after_commit(self, server, monkeypatch):
+        """A save committed after the client gave up is not reported as rolled back."""
+        strava = _login(server)
+        strava.menu.fetch()
+        meal_id = strava.menu.get_meals(meal_types=[MealType.MAIN])[0]["id"]
+        handle = server.handle
+
+        def slow_save(endpoint, payload):
+            result = handle(endpoint, payload)
+            if endpoint == "saveOrders":
+                time.sleep(0.5)  # Committed, the answer comes too late
+            return result
+
+        monkeypatch.setattr(server, "handle", slow_save)
+        with pytest.raises(SaveTimeoutError, match="were saved") as excinfo:
+            strava.menu.order_meals(meal_id, timeout=0.3)
+        assert excinfo.value.saved is True
+        assert server.ordered("user") == [meal_id]
+        assert strava.menu.is_ordered(meal_id)
+        assert server.request_counts["nactiVlastnostiPA"] == 0
+
+    def test_save_timeout_before_commit(self, server, monkeypatch):
+        """A save not committed when the menu is re-fetched is rolled back."""
+        strava = _login(server)
+        strava.menu.fetch()
+        meal_id = strava.menu.get_meals(meal_types=[MealType.MAIN])[0]["id"]
+        handle = server.handle
+
+        def slow_save(endpoint, payload):
+            if endpoint == "saveOrders":
+                time.sleep(0.5)  # Not committed yet when the client gives up
+            return handle(endpoint, payload)
+
+        monkeypatch.setattr(server, "handle", slow_save)
+        with pytest.raises(SaveTimeoutError, match="not saved.*rolled back") as excinfo:
+            strava.menu.order_meals(meal_id, timeout=0.3)
+        assert excinfo.value.saved is False
+        time.sleep(0.4)  # Let the late save finish
+        assert server.ordered("user") == []
+        assert not strava.menu.is_ordered(meal_id)
+
+    def test_timeout_covers_waiting_for_lock(self, server):
+        """The deadline includes waiting for another transaction of the account."""
+        strava = _login(server)
+        strava.menu.fetch()
+        meal_id = strava.menu.get_meals(meal_types=[MealType.MAIN])[0]["id"]
+
+        started = time.monotonic()
+        with strava._lock:  # Another transaction in progress
+            errors: list = []
+            thread = threading.Thread(target=lambda: errors.append(_order(strava, meal_id)))
+            thread.start()
+            thread.join(timeout=2)
+        thread.join()
+        assert isinstance(errors[0], DeadlineExceededError)
+        assert time.monotonic() - started < 1
+        assert server.request_counts["pridejJidloS5"] == 0
+
+    def test_session_timeout_without_deadline(self, server):
+        """Requests without a deadline leave the session's own timeout in place."""
+        strava = _login(server)
+        calls = []
+        post = strava.session.post
+        strava.session.post = lambda *args, **kwargs: calls.append(kwargs) or post(*args, **kwargs)
+
+        strava.menu.fetch()
+        strava.menu.fetch(timeout=5)
+        assert "timeout" not in calls[0]
+        assert 0 < calls[1]["timeout"] <= 5
+
+    def test_fetch_timeout(self, server):
+        """The remaining time is used as request timeout."""
+        strava = _login(server)
+        server.latency = 0.5
+        with pytest.raises(DeadlineExceededError, match="during objednavky"):
+            strava.menu.fetch(timeout=0.1)
+
+    def test_client_timeout_is_quiet(self, server, capfd):
+        """Connections closed by timed out clients do not print server tracebacks."""
+        strava = _login(server)
+        server.latency = 0.2
+        with pytest.raises(DeadlineExceededError):
+            strava.menu.fetch(timeout=0.05)
+        time.sleep(0.3)  # Let the server write the response to the closed connection
+        assert "Traceback" not in capfd.readouterr().err
+
+    def test_relogin_after_session_expiry(self, server):
+        """Expired sessions are renewed transparently for idempotent requests."""
+        strava = _login(server)
+        old_sid = strava.user.sid
+        server.expire_sessions()
+
+        strava.menu.fetch()
+        assert len(strava.menu) == 3
+        assert strava.user.sid != old_sid
+        assert server.request_counts["login"] == 2
+
+    def test_order_after_session_expiry(self, server):
+        """An order transaction hitting an expired session is sent again after re-login."""
+        strava = _login(server)
+        strava.menu.fetch()
+        meal_id = strava.menu.get_meals(meal_types=[MealType.MAIN])[0]["id"]
+        server.expire_sessions()
+
+        strava.menu.order_meals(meal_id)
+        assert server.ordered("user") == [meal_id]
+        assert server.request_counts["login"] == 2
+        assert server.request_counts["pridejJidloS5"] == 2
+        assert server.request_counts["saveOrders"] == 1
+
+    def test_relogin_respects_deadline(self, server):
+        """The re-login after an expired session is bounded by the caller's timeout."""
+        strava = _login(server)
+        server.expire_sessions()
+        server.latency = 0.5
+
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            strava.menu.fetch(timeout=0.7)
+        assert time.monotonic() - started < 0.9
+        assert strava.user.is_logged_in
+
+        server.latency = 0.0
+        strava.menu.fetch()
+        assert len(strava.menu) == 3
+
+    def test_logout_after_session_expiry(self, server):
+        """Logging out of an expired session does not log in again."""
+        strava = _login(server)
+        server.expire_sessions()
+
+        assert strava.logout()
+        assert not strava.user.is_logged_in
+        assert server.request_counts["login"] == 1
+
+    def test_connection_reuse(self, server):
+        """The client keeps one HTTP/1.1 connection alive across requests."""
+        strava = _login(server)
+        for _ in range(5):
+            strava.menu.fetch()
+        strava.logout()
+        assert sum(server.request_counts.values()) == 7
+        assert server.connections == 1
+
+    def test_transfer_stats(self, server):
+        """Stats report compressed wire bytes and decoded bytes per endpoint."""
+        strava = _login(server)
+        assert "gzip" in strava.headers["Accept-Encoding"]
+        strava.menu.fetch()
+
+        menu_stats = strava.stats["endpoints"]["objednavky"]
+        assert menu_stats["requests"] == 1
+        assert menu_stats["encoding"] == "gzip"
+        assert 0 < menu_stats["wire_bytes"] < menu_stats["decoded_bytes"]
+        assert strava.stats["requests"] == 2
+        assert strava.stats["decoded_bytes"] > strava.stats["wire_bytes"]
+
+        strava.reset_stats()
+        assert strava.stats == {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0, "endpoints": {}}
+
+    def test_event_callbacks(self, server):
+        """Callbacks receive order, balance and refresh events."""
+        strava = _login(server)
+        events = []
+        strava.menu.add_callback(events.append)
+        strava.menu.fetch()
+        meal_id = strava.menu.get_meals(meal_types=[MealType.MAIN])[0]["id"]
+
+        strava.menu.order_meals(meal_id)
+        assert [e["event"] for e in events] == [
+            "menu_refreshed",
+            "balance_updated",
+            "menu_refreshed",
+            "order_placed",
+        ]
+        assert events[1]["balance"] == 60.0 and events[1]["previous"] == "100.00"
+        assert events[3]["meal"]["ordered"] and events[3]["client"] is strava
+
+        orders = []
+        strava.add_callback(orders.append, events=["order_placed", "order_cancelled"])
+        strava.menu.order_meals(meal_id)  # Already ordered - no event
+        strava.menu.cancel_meals(meal_id)
+        assert [(e["event"], e["meal_id"]) for e in orders] == [("order_cancelled", meal_id)]
+
+        strava.menu.remove_callback(events.append)
+        strava.menu.fetch()
+        assert events[-1]["event"] == "order_cancelled"
+        with pytest.raises(ValueError):
+            strava.add_callback(print, events=["ordered"])
+
+    def test_fetch_stats(self, server):
+        """Fetch records phase durations and counts."""
+        strava = _login(server)
+        assert strava.menu.fetch_stats == {}
+        strava.menu.fetch()
+
+        stats = strava.menu.fetch_stats
+        assert (stats["days"], stats["meals"]) == (3, 9)
+        assert stats["rows"] >= stats["meals"] and stats["tables"] >= 1
+        phases = ("request", "decode", "parse", "index")
+        assert all(stats[phase] >= 0 for phase in phases)
+        assert sum(stats[phase] for phase in phases) <= stats["total"]
+
+    def test_accept_encoding_matches_urllib3(self):
+        """Only codings urllib3 can decode are advertised."""
+        from urllib3.util.request import ACCEPT_ENCODING
+
+        advertised = {coding.strip() for coding in StravaCZ.ACCEPT_ENCODING.split(",")}
+        assert advertised == set(ACCEPT_ENCODING.split(","))
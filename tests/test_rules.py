@@ -0,0 +1,99 @@
+from unittest.mock import MagicMock
+
+from strava_cz import Menu, OrderPolicy, OrderPlan, RuleEngine
+
+
+def _menu(meals):
+    """Build a parsed Menu from raw meal entries without any network access."""
+    menu = Menu(MagicMock())
+    menu.raw_data = {"table0": meals}
+    menu._parse_menu_data()
+    return menu
+
+
+def _meal(veta, datum, nazev, pocet=0, cena="40.00", alergeny=None, den=""):
+    return {
+        "datum": datum,
+        "druh_popis": "Oběd 1",
+        "delsiPopis": nazev,
+        "nazev": nazev,
+        "zakazaneAlergeny": None,
+        "alergeny": alergeny if alergeny is not None else [],
+        "omezeniObj": {"den": den},
+        "pocet": pocet,
+        "veta": str(veta),
+        "cena": cena,
+    }
+
+
+class TestRuleEngine:
+    """Test evaluating order policies."""
+
+    def test_preferred_names_and_limits(self):
+        """Preferred meals win; allergens and price cap exclude meals."""
+        menu = _menu([
+            _meal(1, "15.09.2025", "Svickova"),
+            _meal(2, "15.09.2025", "Rizek s bramborem"),
+            _meal(3, "16.09.2025", "Rizek se salatem", alergeny=[["07", "Mléko"]]),
+            _meal(4, "16.09.2025", "Testoviny", cena="80.00"),
+            _meal(5, "16.09.2025", "Cocka"),
+        ])
+        policy = OrderPolicy(
+            preferred_names=["rizek"], forbidden_allergens=["07"], max_price=50
+        )
+
+        plan = RuleEngine().plan(menu, policy)
+
+        assert plan.order == [2, 5]
+        assert plan.cancel == []
+
+    def test_skip_days_and_cancel_unwanted(self):
+        """Skipped days are cancelled, allowed orders are kept."""
+        menu = _menu([
+            _meal(1, "15.09.2025", "Svickova", pocet=1),  # Monday
+            _meal(2, "16.09.2025", "Rizek", pocet=1),
+            _meal(3, "16.09.2025", "Cocka"),
+            _meal(4, "17.09.2025", "Ryba", pocet=1, alergeny=[["04", "Ryby"]]),
+            _meal(5, "17.09.2025", "Kure"),
+        ])
+        policy = OrderPolicy(
+            forbidden_allergens=["Ryby"], skip_days=[0], cancel_unwanted=True
+        )
+
+        plan = RuleEngine().plan(menu, policy)
+
+        assert plan == OrderPlan(order=[5], cancel=[1, 4])
+
+    def test_no_fallback_and_restricted_days(self):
+        """Without fallback only preferred meals are ordered; restricted days are ignored."""
+        menu = _menu([
+            _meal(1, "15.09.2025", "Rizek", den="CO"),
+            _meal(2, "16.09.2025", "Cocka"),
+        ])
+        plans = RuleEngine().plan_many(
+            [("a", menu, OrderPolicy(preferred_names=["rizek"], fallback=False)),
+             ("b", menu, OrderPolicy())]
+        )
+
+        assert plans["a"].is_empty()
+        assert plans["b"].order == [2]
+        assert plans["b"].account == "b"
+
+    def test_execute_many(self):
+        """Plans are fed into Menu.apply_plan and errors collected per account."""
+        from strava_cz import StravaAPIError
+
+        ok_menu, failing_menu = MagicMock(), MagicMock()
+        failing_menu.apply_plan.side_effect = StravaAPIError("boom")
+        plans = [
+            (ok_menu, OrderPlan(order=[1], cancel=[2], account="ok")),
+            (failing_menu, OrderPlan(order=[3], account="bad")),
+            (MagicMock(), OrderPlan(account="empty")),
+        ]
+
+        results = RuleEngine().execute_many(plans, max_workers=2)
+
+        ok_menu.apply_plan.assert_called_once_with(plans[0][1], continue_on_error=False)
+        assert results["ok"] is None
+        assert str(results["bad"]) == "boom"
+        assert "empty" not in results
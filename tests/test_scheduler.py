@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from strava_cz import AuthenticationError, OrderScheduler, StravaAPIError
+
+
+def _client(username):
+    client = MagicMock()
+    client.user.username = username
+    client.user.is_logged_in = True
+    return client
+
+
+class TestOrderScheduler:
+    """Test firing order batches at a precise instant."""
+
+    def test_orders_fire_at_target(self):
+        """All batches start right at the target after clients are warmed up."""
+        target = time.time() + 0.3
+        clients = [_client(f"user{i}") for i in range(5)]
+        order_times = []
+        for client in clients:
+            client.menu.order_meals.side_effect = lambda *a, **k: order_times.append(time.time())
+        scheduler = OrderScheduler(target, lead_time=0.2)
+        for client in clients:
+            scheduler.add([1, 2], client=client, continue_on_error=True)
+
+        results = scheduler.run()
+
+        assert [r["account"] for r in results] == [f"user{i}" for i in range(5)]
+        assert all(r["ok"] for r in results)
+        assert all(0 <= r["start_latency"] < 0.1 for r in results)
+        assert min(order_times) >= target
+        for client in clients:
+            client.menu.fetch.assert_called_once()
+            client.menu.order_meals.assert_called_once_with(1, 2, continue_on_error=True)
+
+    @patch('strava_cz.scheduler.StravaCZ')
+    def test_credentials_and_failures(self, mock_StravaCZ):
+        """Clients are created from credentials; login and order errors are reported."""
+        good = _client("good")
+        failing = _client("failing")
+        failing.menu.order_meals.side_effect = StravaAPIError("Failed to order meal with ID 1")
+
+        def create(username, password, canteen_number):
+            if password == "bad":
+                raise AuthenticationError("Login failed: Invalid credentials")
+            return {"good": good, "failing": failing}[username]
+
+        mock_StravaCZ.side_effect = create
+        scheduler = OrderScheduler(time.time() + 0.1, lead_time=0.1)
+        for username, password in [("good", "pass"), ("bad", "bad"), ("failing", "pass")]:
+            scheduler.add(
+                [1], credentials={
+                    "username": username, "password": password, "canteen_number": "1234"
+                },
+                refresh=True,
+            )
+
+        results = {r["account"]: r for r in scheduler.run()}
+        summary = OrderScheduler.summary(list(results.values()))
+
+        assert results["good"]["ok"]
+        assert good.menu.fetch.call_count == 2  # Warm-up and refresh at the target
+        assert "Invalid credentials" in results["bad"]["error"]
+        assert "Failed to order" in results["failing"]["error"]
+        assert summary["succeeded"] == 1 and summary["failed"] == 2
+
+    def test_bounded_workers(self):
+        """Many accounts share at most max_workers threads."""
+        clients = [_client(f"user{i}") for i in range(20)]
+        threads = set()
+        for client in clients:
+            client.menu.fetch.side_effect = lambda *a, **k: threads.add(threading.get_ident())
+            client.menu.order_meals.side_effect = lambda *a, **k: threads.add(
+                threading.get_ident()
+            )
+        scheduler = OrderScheduler(time.time() + 0.1, lead_time=0.1, max_workers=3)
+        for client in clients:
+            scheduler.add([1], client=client)
+
+        results = scheduler.run()
+
+        assert all(r["ok"] for r in results)
+        assert len(threads) <= 6  # Three for warm-up, three for firing
@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from strava_cz import AuthenticationError
+from strava_cz.mock_server import MockStravaServer
+from strava_cz.sessions import SessionStore, SQLiteSessionBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def server():
+    with MockStravaServer() as server:
+        for n in range(3):
+            server.add_account(f"user{n}", "heslo", "1234", balance=100)
+        server.generate_menu("1234", days=2)
+        yield server
+
+
+class TestSessionStore:
+    """Test the session store against the mock server."""
+
+    def test_lru_eviction_and_rehydration(self, server):
+        """Evicted clients are restored from their session without logging in."""
+        store = SessionStore(max_clients=2, idle_timeout=None, base_url=server.url)
+        first = store.client("user0", "heslo", "1234")
+        assert store.client("user0", "heslo", "1234") is first
+        store.client("user1", "heslo", "1234")
+        store.client("user2", "heslo", "1234")  # Evicts user0
+        assert server.request_counts["login"] == 3
+
+        restored = store.client("user0", "heslo", "1234")
+        assert restored is not first
+        assert restored.user.sid == first.user.sid
+        assert restored.user.canteen_name == first.user.canteen_name
+        restored.menu.fetch()
+        assert len(restored.menu) == 2
+        assert server.request_counts["login"] == 3
+
+        assert store.stats() == {
+            "clients": 2,
+            "hits": 1,
+            "rehydrated": 1,
+            "misses": 3,
+            "evictions": 2,
+            "hit_rate": 0.4,
+        }
+
+    def test_idle_eviction_and_expired_session(self, server):
+        """Idle clients are evicted and expired sessions renewed by re-login."""
+        clock = FakeClock()
+        store = SessionStore(idle_timeout=60, clock=clock, base_url=server.url)
+        store.client("user0", "heslo", "1234")
+        clock.now = 30
+        store.client("user1", "heslo", "1234")
+        clock.now = 61
+        assert store.evict_idle() == 1
+        assert store.stats()["clients"] == 1
+
+        server.expire_sessions()
+        client = store.client("user0", "heslo", "1234")
+        client.menu.fetch()
+        assert client.user.is_logged_in
+        assert server.request_counts["login"] == 3
+
+    def test_sqlite_backend_survives_restart(self, server, tmp_path):
+        """Sessions saved on close are rehydrated by a new store."""
+        path = str(tmp_path / "sessions.db")
+        with SessionStore(backend=SQLiteSessionBackend(path), base_url=server.url) as store:
+            sid = store.client("user0", "heslo", "1234").user.sid
+
+        with SessionStore(backend=SQLiteSessionBackend(path), base_url=server.url) as store:
+            client = store.client("user0", "heslo", "1234")
+            assert client.user.sid == sid
+            assert store.stats()["rehydrated"] == 1
+
+            store.invalidate("user0", "1234")
+            assert server.request_counts["logOut"] == 1
+            store.client("user0", "heslo", "1234")
+            assert server.request_counts["login"] == 2
+
+    def test_wrong_password_is_rejected(self, server, tmp_path):
+        """Cached clients and stored sessions are only used with the right password."""
+        path = str(tmp_path / "sessions.db")
+        with SessionStore(backend=SQLiteSessionBackend(path), base_url=server.url) as store:
+            client = store.client("user0", "heslo", "1234")
+            with pytest.raises(AuthenticationError):
+                store.client("user0", "spatne", "1234")
+            assert store.client("user0", "heslo", "1234") is client
+
+        with SessionStore(backend=SQLiteSessionBackend(path), base_url=server.url) as store:
+            with pytest.raises(AuthenticationError):
+                store.client("user0", "spatne", "1234")
+            store.client("user0", "heslo", "1234")
+            assert store.stats()["rehydrated"] == 1
+        assert server.request_counts["login"] == 3  # Both wrong passwords checked by the server
+
+    def test_eviction_keeps_clients_usable(self, server, monkeypatch):
+        """Evicted clients are not closed and account locks are dropped when unused."""
+        store = SessionStore(max_clients=1, idle_timeout=None, base_url=server.url)
+        first = store.client("user0", "heslo", "1234")
+        monkeypatch.setattr(first.session, "close", pytest.fail)
+        for n in range(1, 3):
+            store.client(f"user{n}", "heslo", "1234")
+        first.menu.fetch()
+        assert len(first.menu) == 2
+        assert store._account_locks == {}
+
+        with pytest.raises(AuthenticationError):
+            store.client("nobody", "heslo", "1234")
+        assert store._account_locks == {}
+
+    def test_concurrent_lookups_log_in_once(self, server):
+        """Threads asking for the same account at once share one login."""
+        store = SessionStore(max_clients=1, idle_timeout=None, base_url=server.url)
+        server.latency = 0.05
+        for _ in range(3):  # Evicted by user1 between the rounds
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                clients = list(
+                    executor.map(lambda _: store.client("user0", "heslo", "1234"), range(8))
+                )
+            assert len({id(client) for client in clients}) == 1
+            store.client("user1", "heslo", "1234")
+        assert server.request_counts["login"] == 2
+        assert store._account_locks == {}
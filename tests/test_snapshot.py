@@ -0,0 +1,91 @@
+import multiprocessing
+from unittest.mock import MagicMock
+
+import pytest
+
+from strava_cz import Menu, MenuSnapshot, OrderType, write_snapshot
+
+
+def _menu():
+    """Build a parsed Menu from raw meal entries without any network access."""
+    def meal(veta, datum, druh_popis="Oběd 1", nazev=None, pocet=0, den=""):
+        return {
+            "datum": datum,
+            "druh_popis": druh_popis,
+            "delsiPopis": nazev or f"Jídlo {veta}",
+            "nazev": nazev or f"Jídlo {veta}",
+            "zakazaneAlergeny": None,
+            "alergeny": [["07", "Mléko"]],
+            "omezeniObj": {"den": den},
+            "pocet": pocet,
+            "veta": str(veta),
+            "cena": "42.50",
+            "casKonec": "2025-09-12T15:00:00",
+        }
+
+    menu = Menu(MagicMock())
+    menu.raw_data = {
+        "table0": [meal(75, "15.09.2025", "Polévka", "Vývar"), meal(9, "15.09.2025", pocet=1)],
+        "table1": [meal(3, "16.09.2025", den="CO"), meal(12, "16.09.2025", "Oběd 2")],
+    }
+    menu._parse_menu_data()
+    return menu
+
+
+def _lookup_in_child(path, queue):
+    with MenuSnapshot(path) as snapshot:
+        queue.put(snapshot.get_by_id(12)["name"])
+
+
+class TestMenuSnapshot:
+    """Test memory-mapped menu snapshots."""
+
+    def test_roundtrip_and_lookups(self, tmp_path):
+        """Snapshot lookups return the same meals as the original menu."""
+        menu = _menu()
+        path = str(tmp_path / "menu.snap")
+        write_snapshot(menu, path)
+
+        with MenuSnapshot(path) as snapshot:
+            assert len(snapshot) == 2
+            for meal_id in (75, 9, 3, 12):
+                assert snapshot.get_by_id(meal_id) == menu.get_by_id(meal_id)
+            assert snapshot.get_by_id(4) is None
+            assert snapshot.get_by_date("2025-09-16") == menu.get_by_date("2025-09-16")
+            assert snapshot.get_by_date("2025-09-17") is None
+            assert snapshot.is_ordered(9)
+            order_types = list(OrderType)
+            assert snapshot.to_menu().get_days(order_types=order_types) == menu.get_days(
+                order_types=order_types
+            )
+
+    def test_shared_between_processes(self, tmp_path):
+        """Other processes can map and read the same file."""
+        path = str(tmp_path / "menu.snap")
+        write_snapshot(_menu(), path)
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_lookup_in_child, args=(path, queue))
+        process.start()
+        process.join(timeout=30)
+
+        assert queue.get(timeout=5) == "Jídlo 12"
+
+    def test_invalid_file(self, tmp_path):
+        """Files that are not snapshots are rejected."""
+        path = tmp_path / "menu.snap"
+        path.write_bytes(b"x" * 64)
+
+        with pytest.raises(ValueError):
+            MenuSnapshot(str(path))
+
+    def test_truncated_file(self, tmp_path):
+        """Snapshots cut short or with trailing data are rejected."""
+        path = tmp_path / "menu.snap"
+        write_snapshot(_menu(), str(path))
+        data = path.read_bytes()
+
+        for corrupt in (b"", data[:20], data[:-1], data + b"x"):
+            path.write_bytes(corrupt)
+            with pytest.raises(ValueError):
+                MenuSnapshot(str(path))
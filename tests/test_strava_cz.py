@@ -7,6 +7,9 @@
 # ale byly mnou zkontrolovany.
 # ===========================
 
+import threading
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
 from strava_cz import StravaCZ, AuthenticationError, MealType, OrderType
@@ -1073,3 +1076,667 @@ class TestStravaCZ:
         
         # Balance should be updated to 60.00
         assert s.user.balance == 60.00  # Now it's a float after update
+
+
+def _login_payload(konto="100.00"):
+    """Return a fake login response body."""
+    return {
+        "sid": "SID123",
+        "s5url": "https://fake.s5url",
+        "cislo": "1234",
+        "jmeno": "user",
+        "uzivatel": {
+            "id": "user",
+            "email": "u@e.cz",
+            "konto": konto,
+            "mena": "Kč",
+            "nazevJidelny": "Test Canteen"
+        },
+        "betatest": False,
+        "ignoreCert": False,
+        "zustatPrihlasen": False
+    }
+
+
+def _raw_meal(veta, datum, druh_popis="Oběd1", pocet=0, cena="40.00", den="", nazev=None):
+    """Return a fake raw meal entry as returned by the objednavky endpoint."""
+    nazev = nazev or f"Meal {veta}"
+    return {
+        "id": int(veta),
+        "datum": datum,
+        "druh_popis": druh_popis,
+        "delsiPopis": nazev,
+        "nazev": nazev,
+        "zakazaneAlergeny": None,
+        "alergeny": [["01", "Lepek"]],
+        "omezeniObj": {"den": den},
+        "pocet": pocet,
+        "veta": str(veta),
+        "cena": cena,
+        "casKonec": "2025-09-12T15:00:00",
+    }
+
+
+class FakeBackend:
+    """Thread-safe fake of the Strava API used as a drop-in requests.Session."""
+
+    def __init__(self, meals, konto="100.00", delay=0.0):
+        self.meals = meals  # list of raw meal dicts (single day table per date)
+        self.konto = float(konto)
+        self.delay = delay
+        self.pending = {}
+        self.log = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return MagicMock(status_code=200)
+
+    def _response(self, status_code, body):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = body
+        return response
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            self.log.append((threading.get_ident(), endpoint))
+            if endpoint == "login":
+                return self._response(200, _login_payload(f"{self.konto:.2f}"))
+            if endpoint == "objednavky":
+                tables = {}
+                for meal in self.meals:
+                    tables.setdefault(meal["datum"], []).append(dict(meal))
+                return self._response(
+                    200, {f"table{i}": t for i, t in enumerate(tables.values())}
+                )
+            if endpoint == "pridejJidloS5":
+                self.pending[json["veta"]] = int(json["pocet"])
+                return self._response(200, {"konto": f"{self.konto:.2f}"})
+            if endpoint == "saveOrders":
+                for meal in self.meals:
+                    if meal["veta"] in self.pending:
+                        meal["pocet"] = self.pending[meal["veta"]]
+                self.pending = {}
+                return self._response(200, {})
+            if endpoint == "nactiVlastnostiPA":
+                self.pending = {}
+                return self._response(200, {"konto": f"{self.konto:.2f}"})
+            if endpoint == "logOut":
+                return self._response(200, {})
+            return self._response(404, {"message": "Unknown endpoint"})
+
+
+class TestThreadSafety:
+    """Test sharing one client between threads."""
+
+    @patch('strava_cz.main.requests.Session')
+    def test_concurrent_readers_see_consistent_snapshots(self, mock_Session):
+        """Readers running during re-fetches never observe half-built menus."""
+        backend = FakeBackend(
+            [_raw_meal(i, f"{1 + i // 2:02d}-09.2025", pocet=i % 2) for i in range(40)]
+        )
+        mock_Session.return_value = backend
+
+        s = StravaCZ("user", "pass", "1234")
+        s.menu.fetch()
+        stop = threading.Event()
+        failures = []
+
+        def refresher():
+            while not stop.is_set():
+                s.menu.fetch()
+
+        def reader():
+            for _ in range(200):
+                days = s.menu.get_days()
+                if len(days) != 20:
+                    failures.append(len(days))
+                for day in days:
+                    if day["ordered"] != any(m["ordered"] for m in day["meals"]):
+                        failures.append(day["date"])
+
+        writers = [threading.Thread(target=refresher) for _ in range(2)]
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for t in writers + readers:
+            t.start()
+        for t in readers:
+            t.join()
+        stop.set()
+        for t in writers:
+            t.join()
+
+        assert failures == []
+
+    @patch('strava_cz.main.requests.Session')
+    def test_order_transactions_are_serialized(self, mock_Session):
+        """Concurrent order/cancel calls on one account never interleave."""
+        backend = FakeBackend(
+            [_raw_meal(i, f"{10 + i:02d}-09.2025") for i in range(1, 9)], delay=0.001
+        )
+        mock_Session.return_value = backend
+
+        s = StravaCZ("user", "pass", "1234")
+        s.menu.fetch()
+
+        def worker(meal_id):
+            s.menu.order_meals(meal_id)
+            s.menu.cancel_meals(meal_id)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Every transaction is pridejJidloS5 -> saveOrders -> objednavky by a single thread
+        endpoints = [endpoint for _, endpoint in backend.log]
+        start = endpoints.index("pridejJidloS5")
+        transactions = [backend.log[i:i + 3] for i in range(start, len(backend.log), 3)]
+        assert len(transactions) == 16
+        for transaction in transactions:
+            assert [e for _, e in transaction] == ["pridejJidloS5", "saveOrders", "objednavky"]
+            assert len({tid for tid, _ in transaction}) == 1
+        assert s.menu.get_meals(ordered=True) == []
+
+
+class TestSelectionPlanner:
+    """Test diffing a desired selection against the current menu."""
+
+    def _client(self, mock_Session):
+        backend = FakeBackend([
+            _raw_meal(1, "15-09.2025", pocet=1),
+            _raw_meal(2, "15-09.2025", druh_popis="Oběd2"),
+            _raw_meal(3, "16-09.2025"),
+            _raw_meal(4, "16-09.2025", druh_popis="Oběd2"),
+            _raw_meal(5, "17-09.2025"),
+            _raw_meal(6, "17-09.2025", druh_popis="Oběd2", pocet=1),
+            _raw_meal(7, "17-09.2025", druh_popis="Polévka", nazev="Vyvar"),
+        ])
+        mock_Session.return_value = backend
+        s = StravaCZ("user", "pass", "1234")
+        s.menu.fetch()
+        return s, backend
+
+    @patch('strava_cz.main.requests.Session')
+    def test_plan_selection_is_minimal(self, mock_Session):
+        """Unchanged days produce no changes, swaps cancel and order."""
+        s, _ = self._client(mock_Session)
+
+        plan = s.menu.plan_selection(
+            {"2025-09-15": 2, "2025-09-16": 3, "2025-09-17": 6}
+        )
+        assert plan.order == [2, 3]
+        assert plan.cancel == [1]
+
+        plan = s.menu.plan_selection({"2025-09-17": None, "2025-09-16": None})
+        assert plan.order == []
+        assert plan.cancel == [6]
+
+    @patch('strava_cz.main.requests.Session')
+    def test_plan_selection_validation(self, mock_Session):
+        """Unknown days, meals from other days and soups are rejected."""
+        from strava_cz import InvalidMealTypeError, StravaAPIError
+
+        s, _ = self._client(mock_Session)
+
+        with pytest.raises(StravaAPIError):
+            s.menu.plan_selection({"2025-09-20": None})
+        with pytest.raises(StravaAPIError):
+            s.menu.plan_selection({"2025-09-15": 3})
+        with pytest.raises(InvalidMealTypeError):
+            s.menu.plan_selection({"2025-09-17": 7})
+
+    @patch('strava_cz.main.requests.Session')
+    def test_apply_plan_single_transaction(self, mock_Session):
+        """Only changed meals are sent and saved with one saveOrders call."""
+        s, backend = self._client(mock_Session)
+        backend.log.clear()
+
+        plan = s.menu.plan_selection(
+            {"2025-09-15": 2, "2025-09-16": 3, "2025-09-17": 6}
+        )
+        s.menu.apply_plan(plan)
+
+        endpoints = [endpoint for _, endpoint in backend.log]
+        assert endpoints == [
+            "pridejJidloS5", "pridejJidloS5", "pridejJidloS5", "saveOrders", "objednavky"
+        ]
+        assert [m["id"] for m in s.menu.get_meals(ordered=True)] == [2, 3, 6]
+
+    @patch('strava_cz.main.requests.Session')
+    def test_apply_plan_rejects_duplicate_days(self, mock_Session):
+        """A plan ordering two meals of one day is rejected before any request."""
+        from strava_cz import DuplicateMealError, OrderPlan
+
+        s, backend = self._client(mock_Session)
+        backend.log.clear()
+
+        with pytest.raises(DuplicateMealError):
+            s.menu.apply_plan(OrderPlan(order=[3, 4]))
+        assert backend.log == []
+
+    @patch('strava_cz.main.requests.Session')
+    def test_apply_plan_rejects_unknown_meals(self, mock_Session):
+        """A stale plan with meals missing from the menu fails before any request."""
+        from strava_cz import OrderPlan, StravaAPIError
+
+        s, backend = self._client(mock_Session)
+        backend.log.clear()
+
+        for plan in (OrderPlan(order=[999]), OrderPlan(order=[2], cancel=[999])):
+            with pytest.raises(StravaAPIError, match="999 not found"):
+                s.menu.apply_plan(plan)
+        assert backend.log == []
+
+
+class TestBalancePlanning:
+    """Test local balance feasibility checks."""
+
+    def _client(self, mock_Session, konto="100.00"):
+        backend = FakeBackend([
+            _raw_meal(1, "17-09.2025", cena="50.00"),
+            _raw_meal(2, "15-09.2025", cena="40.00"),
+            _raw_meal(3, "16-09.2025", cena="30.00"),
+            _raw_meal(4, "18-09.2025", cena="45.00", pocet=1),
+        ], konto=konto)
+        mock_Session.return_value = backend
+        s = StravaCZ("user", "pass", "1234")
+        s.menu.fetch()
+        return s, backend
+
+    @patch('strava_cz.main.requests.Session')
+    def test_plan_affordable_priorities(self, mock_Session):
+        """Balance is assigned to meals by priority, ordered meals are free."""
+        s, _ = self._client(mock_Session)
+
+        assert s.menu.plan_affordable(1, 2, 3, 4) == ([2, 3, 4], [1])
+        assert s.menu.plan_affordable(1, 2, 3, priority="order") == ([1, 2], [3])
+        assert s.menu.plan_affordable(1, 2, 3, balance=80, priority="price") == ([2, 3], [1])
+        assert s.menu.plan_affordable(
+            1, 2, 3, balance=80, priority=lambda meal: -meal["price"]
+        ) == ([1, 3], [2])
+        assert s.menu.plan_affordable(99) == ([], [99])
+        with pytest.raises(ValueError):
+            s.menu.plan_affordable(1, priority="random")
+
+    @patch('strava_cz.main.requests.Session')
+    def test_order_meals_check_balance(self, mock_Session):
+        """Unaffordable orders fail before any request is sent."""
+        from strava_cz import InsufficientBalanceError, StravaAPIError
+
+        s, backend = self._client(mock_Session, konto="60.00")
+        backend.log.clear()
+
+        with pytest.raises(InsufficientBalanceError):
+            s.menu.order_meals(1, 2, check_balance=True)
+        assert backend.log == []
+
+        with pytest.raises(StravaAPIError) as exc_info:
+            s.menu.order_meals(1, 2, 3, check_balance=True, continue_on_error=True)
+        assert "Meal 1: Insufficient balance" in str(exc_info.value)
+        assert "Meal 3: Insufficient balance" in str(exc_info.value)
+        sent = [endpoint for _, endpoint in backend.log]
+        assert sent.count("pridejJidloS5") == 1
+        assert [m["id"] for m in s.menu.get_meals(ordered=True)] == [2, 4]
+
+
+class TestSessionExpiry:
+    """Test transparent re-authentication after the session expires."""
+
+    class ExpiringBackend(FakeBackend):
+        """Backend that rejects the first sid and issues a new one on login."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.logins = 0
+
+        def post(self, url, json=None, headers=None, **kwargs):
+            endpoint = url.rsplit("/", 1)[-1]
+            if endpoint == "login":
+                self.logins += 1
+                response = super().post(url, json=json, headers=headers)
+                response.json.return_value["sid"] = f"SID{self.logins}"
+                return response
+            if json and json.get("sid") != f"SID{self.logins}":
+                with self.lock:
+                    self.log.append((threading.get_ident(), endpoint))
+                return self._response(401, {"message": "Session expired"})
+            return super().post(url, json=json, headers=headers)
+
+    @patch('strava_cz.main.requests.Session')
+    def test_relogin_and_retry_idempotent_request(self, mock_Session):
+        """Expired sid triggers one re-login and the fetch is retried."""
+        backend = self.ExpiringBackend([_raw_meal(1, "15-09.2025")])
+        mock_Session.return_value = backend
+
+        s = StravaCZ("user", "pass", "1234")
+        backend.logins += 1  # Server forgets SID1
+
+        s.menu.fetch()
+
+        assert backend.logins == 3
+        assert s.user.sid == "SID3"
+        assert s.user.is_logged_in
+        assert [m["id"] for m in s.menu.get_meals()] == [1]
+
+    @patch('strava_cz.main.requests.Session')
+    def test_concurrent_expiry_logs_in_once(self, mock_Session):
+        """Many threads hitting an expired session share a single re-login."""
+        backend = self.ExpiringBackend([_raw_meal(1, "15-09.2025")])
+        mock_Session.return_value = backend
+
+        s = StravaCZ("user", "pass", "1234")
+        backend.logins += 1
+
+        threads = [threading.Thread(target=s.menu.fetch) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert backend.logins == 3
+
+    @patch('strava_cz.main.requests.Session')
+    def test_stays_logged_in_during_relogin(self, mock_Session):
+        """Readers of is_logged_in never see the client logged out while it re-logs in."""
+        backend = self.ExpiringBackend([_raw_meal(1, "15-09.2025")])
+        mock_Session.return_value = backend
+        s = StravaCZ("user", "pass", "1234")
+        backend.logins += 1
+
+        seen = []
+        login = backend.post
+
+        def post(url, json=None, headers=None, **kwargs):
+            if url.endswith("/login"):
+                seen.append(s.user.is_logged_in)
+            return login(url, json=json, headers=headers, **kwargs)
+
+        backend.post = post
+        s.menu.fetch()
+        assert seen == [True]
+        assert s.user.is_logged_in
+
+    @patch('strava_cz.main.requests.Session')
+    def test_no_retry_for_non_idempotent_or_disabled(self, mock_Session):
+        """Order changes are not repeated and auto_relogin=False disables re-login."""
+        from strava_cz import SessionExpiredError, StravaAPIError
+
+        backend = self.ExpiringBackend([_raw_meal(1, "15-09.2025")])
+        mock_Session.return_value = backend
+
+        s = StravaCZ("user", "pass", "1234")
+        s.menu.fetch()
+        backend.logins += 1
+
+        with pytest.raises(SessionExpiredError):
+            s.menu._change_meal_order(1, True)
+        assert backend.logins == 3
+        s.menu._change_meal_order(1, True)  # The caller's retry uses the new session
+
+        backend.logins += 1
+
+        s.auto_relogin = False
+        with pytest.raises(StravaAPIError):
+            s.menu.fetch()
+        assert backend.logins == 4
+
+
+class TestArrowExport:
+    """Test Arrow/Parquet export of parsed menus."""
+
+    def _menu(self):
+        from strava_cz import Menu
+
+        menu = Menu(MagicMock())
+        menu.raw_data = {
+            "table0": [
+                _raw_meal(75, "15-09.2025", druh_popis="Polévka", nazev="Vyvar"),
+                _raw_meal(1, "15-09.2025", pocet=1),
+                _raw_meal(2, "16-09.2025", den="CO", cena="45.50"),
+            ]
+        }
+        menu._parse_menu_data()
+        return menu
+
+    def test_to_arrow_typed_columns(self):
+        """Exported table has typed columns for every meal."""
+        pa = pytest.importorskip("pyarrow")
+
+        table = self._menu().to_arrow()
+
+        assert table.num_rows == 3
+        assert table.schema.field("date").type == pa.date32()
+        assert table.schema.field("price").type == pa.float64()
+        assert table.schema.field("ordered").type == pa.bool_()
+        assert table.column("id").to_pylist() == [75, 1, 2]
+        assert table.column("order_type").to_pylist() == ["NORMAL", "NORMAL", "RESTRICTED"]
+        assert table.column("allergens").to_pylist()[0] == [{"code": "01", "name": "Lepek"}]
+
+    def test_parquet_roundtrip(self, tmp_path):
+        """Loading a written Parquet file restores the same meals."""
+        pytest.importorskip("pyarrow")
+        from strava_cz import Menu
+
+        menu = self._menu()
+        path = tmp_path / "menu.parquet"
+        menu.to_parquet(str(path))
+
+        loaded = Menu.from_parquet(str(path))
+
+        order_types = list(OrderType)
+        assert loaded.get_days(order_types=order_types) == menu.get_days(order_types=order_types)
+        assert loaded.get_by_id(2)["price"] == 45.5
+        assert loaded.is_ordered(1)
+
+
+class TestParserInterning:
+    """Test sharing of repeated strings between parsed menus."""
+
+    def test_menus_share_strings_and_allergens(self):
+        """Menus parsed from separate responses share names, dates and allergen lists."""
+        import json
+        from strava_cz import Menu
+
+        response = json.dumps({"table0": [_raw_meal(1, "15-09.2025", nazev="Rizek s kasi")]})
+        menus = []
+        for _ in range(2):
+            menu = Menu(MagicMock())
+            menu.raw_data = json.loads(response)
+            menu._parse_menu_data()
+            menus.append(menu.get_by_id(1))
+        first, second = menus
+
+        assert first == second
+        assert first["name"] is second["name"]
+        assert first["date"] is second["date"]
+        assert first["orderDeadline"] is second["orderDeadline"]
+        assert first["alergens"] is second["alergens"]
+        assert first["alergens"] == [["01", "Lepek"]]
+
+
+class TestMealCatalog:
+    """Test sharing of parsed meals between menus of one canteen."""
+
+    def _parse(self, catalog, meals, **filters):
+        import json
+        from strava_cz import Menu
+
+        menu = Menu(None, catalog=catalog)
+        menu._parse_menu_data(json.loads(json.dumps({"table0": meals})), **filters)
+        return menu
+
+    def test_menus_share_meals_and_keep_own_order_state(self):
+        """Only the order state differs between menus of the same canteen."""
+        from strava_cz.catalog import MealCatalog
+
+        catalog = MealCatalog()
+        first = self._parse(catalog, [_raw_meal(1, "15-09.2025"), _raw_meal(2, "16-09.2025")])
+        second = self._parse(
+            catalog, [_raw_meal(1, "15-09.2025", pocet=1), _raw_meal(2, "16-09.2025")]
+        )
+
+        assert first.get_by_id(2) is second.get_by_id(2)
+        assert not first.is_ordered(1) and second.is_ordered(1)
+        assert [day["ordered"] for day in second.get_days()] == [True, False]
+        assert catalog.stats() == {"meals": 2, "hits": 2, "misses": 2, "hit_rate": 0.5}
+
+        # Restrictions are part of the key, so other accounts are not affected
+        no_school = self._parse(catalog, [_raw_meal(1, "15-09.2025", den="VP")])
+        assert no_school.get_meals(order_types=list(OrderType)) == []
+        assert first.get_by_id(1)["orderType"] == OrderType.NORMAL
+
+    def test_changed_row_is_parsed_again(self):
+        """A row with different content replaces the cached meal."""
+        from strava_cz.catalog import MealCatalog
+
+        catalog = MealCatalog()
+        self._parse(catalog, [_raw_meal(1, "15-09.2025", nazev="Rizek")])
+        menu = self._parse(catalog, [_raw_meal(1, "15-09.2025", nazev="Guláš", cena="45.00")])
+
+        meal = menu.get_by_id(1)
+        assert (meal["name"], meal["price"]) == ("Guláš", 45.0)
+        assert catalog.stats()["misses"] == 2
+
+    def test_unhashable_row_fields_bypass_catalog(self):
+        """Rows with list valued forbidden allergens are parsed without the catalog."""
+        from strava_cz.catalog import MealCatalog
+
+        catalog = MealCatalog()
+        row = dict(_raw_meal(1, "15-09.2025"), zakazaneAlergeny=[["01", "Lepek"]])
+        menu = self._parse(catalog, [row, _raw_meal(2, "15-09.2025")])
+
+        assert menu.get_by_id(1)["forbiddenAlergens"] == [["01", "Lepek"]]
+        assert len(catalog) == 1
+
+    def test_filters_skip_rows_before_lookup(self):
+        """Rows outside the filters are neither looked up nor parsed."""
+        from datetime import date
+        from strava_cz.catalog import MealCatalog
+
+        catalog = MealCatalog()
+        rows = [_raw_meal(i, f"{10 + i:02d}-09.2025") for i in range(10)]
+        rows.append(_raw_meal(99, "12-09.2025", druh_popis="Polévka", nazev="Vyvar"))
+        menu = self._parse(
+            catalog,
+            rows,
+            date_from=date(2025, 9, 12),
+            date_to=date(2025, 9, 13),
+            meal_types=[MealType.MAIN],
+        )
+
+        assert [meal["id"] for meal in menu.get_meals()] == [2, 3]
+        assert catalog.stats()["misses"] == 2
+        assert len(catalog) == 2
+
+
+class TestParseFilters:
+    """Test date window and meal type filters applied while parsing."""
+
+    def _client(self, mock_Session):
+        backend = FakeBackend([
+            _raw_meal(1, "15-09.2025", druh_popis="Polévka", nazev="Vyvar"),
+            _raw_meal(2, "15-09.2025"),
+            _raw_meal(3, "16-09.2025"),
+            _raw_meal(4, "17-09.2025", druh_popis="Polévka", nazev="Gulasova"),
+            _raw_meal(5, "17-09.2025"),
+            _raw_meal(6, "18-09.2025"),
+        ])
+        mock_Session.return_value = backend
+        return StravaCZ("user", "pass", "1234"), backend
+
+    @patch('strava_cz.main.requests.Session')
+    def test_fetch_filters(self, mock_Session):
+        """Only meals inside the window and of the wanted types are parsed."""
+        from datetime import date
+
+        s, _ = self._client(mock_Session)
+
+        s.menu.fetch(date_from="2025-09-16", date_to=date(2025, 9, 17), meal_types=[MealType.MAIN])
+        assert [m["id"] for m in s.menu.get_meals()] == [3, 5]
+        assert s.menu.get_by_id(4) is None
+
+        s.menu.fetch(date_from="2025-09-17")
+        assert [m["id"] for m in s.menu.get_meals()] == [4, 5, 6]
+
+        s.menu.fetch()
+        assert len(s.menu.get_meals()) == 6
+
+        with pytest.raises(ValueError):
+            s.menu.fetch(date_from="2025-09-18", date_to="2025-09-17")
+        with pytest.raises(ValueError):
+            s.menu.fetch(date_from="18.09.2025")
+
+    @patch('strava_cz.main.requests.Session')
+    def test_refresh_after_order_keeps_filters(self, mock_Session):
+        """The refresh after ordering reuses the filters of the last fetch."""
+        s, _ = self._client(mock_Session)
+        s.menu.fetch(date_to="2025-09-16", meal_types=[MealType.MAIN])
+
+        s.menu.order_meals(3)
+
+        assert [m["id"] for m in s.menu.get_meals()] == [2, 3]
+        assert s.menu.is_ordered(3)
+
+
+class TestRawDataRetention:
+    """Test configurable retention of the raw menu response."""
+
+    @pytest.mark.parametrize("mode", ["keep", "compressed", "off"])
+    @patch('strava_cz.main.requests.Session')
+    def test_raw_data_modes(self, mock_Session, mode):
+        """Menu is parsed the same way in every mode, raw data is retained per mode."""
+        mock_Session.return_value = FakeBackend([
+            _raw_meal(1, "15-09.2025"), _raw_meal(2, "16-09.2025")
+        ])
+        s = StravaCZ("user", "pass", "1234", raw_data_mode=mode)
+        s.menu.fetch()
+
+        assert [m["id"] for m in s.menu.get_meals()] == [1, 2]
+        if mode == "off":
+            assert s.menu.raw_data == {}
+        else:
+            assert s.menu.raw_data["table0"][0]["nazev"] == "Meal 1"
+        assert isinstance(s.menu._raw_data, bytes) == (mode == "compressed")
+
+        s.logout()
+        assert s.menu.raw_data_mode == mode
+
+    def test_invalid_mode(self):
+        """Unknown retention mode is rejected."""
+        from strava_cz import Menu
+
+        with pytest.raises(ValueError):
+            Menu(MagicMock(), raw_data_mode="zip")
+
+
+class TestTypedDates:
+    """Test parsed date objects and lookup indexes."""
+
+    @patch('strava_cz.main.requests.Session')
+    def test_date_objects_and_lookups(self, mock_Session):
+        """Meals and days carry date objects, lookups accept strings and dates."""
+        from datetime import date
+
+        backend = FakeBackend([
+            _raw_meal(3, "02-10.2025"), _raw_meal(1, "30-09.2025"), _raw_meal(2, "30-09.2025")
+        ])
+        mock_Session.return_value = backend
+        s = StravaCZ("user", "pass", "1234")
+        s.menu.fetch()
+
+        days = s.menu.get_days()
+        assert [day["dateObj"] for day in days] == [date(2025, 9, 30), date(2025, 10, 2)]
+        assert s.menu.get_by_id(3)["dateObj"] == date(2025, 10, 2)
+        assert s.menu.get_by_date(date(2025, 9, 30)) is s.menu.get_by_date("2025-09-30")
+        assert s.menu.get_by_date("2025-10-01") is None
+        assert s.menu.plan_selection({date(2025, 9, 30): 2}).order == [2]
+
+        # Indexes follow the swapped menu list
+        backend.meals.append(_raw_meal(4, "03-10.2025"))
+        s.menu.fetch()
+        assert s.menu.get_by_id(4)["date"] == "2025-10-03"
+        assert s.menu.get_by_date(date(2025, 10, 3))["meals"][0]["id"] == 4
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+pytest.importorskip("hypercorn")
+
+from strava_cz import MealType, StravaCZ  # noqa: E402
+from strava_cz.mock_server import MockStravaServer  # noqa: E402
+from strava_cz.transport import HTTP2Transport  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    server = MockStravaServer(latency=0.01).start_http2()
+    for i in range(10):
+        server.add_account(f"user{i}", "heslo", balance=200)
+    server.generate_menu("1234", days=3)
+    yield server
+    server.stop()
+
+
+class TestHTTP2Transport:
+    """Test the shared HTTP/2 transport against the HTTP/2 mock server."""
+
+    def test_accounts_multiplex_over_one_connection(self, server):
+        """Concurrent sessions of many accounts share a single HTTP/2 connection."""
+        with HTTP2Transport(http1=False) as transport:
+
+            def session(i):
+                client = StravaCZ(
+                    f"user{i}", "heslo", "1234", base_url=server.url, transport=transport
+                )
+                client.menu.fetch()
+                meal_id = client.menu.get_meals(meal_types=[MealType.MAIN])[0]["id"]
+                client.menu.order_meals(meal_id)
+                stats = client.stats["endpoints"]["objednavky"]
+                client.logout()
+                return meal_id, stats
+
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                results = list(executor.map(session, range(10)))
+
+        assert server.connections == 1
+        for i, (meal_id, stats) in enumerate(results):
+            assert server.ordered(f"user{i}") == [meal_id]
+            assert stats["requests"] == 2
+            assert stats["wire_bytes"] < stats["decoded_bytes"]
+
+    def test_sessions_keep_separate_cookies(self, server):
+        """Cookies set for one account are not sent by another."""
+        with HTTP2Transport(http1=False) as transport:
+            first, second = transport.session(), transport.session()
+            first.cookies.set("ASP.NET_SessionId", "first")
+            assert "ASP.NET_SessionId" not in second.cookies
+            response = second.post(f"{server.url}/api/login", json={})
+            assert response.status_code == 401
+            assert response.http_version == "HTTP/2"
+
+    def test_connection_errors_become_requests_errors(self):
+        """Network failures are raised as requests exceptions like with requests.Session."""
+        with HTTP2Transport(http1=False, timeout=1) as transport:
+            with pytest.raises(requests.ConnectionError):
+                StravaCZ(base_url="http://127.0.0.1:9", transport=transport)
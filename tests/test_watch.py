@@ -0,0 +1,131 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from strava_cz import Menu, MenuWatcher
+
+
+def _meal(veta, datum, pocet=0, den="", cas_konec="2025-09-12T15:00:00", nazev=None):
+    return {
+        "datum": datum,
+        "druh_popis": "Oběd 1",
+        "delsiPopis": nazev or f"Meal {veta}",
+        "nazev": nazev or f"Meal {veta}",
+        "zakazaneAlergeny": None,
+        "alergeny": [],
+        "omezeniObj": {"den": den},
+        "pocet": pocet,
+        "veta": str(veta),
+        "cena": "40.00",
+        "casKonec": cas_konec,
+    }
+
+
+class FakeMenu(Menu):
+    """Menu returning prepared responses from fetch()."""
+
+    def __init__(self, responses):
+        super().__init__(MagicMock())
+        self.responses = list(responses)
+
+    def fetch(self):
+        self.raw_data = {"table0": self.responses.pop(0)}
+        self._parse_menu_data()
+        return self
+
+
+class TestMenuWatcher:
+    """Test watching menu changes."""
+
+    def test_poll_reports_changes(self):
+        """Successive polls emit events for added, removed, ordered and restricted meals."""
+        menu = FakeMenu([
+            [_meal(1, "15.09.2025"), _meal(2, "16.09.2025", pocet=1)],
+            [_meal(1, "15.09.2025", pocet=1, den="CO"), _meal(3, "17.09.2025")],
+        ])
+        received = []
+        watcher = MenuWatcher(menu, callback=received.append)
+
+        assert watcher.poll() == []
+        events = watcher.poll()
+
+        assert sorted((e["event"], e["meal"]["id"]) for e in events) == [
+            ("added", 3), ("order_type_changed", 1), ("ordered", 1), ("removed", 2)
+        ]
+        assert received == events
+
+    def test_adaptive_interval(self):
+        """Polling speeds up before the nearest deadline of an orderable meal."""
+        menu = FakeMenu([[
+            _meal(1, "15.09.2025", cas_konec="2025-09-12T15:00:00"),
+            _meal(2, "16.09.2025", cas_konec="2025-09-15T15:00:00"),
+            _meal(3, "11.09.2025", den="CO", cas_konec="2025-09-10T15:00:00"),
+        ]])
+        menu.fetch()
+        now = {"value": datetime(2025, 9, 12, 10, 0)}
+        watcher = MenuWatcher(
+            menu, interval=600, fast_interval=15, fast_window=1800, clock=lambda: now["value"]
+        )
+
+        assert watcher.next_deadline() == datetime(2025, 9, 12, 15, 0)
+        assert watcher.next_interval() == 600
+        now["value"] = datetime(2025, 9, 12, 14, 25)
+        assert watcher.next_interval() == 300  # Wake up at the start of the fast window
+        now["value"] = datetime(2025, 9, 12, 14, 40)
+        assert watcher.next_interval() == 15
+        now["value"] = datetime(2025, 9, 12, 14, 59, 55)
+        assert watcher.next_interval() == 6  # Right after the deadline
+        now["value"] = datetime(2025, 9, 20)
+        assert watcher.next_deadline() is None
+        assert watcher.next_interval() == 600
+
+    def test_run_reports_errors(self):
+        """Fetch errors are passed to on_error and polling continues."""
+        from strava_cz import StravaAPIError
+
+        menu = FakeMenu([[_meal(1, "15.09.2025")], [_meal(1, "15.09.2025", pocet=1)]])
+        original_fetch = menu.fetch
+        calls = {"count": 0}
+
+        def flaky_fetch():
+            calls["count"] += 1
+            if calls["count"] == 2:
+                raise StravaAPIError("Failed to fetch menu")
+            return original_fetch()
+
+        menu.fetch = flaky_fetch
+        errors, events = [], []
+        watcher = MenuWatcher(
+            menu, callback=events.append, interval=0, on_error=errors.append,
+            clock=lambda: datetime(2025, 9, 20),
+        )
+
+        watcher.run(max_polls=3)
+
+        assert [str(e) for e in errors] == ["Failed to fetch menu"]
+        assert [(e["event"], e["meal"]["id"]) for e in events] == [("ordered", 1)]
+
+    def test_failing_callback_does_not_stop_polling(self):
+        """Callback exceptions become warnings, other callbacks and polling go on."""
+        menu = FakeMenu([
+            [_meal(1, "15.09.2025")],
+            [_meal(1, "15.09.2025", pocet=1)],
+            [_meal(1, "15.09.2025")],
+        ])
+
+        def broken(event):
+            raise RuntimeError("Broken callback")
+
+        events = []
+        watcher = MenuWatcher(
+            menu, callback=broken, interval=0, clock=lambda: datetime(2025, 9, 20)
+        )
+        watcher.add_callback(events.append)
+
+        with pytest.warns(UserWarning, match="Broken callback"):
+            watcher.run(max_polls=3)
+
+        assert [(e["event"], e["meal"]["id"]) for e in events] == [
+            ("ordered", 1), ("cancelled", 1)
+        ]